@@ -0,0 +1,189 @@
+import asyncio
+import heapq
+import itertools
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# Requests allowed to run at once across all classes; keep at or below the
+# threadpool size (40) so admitted sync handlers do not queue again there.
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "32"))
+
+
+@dataclass
+class PriorityClass:
+    name: str
+    priority: int  # lower is served first
+    max_in_flight: int
+    max_wait: float  # seconds queued before the request is shed with 503
+    in_flight: int = 0
+    queued: int = 0
+    admitted: int = 0
+    shed: int = 0
+
+
+def default_classes() -> Dict[str, PriorityClass]:
+    return {
+        "high": PriorityClass("high", 0, ADMISSION_CAPACITY, max_wait=10.0),
+        "normal": PriorityClass(
+            "normal", 1, max(ADMISSION_CAPACITY * 3 // 4, 1), max_wait=3.0
+        ),
+        "low": PriorityClass("low", 2, max(ADMISSION_CAPACITY // 4, 1), max_wait=0.5),
+    }
+
+
+_ID = r"[^/]+"
+# First match wins; anything else is "normal"
+ROUTE_CLASSES: List[Tuple[str, "re.Pattern", str]] = [
+    (m, re.compile(p), c)
+    for m, p, c in [
+        # money and pickup paths: someone is standing at the counter
+        ("POST", rf"^/runs/{_ID}/orders(/batch|/{_ID}/verify-pin)?$", "high"),
+        ("DELETE", rf"^/runs/{_ID}/orders/{_ID}$", "high"),
+        ("PUT", rf"^/runs/{_ID}/(complete|cancel)$", "high"),
+        ("POST", r"^/points/redeem$", "high"),
+        # exports hold their slot until the whole body has streamed
+        ("GET", r"^/runs/(mine|joined)/history(/export)?$", "low"),
+        ("GET", r"^/points/history$", "low"),
+        ("GET", r"^/leaderboard$", "low"),
+        ("GET", r"^/runs/available/facets$", "low"),
+    ]
+]
+EXEMPT_PATHS = {"/", "/metrics/admission"}
+
+
+def classify(method: str, path: str) -> str:
+    for rule_method, pattern, name in ROUTE_CLASSES:
+        if method == rule_method and pattern.match(path):
+            return name
+    return "normal"
+
+
+class AdmissionController:
+    """Shared pool of slots handed out by priority, with per-class caps.
+
+    Runs entirely on the event loop, so no locking is needed. When a slot
+    frees up the highest-priority waiter whose class is under its cap goes
+    next; waiters that exceed their class's max_wait give up and are shed.
+    """
+
+    def __init__(
+        self,
+        capacity: int = ADMISSION_CAPACITY,
+        classes: Optional[Dict[str, PriorityClass]] = None,
+    ):
+        self.capacity = capacity
+        self.classes = classes or default_classes()
+        self.in_flight = 0
+        self._waiters: list = []  # (priority, seq, class, future)
+        self._seq = itertools.count()
+
+    def _can_start(self, cls: PriorityClass) -> bool:
+        return self.in_flight < self.capacity and cls.in_flight < cls.max_in_flight
+
+    def _start(self, cls: PriorityClass) -> None:
+        self.in_flight += 1
+        cls.in_flight += 1
+        cls.admitted += 1
+
+    async def acquire(self, name: str) -> bool:
+        cls = self.classes[name]
+        if not self._waiters and self._can_start(cls):
+            self._start(cls)
+            return True
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (cls.priority, next(self._seq), cls, fut))
+        cls.queued += 1
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), cls.max_wait)
+            return True
+        except asyncio.TimeoutError:
+            if fut.done():
+                # granted just as the wait expired; keep the slot
+                return True
+            fut.cancel()
+            cls.shed += 1
+            return False
+        except asyncio.CancelledError:
+            # client went away while queued; hand back a slot granted meanwhile
+            if fut.done():
+                self.release(name)
+            else:
+                fut.cancel()
+            raise
+        finally:
+            cls.queued -= 1
+
+    def release(self, name: str) -> None:
+        cls = self.classes[name]
+        self.in_flight -= 1
+        cls.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        skipped = []
+        while self._waiters and self.in_flight < self.capacity:
+            entry = heapq.heappop(self._waiters)
+            cls, fut = entry[2], entry[3]
+            if fut.done():
+                continue
+            if cls.in_flight >= cls.max_in_flight:
+                skipped.append(entry)
+                continue
+            self._start(cls)
+            fut.set_result(None)
+        for entry in skipped:
+            heapq.heappush(self._waiters, entry)
+
+    def snapshot(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "classes": {
+                name: {
+                    "in_flight": cls.in_flight,
+                    "queued": cls.queued,
+                    "admitted": cls.admitted,
+                    "shed": cls.shed,
+                }
+                for name, cls in self.classes.items()
+            },
+        }
+
+
+admission = AdmissionController()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that queues requests for a slot and sheds with 503."""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller or admission
+        if (
+            scope["type"] != "http"
+            or not ADMISSION_ENABLED
+            or scope["path"] in EXEMPT_PATHS
+            or scope["method"] == "OPTIONS"
+        ):
+            return await self.app(scope, receive, send)
+        name = classify(scope["method"], scope["path"])
+        if not await controller.acquire(name):
+            response = JSONResponse(
+                {"detail": "Server busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(name)
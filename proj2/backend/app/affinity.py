@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, func, select
+
+from .models import FoodRun, FoodRunArchive, Order, OrderArchive, UserAffinity
+from .scheduler import LeasedJob
+
+AFFINITY_REFRESH_ENABLED = os.getenv("AFFINITY_REFRESH_ENABLED", "1") == "1"
+AFFINITY_REFRESH_SECONDS = float(os.getenv("AFFINITY_REFRESH_SECONDS", "3600"))
+AFFINITY_LOOKBACK_DAYS = int(os.getenv("AFFINITY_LOOKBACK_DAYS", "180"))
+AFFINITY_CACHE_SIZE = int(os.getenv("AFFINITY_CACHE_SIZE", "10000"))
+KINDS = ("restaurant", "drop_point")
+
+# kind -> value -> weight
+Vector = Dict[str, Dict[str, float]]
+
+
+def rebuild_affinities(session: Session, batch_size: int = 1000) -> int:
+    """Recompute every user's affinity vector from recent order history.
+
+    One grouped query per kind and storage tier (live and archive), then the
+    table is replaced in a single transaction. Returns the rows written.
+    """
+    since = datetime.now(tz=timezone.utc) - timedelta(days=AFFINITY_LOOKBACK_DAYS)
+    counts: Dict[tuple, int] = defaultdict(int)
+    for order_model, run_model in ((Order, FoodRun), (OrderArchive, FoodRunArchive)):
+        for kind in KINDS:
+            column = getattr(run_model, kind)
+            rows = session.exec(
+                select(order_model.user_id, column, func.count(order_model.id))
+                .join(run_model, run_model.id == order_model.run_id)
+                .where(
+                    order_model.status != "cancelled",
+                    order_model.created_at >= since,
+                )
+                .group_by(order_model.user_id, column)
+            ).all()
+            for user_id, value, n in rows:
+                counts[(user_id, kind, value)] += n
+
+    # Normalize so each user's weights per kind sum to 1
+    totals: Dict[tuple, int] = defaultdict(int)
+    for (user_id, kind, _), n in counts.items():
+        totals[(user_id, kind)] += n
+    rows = [
+        {"user_id": u, "kind": k, "value": v, "weight": n / totals[(u, k)]}
+        for (u, k, v), n in counts.items()
+    ]
+    session.exec(delete(UserAffinity))
+    for i in range(0, len(rows), batch_size):
+        session.exec(insert(UserAffinity), params=rows[i : i + batch_size])
+    session.commit()
+    affinity_cache.clear()
+    return len(rows)
+
+
+class AffinityCache:
+    """LRU of user_id -> affinity vector, loaded from useraffinity on a miss."""
+
+    def __init__(self, max_size: int = AFFINITY_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._vectors: "OrderedDict[int, Vector]" = OrderedDict()
+
+    def get(self, session: Session, user_id: int) -> Vector:
+        with self._lock:
+            if user_id in self._vectors:
+                self._vectors.move_to_end(user_id)
+                return self._vectors[user_id]
+        vector: Vector = {kind: {} for kind in KINDS}
+        rows = session.exec(
+            select(UserAffinity.kind, UserAffinity.value, UserAffinity.weight).where(
+                UserAffinity.user_id == user_id
+            )
+        ).all()
+        for kind, value, weight in rows:
+            vector.setdefault(kind, {})[value] = weight
+        with self._lock:
+            self._vectors[user_id] = vector
+            while len(self._vectors) > self.max_size:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors.clear()
+
+
+affinity_cache = AffinityCache()
+
+
+def score_runs(vector: Vector, runs: List[FoodRun]) -> List[float]:
+    # Dot product of the user's vector with each run's one-hot features
+    restaurants = vector.get("restaurant", {})
+    drop_points = vector.get("drop_point", {})
+    return [
+        restaurants.get(r.restaurant, 0.0) + drop_points.get(r.drop_point, 0.0)
+        for r in runs
+    ]
+
+
+class AffinityRefresher(LeasedJob):
+    """Periodically rebuilds affinities; the lease keeps it to one worker."""
+
+    def __init__(self, interval: float = AFFINITY_REFRESH_SECONDS):
+        super().__init__(interval, "affinity_rebuild")
+
+    def work(self, session: Session) -> int:
+        return rebuild_affinities(session)
+
+    def on_follower(self) -> None:
+        # another worker rebuilds; just drop vectors that may be stale
+        affinity_cache.clear()
+
+
+affinity_refresher = AffinityRefresher()
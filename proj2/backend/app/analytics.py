@@ -0,0 +1,198 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from .eta import as_utc
+from .models import FoodRun, FoodRunArchive, Order, OrderArchive, RestaurantRollup
+
+METRICS = ("runs", "completed_runs", "seats", "orders", "revenue")
+Bucket = Tuple[str, datetime]
+
+
+def hour_of(created_at: Optional[datetime]) -> datetime:
+    # naive timestamps from SQLite are UTC
+    return as_utc(created_at).replace(minute=0, second=0, microsecond=0)
+
+
+def _bump(session: Session, deltas: Dict[Bucket, Dict[str, float]]) -> None:
+    """Add deltas to their buckets with one executemany upsert."""
+    if not deltas:
+        return
+    dialect = session.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    table = RestaurantRollup.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.restaurant, table.c.hour],
+        set_={m: table.c[m] + stmt.excluded[m] for m in METRICS},
+    )
+    session.execute(
+        stmt,
+        [
+            {
+                "restaurant": restaurant,
+                "hour": hour,
+                **{m: values.get(m, 0) for m in METRICS},
+            }
+            for (restaurant, hour), values in deltas.items()
+        ],
+    )
+
+
+def record_run(session: Session, run: FoodRun, **deltas: float) -> None:
+    """Count a run event (runs=1, seats=capacity, completed_runs=1, ...).
+
+    Part of the caller's transaction, like apply_points. Legacy runs without
+    a creation time belong to no bucket and are not counted.
+    """
+    if run.created_at is None:
+        return
+    _bump(session, {(run.restaurant, hour_of(run.created_at)): deltas})
+
+
+def record_orders(
+    session: Session, orders: Iterable[Tuple[int, float]], sign: int = 1
+) -> None:
+    """Count orders placed (sign=1) or cancelled (sign=-1).
+
+    orders are (run_id, amount) pairs; their runs' buckets are looked up in
+    one query and every bucket is updated once.
+    """
+    orders = list(orders)
+    if not orders:
+        return
+    runs = session.exec(
+        select(FoodRun.id, FoodRun.restaurant, FoodRun.created_at).where(
+            FoodRun.id.in_({run_id for run_id, _ in orders})
+        )
+    ).all()
+    bucket_of = {
+        run_id: (r, hour_of(created))
+        for run_id, r, created in runs
+        if created is not None
+    }
+    deltas: Dict[Bucket, Dict[str, float]] = defaultdict(
+        lambda: {"orders": 0, "revenue": 0.0}
+    )
+    for run_id, amount in orders:
+        if run_id not in bucket_of:
+            continue
+        bucket = deltas[bucket_of[run_id]]
+        bucket["orders"] += sign
+        bucket["revenue"] += sign * amount
+    _bump(session, deltas)
+
+
+def _aggregate(
+    runs: Sequence[tuple], orders: Sequence[tuple]
+) -> Dict[Bucket, Dict[str, float]]:
+    """Group raw rows into buckets.
+
+    runs are (id, restaurant, created_at, capacity, status) and orders
+    (run_id, amount) of orders that are not cancelled; orders of runs not
+    listed are ignored.
+    """
+    out: Dict[Bucket, Dict[str, float]] = {}
+    bucket_of = {}
+    for run_id, restaurant, created_at, capacity, status in runs:
+        key = (restaurant, hour_of(created_at))
+        bucket_of[run_id] = key
+        b = out.setdefault(key, dict.fromkeys(METRICS, 0))
+        b["runs"] += 1
+        b["seats"] += capacity
+        b["completed_runs"] += status == "completed"
+    for run_id, amount in orders:
+        if run_id not in bucket_of:
+            continue
+        b = out[bucket_of[run_id]]
+        b["orders"] += 1
+        b["revenue"] += amount
+    return out
+
+
+def rebuild_rollups(session: Session) -> int:
+    """Recompute every rollup from the live and archived runs and orders.
+
+    Reads only the columns it needs and aggregates them in memory, then
+    replaces the table. The caller commits. Returns the number of buckets.
+    """
+    runs: List[tuple] = []
+    orders: List[tuple] = []
+    for run_model, order_model in ((FoodRunArchive, OrderArchive), (FoodRun, Order)):
+        runs.extend(
+            session.exec(
+                select(
+                    run_model.id,
+                    run_model.restaurant,
+                    run_model.created_at,
+                    run_model.capacity,
+                    run_model.status,
+                ).where(run_model.created_at.is_not(None))
+            ).all()
+        )
+        orders.extend(
+            session.exec(
+                select(order_model.run_id, order_model.amount).where(
+                    order_model.status != "cancelled"
+                )
+            ).all()
+        )
+    buckets = _aggregate(runs, orders)
+    session.execute(delete(RestaurantRollup))
+    _bump(session, buckets)
+    return len(buckets)
+
+
+def query_rollups(
+    session: Session,
+    granularity: str = "day",
+    restaurants: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[dict]:
+    """Rollup rows, summed per UTC day unless granularity is hour."""
+    stmt = select(RestaurantRollup)
+    if restaurants:
+        stmt = stmt.where(RestaurantRollup.restaurant.in_(restaurants))
+    if since is not None:
+        stmt = stmt.where(RestaurantRollup.hour >= hour_of(since))
+    if until is not None:
+        stmt = stmt.where(RestaurantRollup.hour < as_utc(until))
+    out: Dict[Bucket, Dict[str, float]] = {}
+    for row in session.exec(stmt).all():
+        bucket = hour_of(row.hour)
+        if granularity == "day":
+            bucket = bucket.replace(hour=0)
+        b = out.setdefault((row.restaurant, bucket), dict.fromkeys(METRICS, 0))
+        for m in METRICS:
+            b[m] += getattr(row, m)
+    return [
+        {
+            "restaurant": restaurant,
+            "bucket": bucket,
+            **values,
+            "revenue": round(values["revenue"], 2),
+            "fill_rate": values["orders"] / values["seats"] if values["seats"] else 0.0,
+        }
+        for (restaurant, bucket), values in sorted(
+            out.items(), key=lambda kv: (kv[0][1], kv[0][0])
+        )
+    ]
+
+
+if __name__ == "__main__":
+    # python -m app.analytics  (rebuild every rollup from the raw tables)
+    import time
+
+    from .db import engine
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        count = rebuild_rollups(session)
+        session.commit()
+    print(f"rebuilt {count} buckets in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,83 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from .models import FoodRun, FoodRunArchive, Order, OrderArchive
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "200"))
+FINISHED_STATUSES = ("completed", "cancelled", "expired")
+
+
+def _columns(model):
+    return [c.name for c in model.__table__.columns]
+
+
+def archive_finished_runs(
+    session: Session,
+    older_than: Optional[timedelta] = None,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Move finished runs (and their orders) older than the cutoff to archive.
+
+    Each batch copies rows with INSERT ... SELECT, deletes them from the live
+    tables and commits, so a batch is never half moved and locks stay short.
+    Returns the number of runs archived.
+    """
+    if older_than is None:
+        older_than = timedelta(days=ARCHIVE_AFTER_DAYS)
+    cutoff = datetime.now(tz=timezone.utc) - older_than
+    run_cols = _columns(FoodRun)
+    order_cols = _columns(Order)
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = session.exec(
+            select(FoodRun.id)
+            .where(
+                FoodRun.status.in_(FINISHED_STATUSES),
+                FoodRun.created_at < cutoff,
+            )
+            .order_by(FoodRun.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        session.exec(
+            insert(FoodRunArchive).from_select(
+                run_cols,
+                select(*[FoodRun.__table__.c[c] for c in run_cols]).where(
+                    FoodRun.id.in_(ids)
+                ),
+            )
+        )
+        session.exec(
+            insert(OrderArchive).from_select(
+                order_cols,
+                select(*[Order.__table__.c[c] for c in order_cols]).where(
+                    Order.run_id.in_(ids)
+                ),
+            )
+        )
+        session.exec(delete(Order).where(Order.run_id.in_(ids)))
+        session.exec(delete(FoodRun).where(FoodRun.id.in_(ids)))
+        session.commit()
+        archived += len(ids)
+        batches += 1
+    return archived
+
+
+if __name__ == "__main__":
+    # python -m app.archive [days]
+    import sys
+
+    from .db import engine
+
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_DAYS
+    with Session(engine) as session:
+        moved = archive_finished_runs(session, older_than=timedelta(days=days))
+    print(f"archived {moved} runs older than {days} days")
@@ -1,27 +1,33 @@
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Union
+from functools import lru_cache
+from typing import Any, Dict, Optional, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 
 ALGORITHM = "HS256"
 SECRET_KEY = os.getenv("SECRET_KEY", "change_me")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "120"))
 
-# Use PBKDF2-SHA256 (no external C extensions required, avoids bcrypt backend issues on Windows)
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 bearer = HTTPBearer(auto_error=False)
 
 
+# passlib and python-jose are imported on first use to keep worker boot fast
+@lru_cache(maxsize=None)
+def pwd_context():
+    from passlib.context import CryptContext
+
+    # Use PBKDF2-SHA256 (no external C extensions required, avoids bcrypt backend issues on Windows)
+    return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return pwd_context().verify(plain, hashed)
 
 
 def create_access_token(sub: Union[str, int], email: str) -> str:
@@ -32,9 +38,21 @@ def create_access_token(sub: Union[str, int], email: str) -> str:
         "iat": int(now.timestamp()),
         "exp": int((now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)).timestamp()),
     }
+    from jose import jwt
+
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """Verified claims of a token, or None if it is invalid or expired."""
+    from jose import JWTError, jwt
+
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
 def get_current_user_claims(
     credentials: HTTPAuthorizationCredentials = Depends(bearer),
 ) -> Dict[str, Any]:
@@ -42,10 +60,9 @@ def get_current_user_claims(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token"
         )
-    token = credentials.credentials
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
+    claims = decode_access_token(credentials.credentials)
+    if claims is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
+    return claims
@@ -0,0 +1,234 @@
+import os
+import time
+import zlib
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+# Smaller bodies are not worth the CPU or the extra header bytes
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# gzip level (1-9); brotli quality and zstd level have their own knobs
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+COMPRESSION_TYPES = frozenset(
+    t.strip()
+    for t in os.getenv(
+        "COMPRESSION_TYPES",
+        "application/json,application/x-ndjson,text/csv,text/plain,text/html",
+    ).split(",")
+    if t.strip()
+)
+# Server preference when the client accepts several equally
+PREFERENCE = ("zstd", "br", "gzip")
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+@lru_cache(maxsize=None)
+def available_encoders() -> Dict[str, Callable[[], object]]:
+    """Streaming compressor factories by content-coding name.
+
+    brotli and zstandard are optional; they are looked up on first use so
+    the import cost is not paid at startup.
+    """
+    encoders: Dict[str, Callable[[], object]] = {
+        "gzip": lambda: _Gzip(COMPRESSION_LEVEL)
+    }
+    try:
+        import brotli
+
+        class _Brotli:
+            def __init__(self):
+                self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+
+            def compress(self, data: bytes) -> bytes:
+                return self._obj.process(data)
+
+            def flush(self) -> bytes:
+                return self._obj.flush()
+
+            def finish(self) -> bytes:
+                return self._obj.finish()
+
+        encoders["br"] = _Brotli
+    except ImportError:
+        pass
+    try:
+        import zstandard
+
+        class _Zstd:
+            def __init__(self):
+                self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+            def compress(self, data: bytes) -> bytes:
+                return self._obj.compress(data)
+
+            def flush(self) -> bytes:
+                return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+            def finish(self) -> bytes:
+                return self._obj.flush()
+
+        encoders["zstd"] = _Zstd
+    except ImportError:
+        pass
+    return encoders
+
+
+def negotiate(accept_encoding: str, encoders=None) -> Optional[str]:
+    """Pick a content-coding from an Accept-Encoding header, or None."""
+    encoders = available_encoders() if encoders is None else encoders
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for name in PREFERENCE:
+        q = weights.get(name, weights.get("*", 0.0))
+        if name in encoders and q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compress eligible responses with the best encoding the client accepts.
+
+    Like starlette's GZipMiddleware, but with brotli/zstd when installed and
+    a content-type allowlist. Single-body responses under minimum_size pass
+    through untouched; streamed responses are compressed and flushed chunk by
+    chunk.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        content_types: FrozenSet[str] = COMPRESSION_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        responder = _CompressingSend(send, encoding, self)
+        await self.app(scope, receive, responder)
+
+
+class _CompressingSend:
+    def __init__(self, send, encoding: str, config: CompressionMiddleware):
+        self.send = send
+        self.encoding = encoding
+        self.config = config
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "").split(";")[0].strip()
+        return (
+            content_type in self.config.content_types
+            and "content-encoding" not in headers
+        )
+
+    def _compressed_start(self) -> dict:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        del headers["Content-Length"]
+        return self.start
+
+    async def __call__(self, message):
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            return
+        if kind != "http.response.body" or self.passthrough:
+            return await self.send(message)
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            small = not more and len(body) < self.config.minimum_size
+            if small or not self._eligible(headers):
+                self.passthrough = True
+                await self.send(self.start)
+                return await self.send(message)
+            self.compressor = available_encoders()[self.encoding]()
+            if not more:
+                data = self.compressor.compress(body) + self.compressor.finish()
+                start = self._compressed_start()
+                MutableHeaders(raw=start["headers"])["Content-Length"] = str(len(data))
+                await self.send(start)
+                return await self.send({"type": kind, "body": data})
+            await self.send(self._compressed_start())
+
+        # flush each chunk so a slow stream reaches the client as it is produced
+        data = self.compressor.compress(body)
+        data += self.compressor.flush() if more else self.compressor.finish()
+        if data or not more:
+            await self.send({"type": kind, "body": data, "more_body": more})
+
+
+def benchmark(payload: bytes, repeat: int = 5) -> List[dict]:
+    """CPU cost vs bytes saved for each available encoder on one payload."""
+    results = []
+    for name, factory in available_encoders().items():
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            encoder = factory()
+            size = len(encoder.compress(payload) + encoder.finish())
+            best = min(best, time.perf_counter() - started)
+        results.append(
+            {
+                "encoding": name,
+                "bytes": size,
+                "ratio": size / len(payload),
+                "ms": best * 1000,
+                "mb_per_s": len(payload) / best / 1e6,
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    # python -m app.compression saved_response.json
+    import sys
+
+    with open(sys.argv[1], "rb") as f:
+        raw = f.read()
+    print(f"{len(raw)} bytes uncompressed")
+    for row in benchmark(raw):
+        print(
+            f"  {row['encoding']:5} {row['bytes']:9d} B  ratio {row['ratio']:.3f}  "
+            f"{row['ms']:7.2f} ms  {row['mb_per_s']:6.1f} MB/s"
+        )
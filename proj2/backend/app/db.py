@@ -1,75 +1,140 @@
 import os
+import threading
+import time
+from collections import OrderedDict
 from contextlib import contextmanager
+from fastapi import Request
 from sqlmodel import SQLModel, create_engine, Session
 from sqlalchemy import text
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+# Optional read replica for GET handlers; defaults to the primary
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "")
+
+# Engines are built on first use (db.engine / db.read_engine, see __getattr__)
+# so importing the app stays cheap; tests may swap entries in _engines.
+_engines: dict = {}
+_engines_lock = threading.Lock()
+
+
+def _make_engine(url: str):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(url, echo=False, connect_args=connect_args)
+
+
+def get_engine():
+    engine = _engines.get("primary")
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.setdefault("primary", _make_engine(DATABASE_URL))
+    return engine
+
+
+def get_read_engine():
+    if "read" not in _engines:
+        replica = _make_engine(READ_DATABASE_URL) if READ_DATABASE_URL else None
+        primary = get_engine()
+        with _engines_lock:
+            _engines.setdefault("read", replica or primary)
+    return _engines["read"]
+
+
+def __getattr__(name: str):
+    if name == "engine":
+        return get_engine()
+    if name == "read_engine":
+        return get_read_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# How far the replica may trail the primary. A client that wrote within this
+# window reads from the primary, and so does everyone while the measured lag
+# exceeds it.
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
 
 
 def create_db_and_tables() -> None:
-    SQLModel.metadata.create_all(engine)
-
-
-# Lightweight, startup-time safety check for SQLite dev DBs.
-# If the 'points' column was added to the User model after the DB was created,
-# make sure the column exists to avoid runtime errors without requiring a manual reset.
-def ensure_user_points_column() -> None:
-    try:
-        # Only applicable for SQLite; other engines should use proper migrations.
-        if not DATABASE_URL.startswith("sqlite"):
-            return
-        # Use a transaction so ALTER + UPDATE are committed together
-        with engine.begin() as conn:
-            cols = [row[1] for row in conn.execute(text("PRAGMA table_info('user')"))]
-            if "points" not in cols:
-                conn.execute(
-                    text("ALTER TABLE user ADD COLUMN points INTEGER DEFAULT 0")
-                )
-                conn.execute(text("UPDATE user SET points = 0 WHERE points IS NULL"))
-    except Exception:
-        # Best-effort safeguard; if anything goes wrong here, don't block startup.
-        # Users can still delete dev.db manually. Intentionally swallow to avoid crash.
-        pass
-
-
-def ensure_foodrun_capacity_column() -> None:
-    try:
-        if not DATABASE_URL.startswith("sqlite"):
-            return
-        with engine.begin() as conn:
-            cols = [
-                row[1] for row in conn.execute(text("PRAGMA table_info('foodrun')"))
-            ]
-            if "capacity" not in cols:
-                conn.execute(
-                    text("ALTER TABLE foodrun ADD COLUMN capacity INTEGER DEFAULT 5")
-                )
-                conn.execute(
-                    text("UPDATE foodrun SET capacity = 5 WHERE capacity IS NULL")
-                )
-    except Exception:
-        # Same best-effort approach
-        pass
-
-
-def ensure_order_pin_column() -> None:
-    try:
-        if not DATABASE_URL.startswith("sqlite"):
-            return
-        with engine.begin() as conn:
-            cols = [row[1] for row in conn.execute(text("PRAGMA table_info('order')"))]
-            if "pin" not in cols:
-                conn.execute(text("ALTER TABLE 'order' ADD COLUMN pin TEXT"))
-    except Exception:
-        # Best-effort; ignore failures in dev
-        pass
+    # Schema changes to existing tables go through app.migrations
+    SQLModel.metadata.create_all(get_engine())
 
 
 # Dependency for FastAPI routes
 
 
-def get_session():
-    with Session(engine) as session:
+def get_session(request: Request = None):
+    if request is not None and request.method not in ("GET", "HEAD"):
+        _recent_writers.mark(_client_key(request))
+    with Session(get_engine()) as session:
+        yield session
+
+
+def get_read_session(request: Request):
+    """Session for read-only handlers: the replica unless it may be stale."""
+    engine, read_engine = get_engine(), get_read_engine()
+    use_replica = (
+        read_engine is not engine
+        and not _recent_writers.wrote_recently(_client_key(request))
+        and replica_lag_seconds() <= REPLICA_MAX_LAG_SECONDS
+    )
+    with Session(read_engine if use_replica else engine) as session:
         yield session
+
+
+def _client_key(request: Request) -> str:
+    # the bearer token identifies a logged-in client without decoding it
+    auth = request.headers.get("authorization")
+    if auth:
+        return auth
+    return request.client.host if request.client else ""
+
+
+class _RecentWriters:
+    """Clients that wrote within the lag window, bounded LRU of timestamps."""
+
+    def __init__(self, max_keys: int = 50000):
+        self.max_keys = max_keys
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        with self._lock:
+            self._seen.pop(key, None)
+            self._seen[key] = time.monotonic()
+            if len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+
+    def wrote_recently(self, key: str) -> bool:
+        with self._lock:
+            at = self._seen.get(key)
+        return at is not None and time.monotonic() - at <= REPLICA_MAX_LAG_SECONDS
+
+
+_recent_writers = _RecentWriters()
+_lag = {"checked": 0.0, "value": 0.0}
+
+
+def replica_lag_seconds() -> float:
+    """Replica apply lag, re-measured at most once per second.
+
+    Only Postgres streaming replicas report it; other backends count as 0.
+    """
+    if not READ_DATABASE_URL.startswith("postgresql"):
+        return 0.0
+    now = time.monotonic()
+    if now - _lag["checked"] >= 1:
+        _lag["checked"] = now
+        try:
+            with get_read_engine().connect() as conn:
+                lag = conn.execute(
+                    text(
+                        # an idle, fully caught-up replica reports no lag
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = "
+                        "pg_last_wal_replay_lsn() THEN 0 ELSE EXTRACT(EPOCH FROM "
+                        "now() - pg_last_xact_replay_timestamp()) END"
+                    )
+                ).scalar()
+            _lag["value"] = float(lag or 0)
+        except Exception:
+            # unreachable replica: treat as hopelessly behind
+            _lag["value"] = float("inf")
+    return _lag["value"]
@@ -0,0 +1,116 @@
+import os
+import re
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlmodel import Session, select, update
+
+from .models import FoodRun
+
+# Runners type wall-clock times ("12:30", "1pm"); interpret them in campus time
+try:
+    CAMPUS_TZ = ZoneInfo(os.getenv("CAMPUS_TIMEZONE", "America/New_York"))
+except ZoneInfoNotFoundError:
+    # Windows without the tzdata package has no zone database
+    CAMPUS_TZ = timezone.utc
+
+_CLOCK = re.compile(r"^(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?$", re.IGNORECASE)
+_DURATION = re.compile(r"^(\d+)\s*([smhd]?)$", re.IGNORECASE)
+_LATE_TOLERANCE = timedelta(hours=1)
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "": 60}
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes; everything is stored in UTC
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def parse_eta(value: str, reference: Optional[datetime] = None) -> Optional[datetime]:
+    """Best-effort parse of a free-text ETA into an aware UTC datetime.
+
+    Accepts ISO-8601 timestamps and clock times like "10:30", "1pm" or
+    "12:15 PM". Clock times resolve to their first occurrence after the
+    reference (usually the run's creation time), allowing up to an hour of
+    lateness. Returns None for anything else.
+    """
+    text_value = (value or "").strip()
+    if not text_value:
+        return None
+    reference = as_utc(reference) or datetime.now(tz=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(text_value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=CAMPUS_TZ)
+        return parsed.astimezone(timezone.utc)
+    except ValueError:
+        pass
+
+    m = _CLOCK.match(text_value)
+    if not m:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2) or 0)
+    meridiem = (m.group(3) or "").lower().replace(".", "")
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    local_ref = reference.astimezone(CAMPUS_TZ)
+    for offset in (-1, 0, 1):
+        candidate = datetime.combine(
+            local_ref.date() + timedelta(days=offset),
+            time(hour, minute),
+            tzinfo=CAMPUS_TZ,
+        )
+        if candidate >= local_ref - _LATE_TOLERANCE:
+            return candidate.astimezone(timezone.utc)
+    return None
+
+
+def parse_duration(value: str) -> Optional[timedelta]:
+    # "15m", "2h", "90s", "1d"; a bare number means minutes
+    m = _DURATION.match((value or "").strip())
+    if not m:
+        return None
+    return timedelta(seconds=int(m.group(1)) * _UNITS[m.group(2).lower()])
+
+
+def backfill_eta_at(session: Session, batch_size: int = 500) -> int:
+    """Populate FoodRun.eta_at from the legacy eta strings in id-ordered batches.
+
+    Rows whose eta cannot be parsed keep a NULL eta_at and are flagged
+    eta_unparsed, so a later run does not parse them again. Returns the
+    number of rows set.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        rows = session.exec(
+            select(FoodRun.id, FoodRun.eta, FoodRun.created_at)
+            .where(
+                FoodRun.eta_at.is_(None),
+                FoodRun.eta_unparsed.is_not(True),
+                FoodRun.id > last_id,
+            )
+            .order_by(FoodRun.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+        last_id = rows[-1][0]
+        params = []
+        for run_id, eta, created_at in rows:
+            eta_at = parse_eta(eta, created_at)
+            params.append(
+                {"id": run_id, "eta_at": eta_at, "eta_unparsed": eta_at is None}
+            )
+        # ORM bulk UPDATE by primary key: one executemany per batch
+        session.exec(update(FoodRun), params=params)
+        session.commit()
+        updated += sum(p["eta_at"] is not None for p in params)
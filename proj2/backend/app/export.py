@@ -0,0 +1,151 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Iterable, Iterator, Sequence
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from .eta import as_utc
+from .models import User
+
+# Rows fetched per round trip; Postgres streams them from a server-side cursor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Encoded rows are sent in chunks of roughly this many bytes
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))
+
+RUNNER_COLUMNS = (
+    "run_id",
+    "restaurant",
+    "drop_point",
+    "eta",
+    "run_status",
+    "order_id",
+    "user_email",
+    "items",
+    "amount",
+    "order_status",
+    "ordered_at",
+)
+JOINER_COLUMNS = (
+    "run_id",
+    "restaurant",
+    "drop_point",
+    "eta",
+    "run_status",
+    "runner_email",
+    "order_id",
+    "items",
+    "amount",
+    "order_status",
+    "ordered_at",
+)
+
+
+def runner_history_rows(user_id: int, run_model, order_model):
+    """One row per order of the runner's finished runs; runs without orders
+    still get a row, with empty order columns."""
+    joiner = aliased(User)
+    return (
+        select(
+            run_model.id.label("run_id"),
+            run_model.restaurant,
+            run_model.drop_point,
+            run_model.eta,
+            run_model.status.label("run_status"),
+            order_model.id.label("order_id"),
+            joiner.email.label("user_email"),
+            order_model.items,
+            order_model.amount,
+            order_model.status.label("order_status"),
+            order_model.created_at.label("ordered_at"),
+        )
+        .join(order_model, order_model.run_id == run_model.id, isouter=True)
+        .join(joiner, joiner.id == order_model.user_id, isouter=True)
+        .where(run_model.runner_id == user_id, run_model.status != "active")
+        .order_by(run_model.id, order_model.id)
+    )
+
+
+def joiner_history_rows(user_id: int, run_model, order_model):
+    """One row per order the user placed on a finished run."""
+    return (
+        select(
+            run_model.id.label("run_id"),
+            run_model.restaurant,
+            run_model.drop_point,
+            run_model.eta,
+            run_model.status.label("run_status"),
+            User.email.label("runner_email"),
+            order_model.id.label("order_id"),
+            order_model.items,
+            order_model.amount,
+            order_model.status.label("order_status"),
+            order_model.created_at.label("ordered_at"),
+        )
+        .join(run_model, run_model.id == order_model.run_id)
+        .join(User, User.id == run_model.runner_id, isouter=True)
+        .where(order_model.user_id == user_id, run_model.status != "active")
+        .order_by(run_model.id, order_model.id)
+    )
+
+
+def stream_rows(
+    engine: Engine, statements: Sequence, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[dict]:
+    """Yield result rows as dicts, batch_size at a time.
+
+    Opens its own session: the response body is produced after the request's
+    session dependency has already been closed.
+    """
+    with Session(engine) as session:
+        for stmt in statements:
+            result = session.execute(stmt.execution_options(yield_per=batch_size))
+            for row in result:
+                yield dict(row._mapping)
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return as_utc(value).isoformat()
+    return value
+
+
+def _chunked(pieces: Iterable[str], size: int) -> Iterator[bytes]:
+    # The first piece goes out alone so the client sees bytes right away
+    buf, buffered = [], size
+    for piece in pieces:
+        buf.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield "".join(buf).encode()
+            buf, buffered = [], 0
+    if buf:
+        yield "".join(buf).encode()
+
+
+def ndjson_body(rows: Iterable[dict], chunk_size: int = EXPORT_CHUNK_BYTES):
+    lines = (json.dumps({k: _value(v) for k, v in row.items()}) + "\n" for row in rows)
+    return _chunked(lines, chunk_size)
+
+
+def csv_body(
+    rows: Iterable[dict],
+    columns: Sequence[str],
+    chunk_size: int = EXPORT_CHUNK_BYTES,
+):
+    def lines():
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: _value(v) for k, v in row.items()})
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        yield buf.getvalue()
+
+    return _chunked(lines(), chunk_size)
@@ -0,0 +1,68 @@
+from typing import Callable, FrozenSet, Optional, Type
+
+from fastapi import HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+
+class Fieldset:
+    """Top-level fields a client asked for via ?fields= and ?include=.
+
+    Without fields= every field is returned, so existing clients are
+    unaffected. include= adds expensive nested fields (orders) to a sparse
+    selection. The id is always returned.
+    """
+
+    def __init__(
+        self, fields: Optional[FrozenSet[str]], include: FrozenSet[str] = frozenset()
+    ):
+        self.fields = None if fields is None else fields | include | {"id"}
+
+    def wants(self, name: str) -> bool:
+        return self.fields is None or name in self.fields
+
+    def project(self, payload: dict) -> dict:
+        if self.fields is None:
+            return payload
+        return {k: v for k, v in payload.items() if k in self.fields}
+
+    def respond(self, payload):
+        """Full payloads go through the response model as usual; sparse ones
+        are returned as JSON directly, since they would fail its validation."""
+        if self.fields is None:
+            return payload
+        if isinstance(payload, list):
+            body = [self.project(p) for p in payload]
+        else:
+            body = self.project(payload)
+        # same encoding as the response model, e.g. UTC datetimes end in Z
+        return JSONResponse(to_jsonable_python(body))
+
+
+def _names(raw: Optional[str]) -> FrozenSet[str]:
+    return frozenset(n.strip() for n in (raw or "").split(",") if n.strip())
+
+
+def fieldset_param(model: Type[BaseModel]) -> Callable[..., Fieldset]:
+    """Dependency parsing ?fields=a,b&include=orders against model's fields."""
+    known = frozenset(model.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None, description="Comma-separated fields to return (default: all)"
+        ),
+        include: Optional[str] = Query(
+            None, description="Nested fields to add to a sparse selection: orders"
+        ),
+    ) -> Fieldset:
+        selected = None if fields is None else _names(fields)
+        included = _names(include)
+        unknown = sorted(((selected or frozenset()) | included) - known)
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown field: {', '.join(unknown)}"
+            )
+        return Fieldset(selected, included)
+
+    return dependency
@@ -0,0 +1,151 @@
+import math
+import os
+from typing import Dict, List, Sequence, Tuple
+
+from sqlmodel import Session, func, select, update
+
+from .models import DropPoint, FoodRun
+
+EARTH_RADIUS_M = 6_371_000.0
+# Grid bucket edge in degrees of latitude/longitude (~110 m of latitude per 0.001)
+GRID_CELL_DEG = float(os.getenv("GRID_CELL_DEG", "0.002"))
+
+# A few well-known NC State drop points, seeded into an empty droppoint table
+CAMPUS_DROP_POINTS = [
+    ("Hunt Library", 35.7694, -78.6764),
+    ("D. H. Hill Library", 35.7874, -78.6695),
+    ("Talley Student Union", 35.7839, -78.6756),
+    ("EBII", 35.7719, -78.6738),
+    ("Carmichael Gym", 35.7841, -78.6735),
+    ("Wolf Village", 35.7692, -78.6840),
+    ("Fountain Dining Hall", 35.7877, -78.6730),
+    ("Centennial Campus Oval", 35.7706, -78.6780),
+]
+
+
+def cell_of(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / GRID_CELL_DEG), math.floor(lon / GRID_CELL_DEG)
+
+
+def cell_ranges(
+    lat: float, lon: float, radius_m: float
+) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Inclusive (lat, lon) cell ranges of the bounding box around a circle."""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    # longitude degrees shrink with latitude; guard the poles
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    lat_lo, lon_lo = cell_of(lat - dlat, lon - dlon)
+    lat_hi, lon_hi = cell_of(lat + dlat, lon + dlon)
+    return (lat_lo, lat_hi), (lon_lo, lon_hi)
+
+
+def distances_m(
+    lat: float, lon: float, lats: Sequence[float], lons: Sequence[float]
+) -> List[float]:
+    """Haversine distances from one point to many.
+
+    Only the few candidates left after the grid lookup are measured.
+    """
+    out = []
+    phi1 = math.radians(lat)
+    for lat2, lon2 in zip(lats, lons):
+        phi2 = math.radians(lat2)
+        a = (
+            math.sin((phi2 - phi1) / 2) ** 2
+            + math.cos(phi1)
+            * math.cos(phi2)
+            * math.sin(math.radians(lon2 - lon) / 2) ** 2
+        )
+        out.append(2 * EARTH_RADIUS_M * math.asin(math.sqrt(a)))
+    return out
+
+
+def seed_drop_points(session: Session) -> int:
+    if session.exec(select(DropPoint.id).limit(1)).first() is not None:
+        return 0
+    for name, lat, lon in CAMPUS_DROP_POINTS:
+        cell_lat, cell_lon = cell_of(lat, lon)
+        session.add(
+            DropPoint(name=name, lat=lat, lon=lon, cell_lat=cell_lat, cell_lon=cell_lon)
+        )
+    session.commit()
+    return len(CAMPUS_DROP_POINTS)
+
+
+def link_runs_to_drop_points(session: Session) -> int:
+    # Resolve free-text drop points to DropPoint rows in one correlated UPDATE
+    match = (
+        select(DropPoint.id)
+        .where(func.lower(DropPoint.name) == func.lower(FoodRun.drop_point))
+        .scalar_subquery()
+    )
+    result = session.exec(
+        update(FoodRun)
+        .where(FoodRun.drop_point_id.is_(None), match.is_not(None))
+        .values(drop_point_id=match)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return result.rowcount
+
+
+def add_drop_point(session: Session, name: str, lat: float, lon: float) -> DropPoint:
+    """Create a drop point and link the unlinked runs that already name it.
+
+    Raises IntegrityError when the name is taken.
+    """
+    cell_lat, cell_lon = cell_of(lat, lon)
+    point = DropPoint(
+        name=name.strip(), lat=lat, lon=lon, cell_lat=cell_lat, cell_lon=cell_lon
+    )
+    session.add(point)
+    session.flush()
+    session.exec(
+        update(FoodRun)
+        .where(
+            FoodRun.drop_point_id.is_(None),
+            func.lower(FoodRun.drop_point) == point.name.lower(),
+        )
+        .values(drop_point_id=point.id)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    session.refresh(point)
+    return point
+
+
+def drop_points_within(
+    session: Session, lat: float, lon: float, radius_m: float
+) -> Dict[int, float]:
+    """Drop point ids within radius_m of (lat, lon), mapped to their distance.
+
+    The (cell_lat, cell_lon) index narrows candidates to the grid cells under
+    the circle's bounding box; exact distances are computed only for those.
+    """
+    (lat_lo, lat_hi), (lon_lo, lon_hi) = cell_ranges(lat, lon, radius_m)
+    rows = session.exec(
+        select(DropPoint.id, DropPoint.lat, DropPoint.lon).where(
+            DropPoint.cell_lat.between(lat_lo, lat_hi),
+            DropPoint.cell_lon.between(lon_lo, lon_hi),
+        )
+    ).all()
+    if not rows:
+        return {}
+    ids, lats, lons = zip(*rows)
+    return {
+        dp_id: dist
+        for dp_id, dist in zip(ids, distances_m(lat, lon, lats, lons))
+        if dist <= radius_m
+    }
+
+
+if __name__ == "__main__":
+    # python -m app.geo "Name" lat lon  (drop points are managed by operators)
+    import sys
+
+    from .db import engine
+
+    name, lat, lon = sys.argv[1], float(sys.argv[2]), float(sys.argv[3])
+    with Session(engine) as session:
+        point = add_drop_point(session, name, lat, lon)
+    print(f"added drop point {point.id}: {point.name}")
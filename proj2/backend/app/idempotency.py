@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from .eta import as_utc
+from .models import IdempotencyRecord
+from .scheduler import LeasedJob
+
+IDEMPOTENCY_TTL = timedelta(hours=float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+IDEMPOTENCY_PURGE_ENABLED = os.getenv("IDEMPOTENCY_PURGE_ENABLED", "1") == "1"
+IDEMPOTENCY_PURGE_SECONDS = float(os.getenv("IDEMPOTENCY_PURGE_SECONDS", "3600"))
+
+
+def fingerprint(method: str, path: str, payload) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True)
+    return hashlib.sha256(f"{method} {path} {body}".encode()).hexdigest()
+
+
+def replay(
+    session: Session, user_id: int, key: Optional[str], digest: str
+) -> Optional[JSONResponse]:
+    """Return the stored response for a retried request, or None to proceed.
+
+    A plain primary-key read, so retries never reach the handler's writes.
+    Reusing a key for a different request is rejected with 422.
+    """
+    if not key:
+        return None
+    record = session.get(IdempotencyRecord, (user_id, key))
+    if record is None:
+        return None
+    if as_utc(record.expires_at) <= datetime.now(tz=timezone.utc):
+        # expired but not yet purged; free the key for this request
+        session.delete(record)
+        session.flush()
+        return None
+    if record.fingerprint != digest:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    return JSONResponse(
+        content=json.loads(record.body),
+        status_code=record.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def remember(
+    session: Session,
+    user_id: int,
+    key: Optional[str],
+    digest: str,
+    response,
+    status_code: int = 200,
+) -> None:
+    """Stage the response so it commits in the same transaction as the write.
+
+    If a concurrent retry with the same key commits first, this insert fails
+    on the primary key and the caller's whole transaction rolls back.
+    """
+    if not key:
+        return
+    session.add(
+        IdempotencyRecord(
+            user_id=user_id,
+            key=key,
+            fingerprint=digest,
+            status_code=status_code,
+            body=json.dumps(jsonable_encoder(response)),
+            expires_at=datetime.now(tz=timezone.utc) + IDEMPOTENCY_TTL,
+        )
+    )
+
+
+def commit_or_replay(
+    session: Session, user_id: int, key: Optional[str], digest: str
+) -> Optional[JSONResponse]:
+    """Commit the handler's work; if a concurrent retry won, replay its response."""
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        replayed = replay(session, user_id, key, digest) if key else None
+        if replayed is None:
+            raise
+        return replayed
+    return None
+
+
+def purge_expired_keys(session: Session, now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(tz=timezone.utc)
+    result = session.exec(
+        delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= now)
+    )
+    session.commit()
+    return result.rowcount
+
+
+class IdempotencyJanitor(LeasedJob):
+    def __init__(self, interval: float = IDEMPOTENCY_PURGE_SECONDS):
+        super().__init__(interval, "idempotency_purge")
+
+    def work(self, session: Session) -> int:
+        return purge_expired_keys(session)
+
+
+idempotency_janitor = IdempotencyJanitor()
@@ -0,0 +1,136 @@
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, func, select
+
+from .models import PointsTransaction, User
+
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "50"))
+# Other workers' writes only show up after a rebuild, so rebuild periodically
+LEADERBOARD_REFRESH_SECONDS = int(os.getenv("LEADERBOARD_REFRESH_SECONDS", "300"))
+WINDOWS = {"day": 1, "week": 7, "month": 30}
+
+
+class TopK:
+    """Highest scores, kept exactly above a floor.
+
+    Holds up to 2k entries. Every untracked user scores <= floor, so tracked
+    entries above the floor are ranked exactly. When a tracked score drops to
+    the floor or below it is discarded, and top() returns None once fewer than
+    the requested entries remain exact, signalling a rebuild.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.capacity = 2 * k
+        self.scores: Dict[int, int] = {}
+        self.floor = 0
+        self.complete = True  # every user with a positive score is tracked
+
+    def load(self, rows: List[Tuple[int, int]]) -> None:
+        self.scores = dict(rows)
+        self.complete = len(rows) < self.capacity
+        self.floor = 0 if self.complete else min(self.scores.values())
+
+    def update(self, key: int, score: int) -> None:
+        if score <= self.floor:
+            self.scores.pop(key, None)
+            return
+        self.scores[key] = score
+        if len(self.scores) > self.capacity:
+            evicted = min(self.scores, key=lambda u: (self.scores[u], -u))
+            self.floor = max(self.floor, self.scores.pop(evicted))
+            self.complete = False
+
+    def top(self, n: int) -> Optional[List[Tuple[int, int]]]:
+        exact = [(u, s) for u, s in self.scores.items() if s > self.floor]
+        if len(exact) < n and not self.complete:
+            return None
+        return heapq.nsmallest(n, exact, key=lambda e: (-e[1], e[0]))
+
+
+class Leaderboard:
+    def __init__(self, k: int = LEADERBOARD_SIZE):
+        self.k = k
+        self._lock = threading.Lock()
+        self.overall = TopK(k)
+        # day -> user_id -> points earned that day, for the windowed boards
+        self.earned: Dict[date, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.built_at: Optional[float] = None
+
+    def rebuild(self, session: Session) -> None:
+        # Served by the index on user.points: only the top 2k rows are read
+        rows = session.exec(
+            select(User.id, User.points)
+            .where(User.points > 0)
+            .order_by(User.points.desc(), User.id)
+            .limit(self.overall.capacity)
+        ).all()
+        since = datetime.now(tz=timezone.utc) - timedelta(days=max(WINDOWS.values()))
+        day = func.date(PointsTransaction.created_at)
+        earned = session.exec(
+            select(PointsTransaction.user_id, day, func.sum(PointsTransaction.delta))
+            .where(
+                PointsTransaction.reason == "run_completed",
+                PointsTransaction.created_at >= since,
+            )
+            .group_by(PointsTransaction.user_id, day)
+        ).all()
+        with self._lock:
+            self.overall.load([(uid, pts) for uid, pts in rows])
+            self.earned.clear()
+            for uid, d, pts in earned:
+                self.earned[date.fromisoformat(str(d)[:10])][uid] += int(pts)
+            self.built_at = time.monotonic()
+
+    def record(self, user_id: int, balance: int, delta: int, reason: str) -> None:
+        # Called after a balance change has been committed
+        today = datetime.now(tz=timezone.utc).date()
+        with self._lock:
+            self.overall.update(user_id, balance)
+            if reason == "run_completed" and delta > 0:
+                self.earned[today][user_id] += delta
+            oldest = today - timedelta(days=max(WINDOWS.values()) - 1)
+            for d in [d for d in self.earned if d < oldest]:
+                del self.earned[d]
+
+    def top(
+        self, session: Session, window: str = "all", limit: int = 10
+    ) -> List[Tuple[int, int]]:
+        stale = (
+            self.built_at is None
+            or time.monotonic() - self.built_at > LEADERBOARD_REFRESH_SECONDS
+        )
+        if stale:
+            self.rebuild(session)
+        if window == "all":
+            with self._lock:
+                result = self.overall.top(limit)
+            if result is None:
+                self.rebuild(session)
+                with self._lock:
+                    result = self.overall.top(limit) or []
+            return result
+
+        first_day = datetime.now(tz=timezone.utc).date() - timedelta(
+            days=WINDOWS[window] - 1
+        )
+        totals: Dict[int, int] = defaultdict(int)
+        with self._lock:
+            for d, per_user in self.earned.items():
+                if d >= first_day:
+                    for uid, pts in per_user.items():
+                        totals[uid] += pts
+        return heapq.nsmallest(
+            limit,
+            ((u, s) for u, s in totals.items() if s > 0),
+            key=lambda e: (-e[1], e[0]),
+        )
+
+
+leaderboard = Leaderboard()
@@ -1,20 +1,66 @@
 import os
-from typing import List
+import time
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, List, Literal, Optional
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, select
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, func, select, update
+from sqlalchemy import literal, null
 from sqlalchemy.exc import IntegrityError
-from contextlib import asynccontextmanager
-
-from .db import (
-    create_db_and_tables,
-    get_session,
-    ensure_user_points_column,
-    ensure_foodrun_capacity_column,
-    ensure_order_pin_column,
+from sqlalchemy.orm import aliased
+from contextlib import asynccontextmanager, contextmanager
+
+from . import db
+from .db import get_session, get_read_session
+from .migrations import migrate
+from .models import (
+    User,
+    FoodRun,
+    Order,
+    PointsTransaction,
+    FoodRunArchive,
+    OrderArchive,
+    DropPoint,
+    OrderRequest,
+)
+from .points import apply_points
+from .analytics import query_rollups, record_orders, record_run
+from .leaderboard import LEADERBOARD_SIZE, leaderboard
+from .scheduler import RUN_EXPIRY_ENABLED, run_expiry
+from .affinity import (
+    AFFINITY_REFRESH_ENABLED,
+    affinity_cache,
+    affinity_refresher,
+    score_runs,
+)
+from .matching import MATCHING_ENABLED, matching_engine
+from .idempotency import (
+    IDEMPOTENCY_PURGE_ENABLED,
+    commit_or_replay,
+    fingerprint,
+    idempotency_janitor,
+    remember,
+    replay,
+)
+from .ratelimit import RateLimitMiddleware
+from .singleflight import SingleFlight
+from .admission import AdmissionMiddleware, admission
+from .compression import CompressionMiddleware
+from .fieldsets import Fieldset, fieldset_param
+from .export import (
+    JOINER_COLUMNS,
+    RUNNER_COLUMNS,
+    csv_body,
+    joiner_history_rows,
+    ndjson_body,
+    runner_history_rows,
+    stream_rows,
 )
-from .models import User, FoodRun, Order
+from .geo import drop_points_within
+from .search import apply_run_search, search_terms
+from .eta import as_utc, parse_duration, parse_eta
 from .schemas import (
     AuthRequest,
     AuthResponse,
@@ -26,7 +72,18 @@ from .schemas import (
     OrderResponse,
     OrderJoinResponse,
     PointsResponse,
+    PointsHistoryResponse,
+    LeaderboardEntry,
+    AvailableFacetsResponse,
+    AnalyticsBucket,
+    DashboardResponse,
+    NearbyRunResponse,
+    DropPointOut,
     PinVerifyRequest,
+    BatchOrderRequest,
+    BatchOrderResponse,
+    OrderRequestCreate,
+    OrderRequestOut,
 )
 from .auth import (
     get_password_hash,
@@ -38,22 +95,52 @@ from .auth import (
 load_dotenv()
 
 
+# Seconds spent in each startup phase, reported by python -m app.startup
+startup_timings: Dict[str, float] = {}
+
+
+@contextmanager
+def _timed(phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[phase] = time.perf_counter() - started
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create DB tables on startup
-    create_db_and_tables()
-    # Ensure SQLite dev DBs have newly added columns (e.g., 'points')
-    ensure_user_points_column()
-    ensure_foodrun_capacity_column()
-    ensure_order_pin_column()
+    startup_timings.clear()
+    # Create or upgrade the schema and run one-off backfills; a warm boot is
+    # a single version check
+    with _timed("migrate"):
+        migrate(db.engine)
+    with _timed("background_jobs"):
+        if RUN_EXPIRY_ENABLED:
+            run_expiry.start()
+        if AFFINITY_REFRESH_ENABLED:
+            affinity_refresher.start()
+        if MATCHING_ENABLED:
+            matching_engine.start()
+        if IDEMPOTENCY_PURGE_ENABLED:
+            idempotency_janitor.start()
     yield
+    await run_expiry.stop()
+    await affinity_refresher.stop()
+    await matching_engine.stop()
+    await idempotency_janitor.stop()
 
 
 origins_env = os.getenv("CORS_ORIGINS", "http://localhost:5173")
 origins = [o.strip() for o in origins_env.split(",") if o.strip()]
 
 app = FastAPI(title="CSC510 API", lifespan=lifespan)
+available_flight = SingleFlight()
 
+# Innermost first: requests are rate limited before they queue for a slot,
+# and CORS wraps both so 429/503 responses still carry its headers
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -61,6 +148,216 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so every response (including 429/503) can be compressed
+app.add_middleware(CompressionMiddleware)
+
+
+def _run_base(run: FoodRun) -> dict:
+    # Run columns shared by every FoodRunResponse payload
+    base = run.model_dump(
+        include={
+            "id",
+            "runner_id",
+            "restaurant",
+            "drop_point",
+            "eta",
+            "capacity",
+            "status",
+        }
+    )
+    base["eta_at"] = as_utc(run.eta_at)
+    return base
+
+
+def _order_payload(o, user_email) -> dict:
+    return {
+        "id": o.id,
+        "run_id": o.run_id,
+        "user_id": o.user_id,
+        "status": o.status,
+        "items": o.items,
+        "amount": o.amount,
+        "user_email": user_email or str(o.user_id),
+    }
+
+
+def _seats_taken_subquery():
+    # Correlated count of non-cancelled orders for the outer FoodRun row
+    seat = aliased(Order)
+    return (
+        select(func.count(seat.id))
+        .where(seat.run_id == FoodRun.id, seat.status != "cancelled")
+        .correlate(FoodRun)
+        .scalar_subquery()
+    )
+
+
+def _listing_query(fieldset: Fieldset = Fieldset(None)):
+    # Runs with their runner's email and seats taken, in one statement; the
+    # join and the count are left out when the fieldset does not ask for them
+    with_runner = fieldset.wants("runner_username")
+    with_seats = fieldset.wants("seats_remaining")
+    stmt = select(
+        FoodRun,
+        User.email if with_runner else null(),
+        _seats_taken_subquery() if with_seats else literal(0),
+    )
+    if with_runner:
+        stmt = stmt.join(User, User.id == FoodRun.runner_id, isouter=True)
+    return stmt
+
+
+def _listing_payload(r: FoodRun, runner_email, taken) -> dict:
+    return {
+        **_run_base(r),
+        "runner_username": runner_email or str(r.runner_id),
+        "seats_remaining": max(r.capacity - (taken or 0), 0),
+        "orders": [],
+    }
+
+
+def _joined_runs_query(
+    user_id: int,
+    run_model=FoodRun,
+    order_model=Order,
+    fieldset: Fieldset = Fieldset(None),
+):
+    # The caller's orders joined to their runs and runners. Ordered so the
+    # earliest order per run comes first; callers keep one row per run.
+    # Archived runs are always finished, so they carry no seat count; the
+    # runner join and the count are skipped when the fieldset leaves them out.
+    live = run_model is FoodRun and fieldset.wants("seats_remaining")
+    with_runner = fieldset.wants("runner_username")
+    stmt = (
+        select(
+            order_model,
+            run_model,
+            User.email if with_runner else null(),
+            _seats_taken_subquery() if live else literal(0),
+        )
+        .join(run_model, run_model.id == order_model.run_id)
+        .where(order_model.user_id == user_id)
+        .order_by(run_model.id, order_model.id)
+    )
+    if with_runner:
+        stmt = stmt.join(User, User.id == run_model.runner_id, isouter=True)
+    return stmt
+
+
+def _runner_history(
+    session: Session, user_id: int, run_model, order_model, with_orders: bool = True
+):
+    # Finished runs of one runner with all their orders: up to three statements
+    runs = session.exec(
+        select(run_model)
+        .where(run_model.runner_id == user_id, run_model.status != "active")
+        .order_by(run_model.id)
+    ).all()
+    if not runs:
+        return []
+    by_run = {}
+    if with_orders:
+        orders = session.exec(
+            select(order_model, User.email)
+            .join(User, User.id == order_model.user_id, isouter=True)
+            .where(order_model.run_id.in_([r.id for r in runs]))
+            .order_by(order_model.id)
+        ).all()
+        for o, email in orders:
+            by_run.setdefault(o.run_id, []).append(_order_payload(o, email))
+    runner_email = session.exec(select(User.email).where(User.id == user_id)).first()
+    return [
+        {
+            **_run_base(r),
+            "runner_username": runner_email or str(r.runner_id),
+            "seats_remaining": 0,
+            "orders": by_run.get(r.id, []),
+        }
+        for r in runs
+    ]
+
+
+def _runner_runs(
+    session: Session,
+    runs: List[FoodRun],
+    fieldset: Fieldset,
+    runner_email: Optional[str] = None,
+):
+    # Live runs of one runner; orders, seat counts and the runner's email are
+    # only queried when the fieldset asks for them (and the email is unknown)
+    if not runs:
+        return []
+    ids = [r.id for r in runs]
+    live = (Order.run_id.in_(ids), Order.status != "cancelled")
+    by_run = {run_id: [] for run_id in ids}
+    taken = {}
+    if fieldset.wants("orders"):
+        orders = session.exec(
+            select(Order, User.email)
+            .join(User, User.id == Order.user_id, isouter=True)
+            .where(*live)
+            .order_by(Order.id)
+        ).all()
+        for o, email in orders:
+            by_run[o.run_id].append(_order_payload(o, email))
+        taken = {run_id: len(orders) for run_id, orders in by_run.items()}
+    elif fieldset.wants("seats_remaining"):
+        taken = dict(
+            session.exec(
+                select(Order.run_id, func.count(Order.id))
+                .where(*live)
+                .group_by(Order.run_id)
+            ).all()
+        )
+    if runner_email is None and fieldset.wants("runner_username"):
+        runner_email = session.exec(
+            select(User.email).where(User.id == runs[0].runner_id)
+        ).first()
+    return [
+        {
+            **_run_base(r),
+            "runner_username": runner_email or str(r.runner_id),
+            "seats_remaining": max(r.capacity - taken.get(r.id, 0), 0),
+            "orders": by_run[r.id],
+        }
+        for r in runs
+    ]
+
+
+def _joined_runs_payload(rows, live: bool) -> List[dict]:
+    responses = []
+    seen = set()
+    for mine, r, runner_email, taken in rows:
+        if r.id in seen:
+            continue
+        seen.add(r.id)
+        cap = r.capacity or 0
+        # Build explicit payload to avoid any None values breaking response validation
+        responses.append(
+            {
+                "id": r.id,
+                "runner_id": r.runner_id,
+                "restaurant": r.restaurant or "",
+                "drop_point": r.drop_point or "",
+                "eta": r.eta or "",
+                "eta_at": as_utc(r.eta_at),
+                "capacity": cap,
+                "status": r.status or "active",
+                "runner_username": runner_email or str(r.runner_id),
+                "seats_remaining": max(cap - (taken or 0), 0) if live else 0,
+                "orders": [],
+                # expose pin to the owner of the order only
+                "my_order": {
+                    "id": mine.id,
+                    "run_id": mine.run_id,
+                    "items": mine.items,
+                    "amount": mine.amount,
+                    "status": mine.status,
+                    "pin": mine.pin or "",
+                },
+            }
+        )
+    return responses
 
 
 @app.get("/")
@@ -68,6 +365,12 @@ def root():
     return {"status": "ok"}
 
 
+@app.get("/metrics/admission")
+def admission_metrics():
+    # queue depth, in-flight and shed counts per priority class
+    return admission.snapshot()
+
+
 @app.post("/auth/register", response_model=AuthResponse)
 def register(payload: AuthRequest, session: Session = Depends(get_session)):
     # Enforce NCSU email domain for registration
@@ -122,7 +425,8 @@ def login(payload: AuthRequest, session: Session = Depends(get_session)):
 
 @app.get("/auth/me", response_model=UserOut)
 def me(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
     user = session.exec(select(User).where(User.id == int(claims["sub"]))).first()
     if not user:
@@ -135,39 +439,51 @@ def create_run(
     run: FoodRunCreate,
     claims=Depends(get_current_user_claims),
     session: Session = Depends(get_session),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
 ):
     user_id = int(claims["sub"])
-    food_run = FoodRun(**run.model_dump(), runner_id=user_id)
-    session.add(food_run)
-    session.commit()
-    session.refresh(food_run)
-    # respond with seats_remaining derived from capacity - current orders
-    orders_count = session.exec(
-        select(Order).where(Order.run_id == food_run.id, Order.status != "cancelled")
-    ).all()
-    seats_remaining = max(food_run.capacity - len(orders_count), 0)
-    base = food_run.model_dump(
-        include={
-            "id",
-            "runner_id",
-            "restaurant",
-            "drop_point",
-            "eta",
-            "capacity",
-            "status",
-        }
+    digest = fingerprint("POST", "/runs", run)
+    replayed = replay(session, user_id, idempotency_key, digest)
+    if replayed is not None:
+        return replayed
+    drop_point_id = session.exec(
+        select(DropPoint.id).where(
+            func.lower(DropPoint.name) == run.drop_point.strip().lower()
+        )
+    ).first()
+    eta_at = parse_eta(run.eta)
+    food_run = FoodRun(
+        **run.model_dump(),
+        runner_id=user_id,
+        eta_at=eta_at,
+        eta_unparsed=eta_at is None,
+        drop_point_id=drop_point_id,
+        # set here rather than by the database so its analytics hour is known
+        created_at=datetime.now(tz=timezone.utc),
     )
-    return {
+    session.add(food_run)
+    session.flush()
+    record_run(session, food_run, runs=1, seats=food_run.capacity)
+    base = _run_base(food_run)
+    # a new run has no orders yet
+    response = {
         **base,
         "runner_username": claims.get("email", str(user_id)),
-        "seats_remaining": seats_remaining,
+        "seats_remaining": food_run.capacity,
         "orders": [],
     }
+    remember(session, user_id, idempotency_key, digest, FoodRunResponse(**response))
+    replayed = commit_or_replay(session, user_id, idempotency_key, digest)
+    if replayed is not None:
+        return replayed
+    run_expiry.schedule(response["id"], response["eta_at"])
+    return response
 
 
 @app.get("/runs", response_model=List[FoodRunResponse])
 def list_runs(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
     runs = session.exec(select(FoodRun)).all()
     # attach seats_remaining for each run
@@ -179,17 +495,7 @@ def list_runs(
         seats_remaining = max(r.capacity - len(count), 0)
         # fetch runner email
         runner = session.get(User, r.runner_id)
-        base = r.model_dump(
-            include={
-                "id",
-                "runner_id",
-                "restaurant",
-                "drop_point",
-                "eta",
-                "capacity",
-                "status",
-            }
-        )
+        base = _run_base(r)
         responses.append(
             {
                 **base,
@@ -207,8 +513,13 @@ def create_order(
     order: OrderCreate,
     claims=Depends(get_current_user_claims),
     session: Session = Depends(get_session),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
 ):
     user_id = int(claims["sub"])
+    digest = fingerprint("POST", f"/runs/{run_id}/orders", order)
+    replayed = replay(session, user_id, idempotency_key, digest)
+    if replayed is not None:
+        return replayed
     food_run = session.get(FoodRun, run_id)
     if not food_run:
         raise HTTPException(status_code=404, detail="Run not found")
@@ -240,10 +551,10 @@ def create_order(
         **{**order.model_dump(), "pin": pin}, run_id=run_id, user_id=user_id
     )
     session.add(order_row)
-    session.commit()
-    session.refresh(order_row)
+    session.flush()
+    record_orders(session, [(run_id, order_row.amount)])
     u = session.get(User, user_id)
-    return {
+    response = {
         "id": order_row.id,
         "run_id": order_row.run_id,
         "user_id": order_row.user_id,
@@ -253,6 +564,11 @@ def create_order(
         "user_email": u.email if u else str(user_id),
         "pin": pin,
     }
+    remember(session, user_id, idempotency_key, digest, OrderJoinResponse(**response))
+    replayed = commit_or_replay(session, user_id, idempotency_key, digest)
+    if replayed is not None:
+        return replayed
+    return response
 
 
 @app.post("/runs/{run_id}/orders/{order_id}/verify-pin")
@@ -300,105 +616,353 @@ def cancel_my_order(
     if not ord:
         raise HTTPException(status_code=404, detail="No active order to cancel")
     ord.status = "cancelled"
+    record_orders(session, [(run_id, ord.amount)], sign=-1)
     session.commit()
     return {"message": "Order cancelled"}
 
 
+def _request_payload(req: OrderRequest, run_id: Optional[int] = None) -> dict:
+    return {
+        **req.model_dump(
+            include={
+                "id",
+                "restaurant",
+                "drop_point",
+                "items",
+                "amount",
+                "status",
+                "order_id",
+            }
+        ),
+        "latest_eta": as_utc(req.latest_eta),
+        "run_id": run_id,
+    }
+
+
+@app.post("/requests", response_model=OrderRequestOut)
+def create_order_request(
+    payload: OrderRequestCreate,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_session),
+):
+    user_id = int(claims["sub"])
+    latest_eta = parse_eta(payload.latest_eta)
+    if latest_eta is None:
+        raise HTTPException(status_code=400, detail="Unrecognized latest_eta")
+    if latest_eta <= datetime.now(tz=timezone.utc):
+        raise HTTPException(status_code=400, detail="latest_eta is in the past")
+    req = OrderRequest(
+        **payload.model_dump(exclude={"latest_eta"}),
+        user_id=user_id,
+        latest_eta=latest_eta,
+    )
+    session.add(req)
+    session.commit()
+    session.refresh(req)
+    # match promptly instead of waiting for the next interval
+    matching_engine.wake()
+    return _request_payload(req)
+
+
+@app.get("/requests/mine", response_model=List[OrderRequestOut])
+def list_my_order_requests(
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    user_id = int(claims["sub"])
+    rows = session.exec(
+        select(OrderRequest, Order.run_id)
+        .outerjoin(Order, Order.id == OrderRequest.order_id)
+        .where(OrderRequest.user_id == user_id)
+        .order_by(OrderRequest.id.desc())
+    ).all()
+    return [_request_payload(req, run_id) for req, run_id in rows]
+
+
+@app.delete("/requests/{request_id}")
+def cancel_order_request(
+    request_id: int,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_session),
+):
+    user_id = int(claims["sub"])
+    req = session.get(OrderRequest, request_id)
+    if not req or req.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Request not found")
+    # conditional flip so a concurrent matching round cannot also claim it
+    result = session.exec(
+        update(OrderRequest)
+        .where(OrderRequest.id == request_id, OrderRequest.status == "open")
+        .values(status="cancelled")
+    )
+    session.commit()
+    if result.rowcount == 0:
+        raise HTTPException(status_code=400, detail="Request is not open")
+    return {"message": "Request cancelled"}
+
+
+def _available_conditions(
+    user_id: Optional[int],
+    min_seats: int = 1,
+    departing_within: Optional[str] = None,
+    eta_after: Optional[datetime] = None,
+    eta_before: Optional[datetime] = None,
+) -> list:
+    # Shared WHERE clause of /runs/available and its facets
+    conditions = [
+        FoodRun.status == "active",
+        FoodRun.capacity - _seats_taken_subquery() >= min_seats,
+    ]
+    if user_id is not None:
+        conditions.append(FoodRun.runner_id != user_id)
+    if departing_within is not None:
+        window = parse_duration(departing_within)
+        if window is None:
+            raise HTTPException(status_code=400, detail="Invalid departing_within")
+        now = datetime.now(tz=timezone.utc)
+        eta_after = max(as_utc(eta_after), now) if eta_after else now
+        eta_before = (
+            min(as_utc(eta_before), now + window) if eta_before else now + window
+        )
+    # Range scan on (status, eta_at); runs without a parsed eta are excluded
+    if eta_after is not None:
+        conditions.append(FoodRun.eta_at >= as_utc(eta_after))
+    if eta_before is not None:
+        conditions.append(FoodRun.eta_at <= as_utc(eta_before))
+    return conditions
+
+
+def _available_rows(
+    session: Session,
+    user_id: Optional[int],
+    restaurant,
+    drop_point,
+    min_seats,
+    departing_within,
+    eta_after,
+    eta_before,
+    order: str,
+    end: Optional[int],
+    fields: Optional[FrozenSet[str]] = None,
+) -> list:
+    # (run, payload) pairs for /runs/available; user_id None skips the
+    # per-user condition so the result can be shared between callers.
+    # fields is the caller's Fieldset selection, None for every field.
+    conditions = _available_conditions(
+        user_id, min_seats, departing_within, eta_after, eta_before
+    )
+    # (status, restaurant) / (status, drop_point) indexes serve these
+    if restaurant:
+        conditions.append(FoodRun.restaurant.in_(restaurant))
+    if drop_point:
+        conditions.append(FoodRun.drop_point.in_(drop_point))
+    stmt = _listing_query(Fieldset(fields)).where(*conditions)
+    if order == "eta":
+        stmt = stmt.order_by(FoodRun.eta_at.is_(None), FoodRun.eta_at, FoodRun.id)
+    elif order == "seats":
+        stmt = stmt.order_by(
+            (FoodRun.capacity - _seats_taken_subquery()).desc(), FoodRun.id
+        )
+    else:
+        stmt = stmt.order_by(FoodRun.id)
+    if end is not None:
+        stmt = stmt.limit(end)
+    return [(row[0], _listing_payload(*row)) for row in session.exec(stmt).all()]
+
+
+def _available_key(session: Session, args: tuple) -> tuple:
+    # A caller pinned to the primary must not share a replica's stale result
+    return ("available", str(session.get_bind().url)) + args
+
+
 @app.get("/runs/available", response_model=List[FoodRunResponse])
 def list_available_runs(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    restaurant: Optional[List[str]] = Query(None),
+    drop_point: Optional[List[str]] = Query(None),
+    min_seats: int = Query(1, ge=1),
+    departing_within: Optional[str] = None,
+    eta_after: Optional[datetime] = None,
+    eta_before: Optional[datetime] = None,
+    sort: Literal["default", "eta", "seats", "personalized"] = "default",
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    fieldset: Fieldset = Depends(fieldset_param(FoodRunResponse)),
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
     user_id = int(claims["sub"])
-    runs = session.exec(
-        select(FoodRun).where(FoodRun.status == "active", FoodRun.runner_id != user_id)
+    if sort == "eta" or (sort == "default" and departing_within is not None):
+        order = "eta"
+    else:
+        order = "seats" if sort == "seats" else "id"
+    # personalized ranks the whole candidate set, so it cannot be windowed
+    end = None if limit is None or sort == "personalized" else offset + limit
+    args = (
+        tuple(restaurant or ()),
+        tuple(drop_point or ()),
+        min_seats,
+        departing_within,
+        eta_after,
+        eta_before,
+        order,
+        end,
+        fieldset.fields,
+    )
+    # Identical concurrent listings on the same database share one query;
+    # the caller's own runs are dropped afterwards
+    shared = available_flight.do(
+        _available_key(session, args), lambda: _available_rows(session, None, *args)
+    )
+    rows = [row for row in shared if row[0].runner_id != user_id]
+    if end is not None and len(shared) == end and len(rows) < end:
+        # own runs pushed part of the page past the shared window
+        rows = _available_rows(session, user_id, *args)
+    if sort == "personalized":
+        # Rank the candidate set by the caller's precomputed affinity vector;
+        # users without history keep the default order (stable sort)
+        scores = score_runs(
+            affinity_cache.get(session, user_id), [run for run, _ in rows]
+        )
+        rows = [row for _, row in sorted(zip(scores, rows), key=lambda p: -p[0])]
+    end = None if limit is None else offset + limit
+    return fieldset.respond([payload for _, payload in rows[offset:end]])
+
+
+@app.get("/runs/available/facets", response_model=AvailableFacetsResponse)
+def available_run_facets(
+    restaurant: Optional[List[str]] = Query(None),
+    drop_point: Optional[List[str]] = Query(None),
+    min_seats: int = Query(1, ge=1),
+    departing_within: Optional[str] = None,
+    eta_after: Optional[datetime] = None,
+    eta_before: Optional[datetime] = None,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    user_id = int(claims["sub"])
+    conditions = _available_conditions(
+        user_id, min_seats, departing_within, eta_after, eta_before
+    )
+    # One grouped query over (restaurant, drop_point); each facet is then
+    # counted under the other facet's selection but not its own.
+    rows = session.exec(
+        select(FoodRun.restaurant, FoodRun.drop_point, func.count(FoodRun.id))
+        .where(*conditions)
+        .group_by(FoodRun.restaurant, FoodRun.drop_point)
     ).all()
-    responses = []
-    for r in runs:
-        count = session.exec(
-            select(Order).where(Order.run_id == r.id, Order.status != "cancelled")
-        ).all()
-        seats_remaining = max(r.capacity - len(count), 0)
-        if seats_remaining > 0:
-            runner = session.get(User, r.runner_id)
-            base = r.model_dump(
-                include={
-                    "id",
-                    "runner_id",
-                    "restaurant",
-                    "drop_point",
-                    "eta",
-                    "capacity",
-                    "status",
-                }
-            )
-            responses.append(
-                {
-                    **base,
-                    "runner_username": runner.email if runner else str(r.runner_id),
-                    "seats_remaining": seats_remaining,
-                    "orders": [],
-                }
-            )
-    return responses
+    restaurants, drop_points = {}, {}
+    total = 0
+    for rest, drop, count in rows:
+        rest_ok = not restaurant or rest in restaurant
+        drop_ok = not drop_point or drop in drop_point
+        if drop_ok:
+            restaurants[rest] = restaurants.get(rest, 0) + count
+        if rest_ok:
+            drop_points[drop] = drop_points.get(drop, 0) + count
+        if rest_ok and drop_ok:
+            total += count
+
+    def ranked(counts):
+        return [
+            {"value": value, "count": n}
+            for value, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        ]
+
+    return {
+        "total": total,
+        "restaurants": ranked(restaurants),
+        "drop_points": ranked(drop_points),
+    }
+
+
+@app.get("/runs/nearby", response_model=List[NearbyRunResponse])
+def list_nearby_runs(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(500, gt=0, le=10_000),  # meters
+    limit: int = Query(50, ge=1, le=200),
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    user_id = int(claims["sub"])
+    nearby = drop_points_within(session, lat, lon, radius)
+    if not nearby:
+        return []
+    rows = session.exec(
+        _listing_query().where(
+            *_available_conditions(user_id),
+            FoodRun.drop_point_id.in_(list(nearby)),
+        )
+    ).all()
+    # Closest drop point first, then soonest departure
+    rows = sorted(
+        rows,
+        key=lambda row: (
+            nearby[row[0].drop_point_id],
+            as_utc(row[0].eta_at) or datetime.max.replace(tzinfo=timezone.utc),
+            row[0].id,
+        ),
+    )[:limit]
+    return [
+        {**_listing_payload(*row), "distance_m": round(nearby[row[0].drop_point_id], 1)}
+        for row in rows
+    ]
+
+
+@app.get("/drop-points", response_model=List[DropPointOut])
+def list_drop_points(
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    points = session.exec(select(DropPoint).order_by(DropPoint.name)).all()
+    return [{"id": p.id, "name": p.name, "lat": p.lat, "lon": p.lon} for p in points]
+
+
+@app.get("/runs/search", response_model=List[FoodRunResponse])
+def search_runs(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    fieldset: Fieldset = Depends(fieldset_param(FoodRunResponse)),
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    user_id = int(claims["sub"])
+    terms = search_terms(q)
+    if not terms:
+        return []
+    # Same visibility as /runs/available: joinable runs of other runners
+    stmt = _listing_query(fieldset).where(
+        FoodRun.status == "active",
+        FoodRun.runner_id != user_id,
+        _seats_taken_subquery() < FoodRun.capacity,
+    )
+    stmt = apply_run_search(stmt, session, terms).limit(limit)
+    return fieldset.respond(
+        [_listing_payload(*row) for row in session.exec(stmt).all()]
+    )
 
 
 @app.get("/runs/mine", response_model=List[FoodRunResponse])
 def list_my_runs(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    fieldset: Fieldset = Depends(fieldset_param(FoodRunResponse)),
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
     user_id = int(claims["sub"])
     runs = session.exec(
-        select(FoodRun).where(FoodRun.runner_id == user_id, FoodRun.status == "active")
+        select(FoodRun)
+        .where(FoodRun.runner_id == user_id, FoodRun.status == "active")
+        .order_by(FoodRun.id)
     ).all()
-    responses = []
-    for r in runs:
-        orders = session.exec(
-            select(Order).where(Order.run_id == r.id, Order.status != "cancelled")
-        ).all()
-        seats_remaining = max(r.capacity - len(orders), 0)
-        runner = session.get(User, r.runner_id)
-        # build orders payload with user emails
-        order_payload = []
-        for o in orders:
-            u = session.get(User, o.user_id)
-            order_payload.append(
-                {
-                    "id": o.id,
-                    "run_id": o.run_id,
-                    "user_id": o.user_id,
-                    "status": o.status,
-                    "items": o.items,
-                    "amount": o.amount,
-                    "user_email": u.email if u else str(o.user_id),
-                }
-            )
-        base = r.model_dump(
-            include={
-                "id",
-                "runner_id",
-                "restaurant",
-                "drop_point",
-                "eta",
-                "capacity",
-                "status",
-            }
-        )
-        responses.append(
-            {
-                **base,
-                "runner_username": runner.email if runner else str(r.runner_id),
-                "seats_remaining": seats_remaining,
-                "orders": order_payload,
-            }
-        )
-    return responses
+    return fieldset.respond(_runner_runs(session, runs, fieldset))
 
 
 @app.get("/runs/id/{run_id}", response_model=FoodRunResponse)
 def get_run_details(
     run_id: int,
+    fieldset: Fieldset = Depends(fieldset_param(FoodRunResponse)),
     claims=Depends(get_current_user_claims),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     user_id = int(claims["sub"])
     run = session.get(FoodRun, run_id)
@@ -406,210 +970,102 @@ def get_run_details(
         raise HTTPException(status_code=404, detail="Run not found")
     if run.runner_id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
-
-    orders = session.exec(
-        select(Order).where(Order.run_id == run.id, Order.status != "cancelled")
-    ).all()
-    seats_remaining = max(run.capacity - len(orders), 0)
-    runner = session.get(User, run.runner_id)
-
-    order_payload = []
-    for o in orders:
-        u = session.get(User, o.user_id)
-        order_payload.append(
-            {
-                "id": o.id,
-                "run_id": o.run_id,
-                "user_id": o.user_id,
-                "status": o.status,
-                "items": o.items,
-                "amount": o.amount,
-                "user_email": u.email if u else str(o.user_id),
-            }
-        )
-
-    base = run.model_dump(
-        include={
-            "id",
-            "runner_id",
-            "restaurant",
-            "drop_point",
-            "eta",
-            "capacity",
-            "status",
-        }
-    )
-    return {
-        **base,
-        "runner_username": runner.email if runner else str(run.runner_id),
-        "seats_remaining": seats_remaining,
-        "orders": order_payload,
-    }
+    return fieldset.respond(_runner_runs(session, [run], fieldset)[0])
 
 
 @app.get("/runs/joined", response_model=List[JoinedRunResponse])
 def list_joined_runs(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    fieldset: Fieldset = Depends(fieldset_param(JoinedRunResponse)),
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
     user_id = int(claims["sub"])
-    # Find runs that have a non-cancelled order by this user
-    stmt = (
-        select(Order.run_id)
-        .where(
-            Order.user_id == user_id,
-            Order.status != "cancelled",
-        )
-        .distinct()
+    # One statement: my orders -> their runs -> runner, with seats taken inline
+    stmt = _joined_runs_query(user_id, fieldset=fieldset).where(
+        Order.status != "cancelled", FoodRun.status == "active"
     )
-    # Some SQLModel/SQLAlchemy versions return scalars directly; others return 1-tuples.
-    rows = session.exec(stmt).all()
-    run_ids = [row[0] if isinstance(row, (list, tuple)) else row for row in rows]
-    if not run_ids:
-        return []
-    runs = session.exec(
-        select(FoodRun).where(FoodRun.id.in_(run_ids), FoodRun.status == "active")
-    ).all()
-    responses = []
-    for r in runs:
-        count = session.exec(
-            select(Order).where(Order.run_id == r.id, Order.status != "cancelled")
-        ).all()
-        cap = r.capacity or 0
-        seats_remaining = max(cap - len(count), 0)
-        runner = session.get(User, r.runner_id)
-        # find my order for this run (expose pin to the owner of the order only)
-        mine = session.exec(
-            select(Order).where(
-                Order.run_id == r.id,
-                Order.user_id == user_id,
-                Order.status != "cancelled",
-            )
-        ).first()
-        # Build explicit payload to avoid any None values breaking response validation
-        payload = {
-            "id": r.id,
-            "runner_id": r.runner_id,
-            "restaurant": r.restaurant or "",
-            "drop_point": r.drop_point or "",
-            "eta": r.eta or "",
-            "capacity": cap,
-            "status": r.status or "active",
-            "runner_username": runner.email if runner else str(r.runner_id),
-            "seats_remaining": seats_remaining,
-            "orders": [],
-        }
-        if mine:
-            payload["my_order"] = {
-                "id": mine.id,
-                "run_id": mine.run_id,
-                "items": mine.items,
-                "amount": mine.amount,
-                "status": mine.status,
-                "pin": mine.pin or "",
-            }
-        responses.append(payload)
-    return responses
+    return fieldset.respond(_joined_runs_payload(session.exec(stmt).all(), live=True))
 
 
 @app.get("/runs/mine/history", response_model=List[FoodRunResponse])
 def list_my_runs_history(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    fieldset: Fieldset = Depends(fieldset_param(FoodRunResponse)),
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
     user_id = int(claims["sub"])
-    runs = session.exec(
-        select(FoodRun).where(FoodRun.runner_id == user_id, FoodRun.status != "active")
-    ).all()
-    responses = []
-    for r in runs:
-        orders = session.exec(select(Order).where(Order.run_id == r.id)).all()
-        runner = session.get(User, r.runner_id)
-        order_payload = []
-        for o in orders:
-            u = session.get(User, o.user_id)
-            order_payload.append(
-                {
-                    "id": o.id,
-                    "run_id": o.run_id,
-                    "user_id": o.user_id,
-                    "status": o.status,
-                    "items": o.items,
-                    "amount": o.amount,
-                    "user_email": u.email if u else str(o.user_id),
-                }
-            )
-        base = r.model_dump(
-            include={
-                "id",
-                "runner_id",
-                "restaurant",
-                "drop_point",
-                "eta",
-                "capacity",
-                "status",
-            }
-        )
-        responses.append(
-            {
-                **base,
-                "runner_username": runner.email if runner else str(r.runner_id),
-                "seats_remaining": 0,
-                "orders": order_payload,
-            }
-        )
-    return responses
+    with_orders = fieldset.wants("orders")
+    # Archived ids are older than anything still live, so archive goes first
+    return fieldset.respond(
+        _runner_history(session, user_id, FoodRunArchive, OrderArchive, with_orders)
+        + _runner_history(session, user_id, FoodRun, Order, with_orders)
+    )
 
 
 @app.get("/runs/joined/history", response_model=List[JoinedRunResponse])
 def list_joined_runs_history(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    fieldset: Fieldset = Depends(fieldset_param(JoinedRunResponse)),
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
     user_id = int(claims["sub"])
-    stmt = select(Order.run_id).where(Order.user_id == user_id).distinct()
-    rows = session.exec(stmt).all()
-    run_ids = [row[0] if isinstance(row, (list, tuple)) else row for row in rows]
-    if not run_ids:
-        return []
-    runs = session.exec(
-        select(FoodRun).where(FoodRun.id.in_(run_ids), FoodRun.status != "active")
+    archived = session.exec(
+        _joined_runs_query(user_id, FoodRunArchive, OrderArchive, fieldset)
     ).all()
-    responses = []
-    for r in runs:
-        runner = session.get(User, r.runner_id)
-        # include my_order for historical reference
-        mine = session.exec(
-            select(Order).where(
-                Order.run_id == r.id,
-                Order.user_id == user_id,
-            )
-        ).first()
-        base = r.model_dump(
-            include={
-                "id",
-                "runner_id",
-                "restaurant",
-                "drop_point",
-                "eta",
-                "capacity",
-                "status",
-            }
-        )
-        payload = {
-            **base,
-            "runner_username": runner.email if runner else str(r.runner_id),
-            "seats_remaining": 0,
-            "orders": [],
-        }
-        if mine:
-            payload["my_order"] = {
-                "id": mine.id,
-                "run_id": mine.run_id,
-                "items": mine.items,
-                "amount": mine.amount,
-                "status": mine.status,
-                "pin": (mine.pin or ""),
-            }
-        responses.append(payload)
-    return responses
+    stmt = _joined_runs_query(user_id, fieldset=fieldset).where(
+        FoodRun.status != "active"
+    )
+    return fieldset.respond(
+        _joined_runs_payload(archived, live=False)
+        + _joined_runs_payload(session.exec(stmt).all(), live=False)
+    )
+
+
+def _export_response(session: Session, statements, columns, format, filename):
+    # Rows are read lazily while the body is sent, on the engine the read
+    # session was routed to
+    rows = stream_rows(session.get_bind(), statements)
+    if format == "csv":
+        body, media_type = csv_body(rows, columns), "text/csv"
+    else:
+        body, media_type = ndjson_body(rows), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
+
+
+@app.get("/runs/mine/history/export")
+def export_my_runs_history(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    """Every order of the caller's finished runs, streamed one row per order."""
+    user_id = int(claims["sub"])
+    statements = [
+        runner_history_rows(user_id, FoodRunArchive, OrderArchive),
+        runner_history_rows(user_id, FoodRun, Order),
+    ]
+    return _export_response(session, statements, RUNNER_COLUMNS, format, "run-history")
+
+
+@app.get("/runs/joined/history/export")
+def export_joined_runs_history(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    """Every order the caller placed on a finished run, streamed."""
+    user_id = int(claims["sub"])
+    statements = [
+        joiner_history_rows(user_id, FoodRunArchive, OrderArchive),
+        joiner_history_rows(user_id, FoodRun, Order),
+    ]
+    return _export_response(
+        session, statements, JOINER_COLUMNS, format, "order-history"
+    )
 
 
 @app.delete("/runs/{run_id}/orders/{order_id}")
@@ -631,10 +1087,101 @@ def runner_remove_order(
     if not ord or ord.run_id != run_id or ord.status == "cancelled":
         raise HTTPException(status_code=404, detail="Order not found")
     ord.status = "cancelled"
+    record_orders(session, [(run_id, ord.amount)], sign=-1)
     session.commit()
     return {"message": "Order removed"}
 
 
+def _apply_batch_op(op, status_now, pin):
+    # Returns (new_status, error) for one operation against an order's current
+    # status; mirrors the checks of the single-order endpoints.
+    if status_now == "cancelled":
+        return None, "Order cancelled" if op.op == "verify_pin" else "Order not found"
+    if op.op == "remove":
+        return "cancelled", None
+    if op.op == "mark_paid":
+        if status_now != "pending":
+            return None, "Order is not pending"
+        return "paid", None
+    if not pin:
+        return None, "No PIN set for this order"
+    if str(pin) != str(op.pin):
+        return None, "Incorrect PIN"
+    return "delivered", None
+
+
+@app.post("/runs/{run_id}/orders/batch", response_model=BatchOrderResponse)
+def runner_batch_orders(
+    run_id: int,
+    payload: BatchOrderRequest,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_session),
+):
+    user_id = int(claims["sub"])
+    run = session.get(FoodRun, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if run.runner_id != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    # Load every referenced order of this run in one query
+    order_ids = {op.order_id for op in payload.operations}
+    rows = session.exec(
+        select(Order.id, Order.status, Order.pin, Order.amount).where(
+            Order.run_id == run_id, Order.id.in_(order_ids)
+        )
+    ).all()
+    current = {oid: status for oid, status, _, _ in rows}
+    pins = {oid: pin for oid, _, pin, _ in rows}
+
+    # Evaluate operations in request order so later items see earlier results
+    results = []
+    for op in payload.operations:
+        result = {"order_id": op.order_id, "op": op.op, "ok": False}
+        if op.order_id not in current:
+            result["detail"] = "Order not found"
+        elif op.op == "remove" and run.status != "active":
+            result["detail"] = "Run is not active"
+        else:
+            new_status, error = _apply_batch_op(
+                op, current[op.order_id], pins[op.order_id]
+            )
+            if error:
+                result["detail"] = error
+            else:
+                current[op.order_id] = new_status
+                result["ok"] = True
+                result["status"] = new_status
+        results.append(result)
+
+    # One UPDATE per (read status, target status), guarded on the status read
+    # above, and one commit for the whole batch. Orders another request changed
+    # in between are left alone and their operations reported as failed.
+    original = {oid: status for oid, status, _, _ in rows}
+    transitions = {}
+    for oid, status_now in current.items():
+        if status_now != original[oid]:
+            transitions.setdefault((original[oid], status_now), []).append(oid)
+    stale = set()
+    removed = []
+    for (old_status, new_status), ids in transitions.items():
+        updated = session.exec(
+            update(Order)
+            .where(Order.id.in_(ids), Order.status == old_status)
+            .values(status=new_status)
+            .returning(Order.id, Order.amount)
+        ).all()
+        stale.update(set(ids) - {oid for oid, _ in updated})
+        if new_status == "cancelled":
+            removed.extend((run_id, amount) for _, amount in updated)
+    record_orders(session, removed, sign=-1)
+    session.commit()
+    for result in results:
+        if result["ok"] and result["order_id"] in stale:
+            result.update(ok=False, status=None, detail="Order changed, try again")
+    return {"results": results}
+
+
 @app.put("/runs/{run_id}/complete")
 def complete_run(
     run_id: int,
@@ -648,21 +1195,33 @@ def complete_run(
     if food_run.runner_id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    # Calculate total bill and points
-    orders = session.exec(select(Order).where(Order.run_id == run_id)).all()
-    total_amount = sum(order.amount for order in orders)
+    # Conditional status flip so a run can only be completed (and paid out) once
+    flipped = session.exec(
+        update(FoodRun)
+        .where(FoodRun.id == run_id, FoodRun.status == "active")
+        .values(status="completed")
+    )
+    if flipped.rowcount == 0:
+        raise HTTPException(status_code=400, detail="Run is not active")
+    record_run(session, food_run, completed_runs=1)
+
+    # Calculate total bill and points over non-cancelled orders in SQL
+    total_amount = session.exec(
+        select(func.coalesce(func.sum(Order.amount), 0)).where(
+            Order.run_id == run_id, Order.status != "cancelled"
+        )
+    ).one()
     earned_points = round(
         total_amount / 10
     )  # 1 point per $10, rounded to nearest integer
 
-    # Update run status
-    food_run.status = "completed"
-
-    # Update runner's points
-    runner = session.get(User, user_id)
-    runner.points += earned_points
+    # Update runner's points atomically and record it in the ledger
+    apply_points(session, user_id, earned_points, "run_completed", run_id=run_id)
 
     session.commit()
+    if earned_points:
+        balance = session.exec(select(User.points).where(User.id == user_id)).one()
+        leaderboard.record(user_id, balance, earned_points, "run_completed")
     return {"message": "Run completed", "points_earned": earned_points}
 
 
@@ -678,26 +1237,81 @@ def cancel_run(
         raise HTTPException(status_code=404, detail="Run not found")
     if food_run.runner_id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
-    if food_run.status != "active":
+    flipped = session.exec(
+        update(FoodRun)
+        .where(FoodRun.id == run_id, FoodRun.status == "active")
+        .values(status="cancelled")
+    )
+    if flipped.rowcount == 0:
         raise HTTPException(status_code=400, detail="Run is not active")
-    food_run.status = "cancelled"
+    # Cascade to open orders; delivered orders keep their status
+    cancelled = session.exec(
+        update(Order)
+        .where(
+            Order.run_id == run_id,
+            Order.status.notin_(("cancelled", "delivered")),
+        )
+        .values(status="cancelled")
+        .returning(Order.run_id, Order.amount)
+    ).all()
+    record_orders(session, cancelled, sign=-1)
     session.commit()
     return {"message": "Run cancelled"}
 
 
 @app.get("/points", response_model=PointsResponse)
 def get_points(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
     user_id = int(claims["sub"])
     user = session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    return _points_payload(user)
+
 
+def _points_payload(user: User) -> dict:
     points_value = int((user.points // 10) * 5)  # $5 per 10 points, ensuring integer
     return {"points": int(user.points), "points_value": points_value}
 
 
+@app.get("/dashboard", response_model=DashboardResponse)
+def get_dashboard(
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    """/auth/me, /points, /runs/available, /runs/mine and /runs/joined at once.
+
+    One session and one user lookup; each list is a single batched query
+    (two for the runner's own runs), so loading the page costs five
+    statements instead of five requests.
+    """
+    user = session.get(User, int(claims["sub"]))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    # Same arguments and flight key as a default /runs/available listing
+    args = ((), (), 1, None, None, None, "id", None, None)
+    shared = available_flight.do(
+        _available_key(session, args), lambda: _available_rows(session, None, *args)
+    )
+    mine = session.exec(
+        select(FoodRun)
+        .where(FoodRun.runner_id == user.id, FoodRun.status == "active")
+        .order_by(FoodRun.id)
+    ).all()
+    joined = _joined_runs_query(user.id).where(
+        Order.status != "cancelled", FoodRun.status == "active"
+    )
+    return {
+        "user": {"id": user.id, "username": user.email, "points": user.points},
+        "points": _points_payload(user),
+        "available": [p for run, p in shared if run.runner_id != user.id],
+        "mine": _runner_runs(session, mine, Fieldset(None), runner_email=user.email),
+        "joined": _joined_runs_payload(session.exec(joined).all(), live=True),
+    }
+
+
 @app.post("/points/redeem")
 def redeem_points(
     claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
@@ -712,11 +1326,87 @@ def redeem_points(
         raise HTTPException(status_code=400, detail="Not enough points to redeem")
 
     redemption_value = (redeemable_points // 10) * 5  # $5 per 10 points
-    user.points -= redeemable_points
+    # Guarded debit: fails instead of going negative if the balance moved
+    if not apply_points(session, user_id, -redeemable_points, "redeemed"):
+        session.rollback()
+        raise HTTPException(status_code=400, detail="Not enough points to redeem")
     session.commit()
+    remaining = session.exec(select(User.points).where(User.id == user_id)).one()
+    leaderboard.record(user_id, remaining, -redeemable_points, "redeemed")
 
     return {
         "points_redeemed": redeemable_points,
         "value_redeemed": redemption_value,
-        "remaining_points": user.points,
+        "remaining_points": remaining,
+    }
+
+
+@app.get("/points/history", response_model=PointsHistoryResponse)
+def get_points_history(
+    limit: int = Query(20, ge=1, le=100),
+    before_id: Optional[int] = None,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    user_id = int(claims["sub"])
+    # Keyset pagination over the (user_id, id) ledger, newest first
+    stmt = select(PointsTransaction).where(PointsTransaction.user_id == user_id)
+    if before_id is not None:
+        stmt = stmt.where(PointsTransaction.id < before_id)
+    rows = session.exec(
+        stmt.order_by(PointsTransaction.id.desc()).limit(limit + 1)
+    ).all()
+    items = rows[:limit]
+    return {
+        "items": [
+            {
+                "id": t.id,
+                "delta": t.delta,
+                "reason": t.reason,
+                "run_id": t.run_id,
+                "created_at": t.created_at,
+            }
+            for t in items
+        ],
+        "next_before_id": items[-1].id if len(rows) > limit else None,
     }
+
+
+@app.get("/leaderboard", response_model=List[LeaderboardEntry])
+def get_leaderboard(
+    window: Literal["all", "day", "week", "month"] = "all",
+    limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE),
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    # "all" ranks current balances; windows rank points earned from runs
+    top = leaderboard.top(session, window=window, limit=limit)
+    if not top:
+        return []
+    emails = dict(
+        session.exec(
+            select(User.id, User.email).where(User.id.in_([uid for uid, _ in top]))
+        ).all()
+    )
+    return [
+        {
+            "rank": i + 1,
+            "user_id": uid,
+            "username": emails.get(uid, str(uid)),
+            "points": pts,
+        }
+        for i, (uid, pts) in enumerate(top)
+    ]
+
+
+@app.get("/analytics", response_model=List[AnalyticsBucket])
+def get_analytics(
+    granularity: Literal["hour", "day"] = "day",
+    restaurant: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+):
+    # Reads the rollup table only; see app.analytics for how it is maintained
+    return query_rollups(session, granularity, restaurant, since, until)
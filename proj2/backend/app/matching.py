@@ -0,0 +1,272 @@
+import bisect
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, literal
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, func, select, update
+
+from .analytics import record_orders
+from .eta import as_utc
+from .models import FoodRun, Order, OrderRequest
+from .scheduler import LeasedJob
+
+MATCHING_ENABLED = os.getenv("MATCHING_ENABLED", "1") == "1"
+MATCHING_INTERVAL_SECONDS = float(os.getenv("MATCHING_INTERVAL_SECONDS", "30"))
+MATCHING_BATCH_SIZE = int(os.getenv("MATCHING_BATCH_SIZE", "5000"))
+# Wall-clock cap on the assignment phase; leftovers wait for the next round
+MATCHING_TIME_BUDGET_SECONDS = float(os.getenv("MATCHING_TIME_BUDGET_SECONDS", "2"))
+CHUNK = 500
+
+
+def _key(restaurant: str, drop_point: str) -> Tuple[str, str]:
+    return restaurant.strip().lower(), drop_point.strip().lower()
+
+
+def new_pin() -> str:
+    return f"{int(os.urandom(2).hex(), 16) % 9000 + 1000:04d}"
+
+
+def expire_stale_requests(session: Session, now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(tz=timezone.utc)
+    result = session.exec(
+        update(OrderRequest)
+        .where(OrderRequest.status == "open", OrderRequest.latest_eta < now)
+        .values(status="expired")
+    )
+    session.commit()
+    return result.rowcount
+
+
+def assign(requests: list, runs: list, taken: Set[Tuple[int, int]], deadline=None):
+    """Assign requests of one (restaurant, drop point) group to runs.
+
+    requests are (id, user_id, latest_eta) sorted by latest_eta; runs are
+    [id, runner_id, eta_at, seats_left] sorted by eta_at. A request fits every
+    run arriving by its deadline, so the feasible runs form a prefix of the
+    list. Taking requests tightest-deadline first and giving each the earliest
+    run with a free seat maximizes the number matched. taken holds existing
+    (user_id, run_id) pairs and is updated in place. Stops early once the
+    monotonic deadline passes. Returns (request_id, run_id) pairs.
+    """
+    etas = [run[2] for run in runs]
+    first_open = 0
+    matches = []
+    for i, (request_id, user_id, latest_eta) in enumerate(requests):
+        if deadline is not None and i % 256 == 0 and time.monotonic() > deadline:
+            break
+        while first_open < len(runs) and runs[first_open][3] <= 0:
+            first_open += 1
+        end = bisect.bisect_right(etas, latest_eta)
+        for j in range(first_open, end):
+            run = runs[j]
+            run_id, runner_id, _, seats = run
+            if seats <= 0 or runner_id == user_id or (user_id, run_id) in taken:
+                continue
+            run[3] -= 1
+            taken.add((user_id, run_id))
+            matches.append((request_id, run_id))
+            break
+    return matches
+
+
+def run_matching_round(
+    session: Session,
+    now: Optional[datetime] = None,
+    batch_size: int = MATCHING_BATCH_SIZE,
+    time_budget: float = MATCHING_TIME_BUDGET_SECONDS,
+) -> int:
+    """Match open requests to active runs in one batch; returns orders created.
+
+    Everything is read up front in a handful of queries (requests, candidate
+    runs with their free seats, existing memberships), assigned in memory per
+    (restaurant, drop point) and written back in a single transaction.
+    """
+    now = now or datetime.now(tz=timezone.utc)
+    expire_stale_requests(session, now)
+    requests = session.exec(
+        select(
+            OrderRequest.id,
+            OrderRequest.user_id,
+            OrderRequest.restaurant,
+            OrderRequest.drop_point,
+            OrderRequest.latest_eta,
+        )
+        .where(OrderRequest.status == "open")
+        .order_by(OrderRequest.latest_eta, OrderRequest.id)
+        .limit(batch_size)
+    ).all()
+    if not requests:
+        return 0
+    started = time.monotonic()
+
+    by_group: Dict[Tuple[str, str], list] = defaultdict(list)
+    for request_id, user_id, restaurant, drop_point, latest_eta in requests:
+        by_group[_key(restaurant, drop_point)].append(
+            (request_id, user_id, as_utc(latest_eta))
+        )
+
+    o = aliased(Order)
+    seats = (
+        select(func.count(o.id))
+        .where(o.run_id == FoodRun.id, o.status != "cancelled")
+        .correlate(FoodRun)
+        .scalar_subquery()
+    )
+    latest = max(as_utc(r[4]) for r in requests)
+    restaurants = {key[0] for key in by_group}
+    run_rows = session.exec(
+        select(
+            FoodRun.id,
+            FoodRun.runner_id,
+            FoodRun.restaurant,
+            FoodRun.drop_point,
+            FoodRun.eta_at,
+            FoodRun.capacity - seats,
+        )
+        .where(
+            FoodRun.status == "active",
+            FoodRun.eta_at >= now,
+            FoodRun.eta_at <= latest,
+            # same normalisation as _key, so padded names still match
+            func.lower(func.trim(FoodRun.restaurant)).in_(restaurants),
+        )
+        .order_by(FoodRun.eta_at, FoodRun.id)
+    ).all()
+    runs_by_group: Dict[Tuple[str, str], list] = defaultdict(list)
+    for run_id, runner_id, restaurant, drop_point, eta_at, seats_left in run_rows:
+        key = _key(restaurant, drop_point)
+        if seats_left > 0 and key in by_group:
+            runs_by_group[key].append([run_id, runner_id, as_utc(eta_at), seats_left])
+    if not runs_by_group:
+        return 0
+
+    run_ids = [run[0] for runs in runs_by_group.values() for run in runs]
+    taken: Set[Tuple[int, int]] = set()
+    for start in range(0, len(run_ids), CHUNK):
+        taken.update(
+            session.exec(
+                select(Order.user_id, Order.run_id).where(
+                    Order.run_id.in_(run_ids[start : start + CHUNK]),
+                    Order.status != "cancelled",
+                )
+            ).all()
+        )
+
+    deadline = started + time_budget
+    matches: List[Tuple[int, int]] = []
+    for key, runs in runs_by_group.items():
+        if time.monotonic() > deadline:
+            break
+        matches.extend(assign(by_group[key], runs, taken, deadline))
+    if not matches:
+        return 0
+    return _commit_matches(session, matches)
+
+
+def _insert_order(session: Session, run_id: int, user_id: int, items, amount):
+    """Insert the order only if its run is still active, has a free seat and
+    does not already have the user on it; returns the new id or None.
+
+    The checks and the insert are one statement, so a run cancelled or
+    filled since it was read is never overbooked.
+    """
+    o = aliased(Order)
+    taken = (
+        select(func.count(o.id))
+        .where(o.run_id == FoodRun.id, o.status != "cancelled")
+        .correlate(FoodRun)
+        .scalar_subquery()
+    )
+    joined = (
+        select(o.id)
+        .where(o.run_id == FoodRun.id, o.user_id == user_id, o.status != "cancelled")
+        .correlate(FoodRun)
+        .exists()
+    )
+    rows = select(
+        FoodRun.id,
+        literal(user_id),
+        literal(items),
+        literal(amount),
+        literal("pending"),
+        literal(new_pin()),
+    ).where(
+        FoodRun.id == run_id,
+        FoodRun.status == "active",
+        FoodRun.capacity > taken,
+        ~joined,
+    )
+    return session.exec(
+        insert(Order)
+        .from_select(["run_id", "user_id", "items", "amount", "status", "pin"], rows)
+        .returning(Order.id)
+    ).scalar_one_or_none()
+
+
+def _commit_matches(session: Session, matches: List[Tuple[int, int]]) -> int:
+    run_for = dict(matches)
+    # Claim requests still open; a user may have cancelled since they were read
+    claimed = []
+    ids = list(run_for)
+    for start in range(0, len(ids), CHUNK):
+        claimed.extend(
+            session.exec(
+                update(OrderRequest)
+                .where(
+                    OrderRequest.id.in_(ids[start : start + CHUNK]),
+                    OrderRequest.status == "open",
+                )
+                .values(status="matched")
+                .returning(
+                    OrderRequest.id,
+                    OrderRequest.user_id,
+                    OrderRequest.items,
+                    OrderRequest.amount,
+                )
+            ).all()
+        )
+    placed, released = [], []
+    for request_id, user_id, items, amount in claimed:
+        run_id = run_for[request_id]
+        order_id = _insert_order(session, run_id, user_id, items, amount)
+        if order_id is None:
+            released.append(request_id)
+        else:
+            placed.append((request_id, order_id, run_id, amount))
+    # The run was cancelled, filled or joined since the snapshot; the request
+    # stays open for the next round
+    for start in range(0, len(released), CHUNK):
+        session.exec(
+            update(OrderRequest)
+            .where(OrderRequest.id.in_(released[start : start + CHUNK]))
+            .values(status="open")
+        )
+    record_orders(session, [(run_id, amount) for _, _, run_id, amount in placed])
+    if placed:
+        session.exec(
+            update(OrderRequest),
+            params=[{"id": rid, "order_id": oid} for rid, oid, _, _ in placed],
+        )
+    session.commit()
+    return len(placed)
+
+
+class MatchingEngine(LeasedJob):
+    """Runs a matching round every interval, or sooner when woken."""
+
+    def __init__(
+        self,
+        interval: float = MATCHING_INTERVAL_SECONDS,
+        lease_name: str = "order_matching",
+    ):
+        super().__init__(interval, lease_name)
+
+    def work(self, session: Session) -> int:
+        return run_matching_round(session)
+
+
+matching_engine = MatchingEngine()
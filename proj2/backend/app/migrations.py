@@ -0,0 +1,336 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, SQLModel
+
+from . import models
+from .analytics import rebuild_rollups
+from .eta import backfill_eta_at
+from .geo import link_runs_to_drop_points, seed_drop_points
+from .points import backfill_opening_balances
+from .search import ensure_run_search_index
+from .models import SchemaVersion
+
+# Held while migrating so only one Postgres worker applies migrations
+ADVISORY_LOCK_KEY = 510_044
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    # False for steps that cannot run inside a transaction, such as
+    # CREATE INDEX CONCURRENTLY on Postgres
+    transactional: bool = True
+
+
+def _add_column(conn: Connection, model, column: str, default=None) -> None:
+    """Add a model column to an existing table unless it is already there."""
+    table = model.__table__
+    if column in {c["name"] for c in inspect(conn).get_columns(table.name)}:
+        return
+    quote = conn.dialect.identifier_preparer.quote
+    ddl = table.c[column].type.compile(dialect=conn.dialect)
+    conn.execute(
+        text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column)} {ddl}")
+    )
+    if default is not None:
+        conn.execute(
+            text(
+                f"UPDATE {quote(table.name)} SET {quote(column)} = :value "
+                f"WHERE {quote(column)} IS NULL"
+            ),
+            {"value": default},
+        )
+
+
+def _drop_foreign_key(conn: Connection, model, column: str) -> None:
+    """Drop the foreign key on a column of an existing table, if it has one."""
+    table = model.__table__
+    quote = conn.dialect.identifier_preparer.quote
+    fks = [
+        fk
+        for fk in inspect(conn).get_foreign_keys(table.name)
+        if fk["constrained_columns"] == [column]
+    ]
+    if not fks:
+        return
+    if conn.dialect.name != "sqlite":
+        for fk in fks:
+            conn.execute(
+                text(
+                    f"ALTER TABLE {quote(table.name)} "
+                    f"DROP CONSTRAINT {quote(fk['name'])}"
+                )
+            )
+        return
+    # SQLite cannot drop a constraint: rebuild the table from the model
+    _rebuild_sqlite_table(conn, model)
+
+
+def _rebuild_sqlite_table(conn: Connection, model) -> None:
+    """Recreate a SQLite table from its model, keeping its rows and ids."""
+    table = model.__table__
+    quote = conn.dialect.identifier_preparer.quote
+    old = f"{table.name}_old"
+    # legacy mode leaves other tables' foreign keys naming this table
+    conn.execute(text("PRAGMA legacy_alter_table = ON"))
+    conn.execute(text(f"ALTER TABLE {quote(table.name)} RENAME TO {quote(old)}"))
+    conn.execute(text("PRAGMA legacy_alter_table = OFF"))
+    for index in inspect(conn).get_indexes(old):
+        conn.execute(text(f"DROP INDEX {quote(index['name'])}"))
+    table.create(conn)
+    columns = ", ".join(
+        quote(c["name"]) for c in inspect(conn).get_columns(old) if c["name"] in table.c
+    )
+    conn.execute(
+        text(
+            f"INSERT INTO {quote(table.name)} ({columns}) "
+            f"SELECT {columns} FROM {quote(old)}"
+        )
+    )
+    conn.execute(text(f"DROP TABLE {quote(old)}"))
+
+
+def _autoincrement_ids(conn: Connection) -> None:
+    # Archived runs and orders keep their ids, so the live tables must not
+    # reuse them; Postgres sequences never do
+    if conn.dialect.name != "sqlite":
+        return
+    for model, archive in (
+        (models.FoodRun, models.FoodRunArchive),
+        (models.Order, models.OrderArchive),
+    ):
+        name = model.__table__.name
+        ddl = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :n"),
+            {"n": name},
+        ).scalar()
+        if "AUTOINCREMENT" not in ddl.upper():
+            _rebuild_sqlite_table(conn, model)
+        # ids freed by archiving before this step count as used
+        top = conn.execute(select(func.max(archive.__table__.c.id))).scalar()
+        seq = conn.execute(
+            text("SELECT seq FROM sqlite_sequence WHERE name = :n"), {"n": name}
+        ).scalar()
+        if top is None or (seq is not None and seq >= top):
+            continue
+        if seq is None:
+            conn.execute(
+                text("INSERT INTO sqlite_sequence (name, seq) VALUES (:n, :top)"),
+                {"n": name, "top": top},
+            )
+        else:
+            conn.execute(
+                text("UPDATE sqlite_sequence SET seq = :top WHERE name = :n"),
+                {"n": name, "top": top},
+            )
+    # dropping the old foodrun took the search triggers with it
+    ensure_run_search_index(conn)
+
+
+def _create_index(conn: Connection, name: str, table: str, columns: str) -> None:
+    # Postgres builds it without blocking writes (needs a non-transactional step)
+    concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+    quote = conn.dialect.identifier_preparer.quote
+    conn.execute(
+        text(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} "
+            f"ON {quote(table)} ({columns})"
+        )
+    )
+
+
+def _baseline(conn: Connection) -> None:
+    # Creates every missing table; existing ones are upgraded by later steps
+    SQLModel.metadata.create_all(conn)
+
+
+def _rollups(conn: Connection) -> None:
+    # Seed the new table from existing history; app.analytics keeps it current
+    models.RestaurantRollup.__table__.create(conn, checkfirst=True)
+    rebuild_rollups(Session(bind=conn))
+
+
+def _eta_backfill(conn: Connection) -> None:
+    for model in (models.FoodRun, models.FoodRunArchive):
+        _add_column(conn, model, "eta_unparsed", False)
+    backfill_eta_at(Session(bind=conn))
+
+
+def _drop_points(conn: Connection) -> None:
+    # Known campus drop points, and runs that name one of them
+    session = Session(bind=conn)
+    seed_drop_points(session)
+    link_runs_to_drop_points(session)
+
+
+def _search_index(conn: Connection) -> None:
+    # Postgres builds the GIN index CONCURRENTLY, which needs autocommit;
+    # SQLite's FTS table, triggers and first rebuild still commit together
+    if conn.dialect.name != "sqlite":
+        ensure_run_search_index(conn)
+        return
+    with _sqlite_transaction(conn):
+        ensure_run_search_index(conn)
+
+
+def _indexes(conn: Connection) -> None:
+    for name, table, columns in [
+        ("ix_foodrun_status_eta_at", "foodrun", "status, eta_at"),
+        ("ix_foodrun_status_restaurant", "foodrun", "status, restaurant"),
+        ("ix_foodrun_status_drop_point", "foodrun", "status, drop_point"),
+        ("ix_foodrun_drop_point_id", "foodrun", "drop_point_id"),
+        ("ix_order_run_id", "order", "run_id"),
+        ("ix_order_user_id", "order", "user_id"),
+        ("ix_user_points", "user", "points"),
+    ]:
+        _create_index(conn, name, table, columns)
+
+
+# Append only; never renumber or edit a migration once released
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline tables", _baseline),
+    Migration(2, "user.points", lambda c: _add_column(c, models.User, "points", 0)),
+    Migration(
+        3, "foodrun.capacity", lambda c: _add_column(c, models.FoodRun, "capacity", 5)
+    ),
+    Migration(4, "order.pin", lambda c: _add_column(c, models.Order, "pin")),
+    Migration(5, "foodrun.eta_at", lambda c: _add_column(c, models.FoodRun, "eta_at")),
+    Migration(
+        6,
+        "foodrun.drop_point_id",
+        lambda c: _add_column(c, models.FoodRun, "drop_point_id"),
+    ),
+    Migration(7, "listing indexes", _indexes, transactional=False),
+    Migration(8, "restaurant rollups", _rollups),
+    Migration(9, "run search index", _search_index, transactional=False),
+    # The backfills commit in batches and are safe to repeat after a crash
+    Migration(
+        10,
+        "opening balances",
+        lambda c: backfill_opening_balances(Session(bind=c)),
+        transactional=False,
+    ),
+    Migration(11, "foodrun.eta_at backfill", _eta_backfill, transactional=False),
+    Migration(12, "campus drop points", _drop_points, transactional=False),
+    Migration(
+        13,
+        "orderrequest.order_id without foreign key",
+        lambda c: _drop_foreign_key(c, models.OrderRequest, "order_id"),
+    ),
+    Migration(14, "never reuse run and order ids", _autoincrement_ids),
+]
+
+
+def current_version(engine: Engine) -> Optional[int]:
+    """Highest applied migration; None when the version table does not exist."""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(text("SELECT MAX(version) FROM schemaversion")).scalar()
+        except DBAPIError:
+            return None
+
+
+@contextmanager
+def _migration_lock(engine: Engine):
+    if engine.dialect.name != "postgresql":
+        # SQLite serializes writers itself and every step is idempotent
+        yield
+        return
+    conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        yield
+    finally:
+        conn.execute(
+            text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY}
+        )
+        conn.close()
+
+
+@contextmanager
+def _sqlite_transaction(conn: Connection):
+    # pysqlite commits implicitly before DDL, so drive the transaction by hand
+    # on an autocommit connection
+    conn.exec_driver_sql("BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.exec_driver_sql("ROLLBACK")
+        raise
+    conn.exec_driver_sql("COMMIT")
+
+
+@contextmanager
+def _transaction(engine: Engine):
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as conn:
+            yield conn
+        return
+    # keeps a step's ALTERs and its version row atomic
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        with _sqlite_transaction(conn):
+            yield conn
+
+
+def migrate(engine: Engine, migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """Apply pending migrations in order and return their versions.
+
+    An up-to-date database costs a single SELECT. Each step runs in its own
+    transaction (or in autocommit when it is not transactional) and records
+    its version when it succeeds, so a failed upgrade resumes where it
+    stopped. Steps are written to tolerate databases created by the old
+    startup probes, which have no version table yet.
+    """
+    latest = migrations[-1].version
+    if current_version(engine) == latest:
+        return []
+    applied = []
+    with _migration_lock(engine):
+        # another worker may have finished while we waited for the lock
+        current = current_version(engine) or 0
+        for migration in migrations:
+            if migration.version <= current:
+                continue
+            if migration.transactional:
+                with _transaction(engine) as conn:
+                    migration.apply(conn)
+                    _record(conn, migration)
+            else:
+                with engine.connect().execution_options(
+                    isolation_level="AUTOCOMMIT"
+                ) as conn:
+                    migration.apply(conn)
+                    _record(conn, migration)
+            applied.append(migration.version)
+    return applied
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    SchemaVersion.__table__.create(conn, checkfirst=True)
+    conn.execute(
+        SchemaVersion.__table__.insert().values(
+            version=migration.version, name=migration.name
+        )
+    )
+
+
+if __name__ == "__main__":
+    # python -m app.migrations [--status]
+    import sys
+
+    from .db import engine
+
+    if "--status" in sys.argv[1:]:
+        print(
+            f"schema version {current_version(engine)}, latest {MIGRATIONS[-1].version}"
+        )
+    else:
+        versions = migrate(engine)
+        print(f"applied {versions}" if versions else "schema is up to date")
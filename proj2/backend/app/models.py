@@ -1,6 +1,7 @@
+from datetime import datetime
 from typing import Optional
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, String, DateTime, text
+from sqlalchemy import Column, String, DateTime, Index, text
 
 
 class User(SQLModel, table=True):
@@ -8,7 +9,7 @@ class User(SQLModel, table=True):
     # enforce unique via underlying SQLAlchemy Column (put index on the sa_column to avoid SQLModel conflict)
     email: str = Field(sa_column=Column(String, unique=True, index=True))
     password_hash: str
-    points: int = Field(default=0, ge=0)
+    points: int = Field(default=0, ge=0, index=True)
     created_at: Optional[str] = Field(
         default=None,
         sa_column=Column(
@@ -17,14 +18,46 @@ class User(SQLModel, table=True):
     )
 
 
+class DropPoint(SQLModel, table=True):
+    # Named pickup location; (cell_lat, cell_lon) is its app.geo grid bucket
+    __table_args__ = (Index("ix_droppoint_cell", "cell_lat", "cell_lon"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str = Field(sa_column=Column(String, unique=True, index=True))
+    lat: float
+    lon: float
+    cell_lat: int
+    cell_lon: int
+
+
 class FoodRun(SQLModel, table=True):
+    # (status, eta_at) serves "active runs departing between X and Y" range scans;
+    # the other two back the /runs/available filters and facets
+    __table_args__ = (
+        Index("ix_foodrun_status_eta_at", "status", "eta_at"),
+        Index("ix_foodrun_status_restaurant", "status", "restaurant"),
+        Index("ix_foodrun_status_drop_point", "status", "drop_point"),
+        # ids live on in foodrunarchive, so SQLite must never hand one out again
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     runner_id: int = Field(foreign_key="user.id")
     restaurant: str
     drop_point: str
-    eta: str
+    # set when drop_point names a known DropPoint; enables /runs/nearby
+    drop_point_id: Optional[int] = Field(
+        default=None, foreign_key="droppoint.id", index=True
+    )
+    eta: str  # as typed by the runner, shown in the UI
+    # eta parsed to an aware UTC timestamp; None when the text isn't a time
+    eta_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    # eta was parsed and is not a time; the eta_at backfill skips these rows
+    eta_unparsed: bool = Field(default=False)
     capacity: int = Field(default=5)  # maximum number of joiners/orders
-    status: str = Field(default="active")  # active, completed, cancelled
+    status: str = Field(default="active")  # active, completed, cancelled, expired
     created_at: Optional[str] = Field(
         default=None,
         sa_column=Column(
@@ -34,9 +67,11 @@ class FoodRun(SQLModel, table=True):
 
 
 class Order(SQLModel, table=True):
+    __table_args__ = {"sqlite_autoincrement": True}  # see FoodRun
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    run_id: int = Field(foreign_key="foodrun.id")
-    user_id: int = Field(foreign_key="user.id")
+    run_id: int = Field(foreign_key="foodrun.id", index=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
     items: str  # JSON string of ordered items
     amount: float
     status: str = Field(default="pending")  # pending, paid, delivered
@@ -47,3 +82,141 @@ class Order(SQLModel, table=True):
             DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
         ),
     )
+
+
+class PointsTransaction(SQLModel, table=True):
+    # Append-only ledger; User.points is the materialized sum of deltas per user
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    delta: int
+    reason: str  # run_completed, redeemed, opening_balance, adjustment
+    # no foreign key: the run may have been moved to foodrunarchive
+    run_id: Optional[int] = None
+    created_at: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=text("CURRENT_TIMESTAMP"),
+            index=True,
+        ),
+    )
+
+
+class SchemaVersion(SQLModel, table=True):
+    # One row per migration applied by app.migrations
+    version: int = Field(primary_key=True)
+    name: str
+    applied_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
+        ),
+    )
+
+
+class SchedulerLease(SQLModel, table=True):
+    # One row per background job; the holder of an unexpired lease does the work
+    name: str = Field(primary_key=True)
+    owner: str
+    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
+
+
+# Cold storage for finished runs, filled by app.archive. Same columns as the
+# live tables (ids are preserved) plus the time the row was archived.
+class FoodRunArchive(SQLModel, table=True):
+    id: int = Field(primary_key=True)
+    runner_id: int = Field(index=True)
+    restaurant: str
+    drop_point: str
+    drop_point_id: Optional[int] = None
+    eta: str
+    eta_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    eta_unparsed: bool = Field(default=False)
+    capacity: int = Field(default=5)
+    status: str
+    created_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    archived_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
+        ),
+    )
+
+
+class OrderArchive(SQLModel, table=True):
+    id: int = Field(primary_key=True)
+    run_id: int = Field(index=True)
+    user_id: int = Field(index=True)
+    items: str
+    amount: float
+    status: str
+    pin: Optional[str] = None
+    created_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    archived_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
+        ),
+    )
+
+
+class UserAffinity(SQLModel, table=True):
+    # Precomputed by app.affinity: share of a user's recent orders that went to
+    # a restaurant / drop point. Rebuilt wholesale by the batch job.
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(index=True)
+    kind: str  # restaurant, drop_point
+    value: str
+    weight: float
+
+
+class OrderRequest(SQLModel, table=True):
+    # An open "get me food from X at Y by Z" request; app.matching turns it into
+    # an Order on a suitable active run.
+    __table_args__ = (Index("ix_orderrequest_status_deadline", "status", "latest_eta"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    restaurant: str
+    drop_point: str
+    latest_eta: datetime = Field(sa_column=Column(DateTime(timezone=True)))
+    items: str
+    amount: float
+    status: str = Field(default="open")  # open, matched, cancelled, expired
+    # no foreign key: the order may have been moved to orderarchive
+    order_id: Optional[int] = None
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
+        ),
+    )
+
+
+class IdempotencyRecord(SQLModel, table=True):
+    # Response of a write made with an Idempotency-Key header, replayed when a
+    # client retries the same request. Purged after expires_at by app.idempotency.
+    user_id: int = Field(primary_key=True)
+    key: str = Field(primary_key=True, max_length=255)
+    fingerprint: str  # sha256 of method, path and body
+    status_code: int
+    body: str  # JSON
+    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True), index=True))
+
+
+class RestaurantRollup(SQLModel, table=True):
+    # Per restaurant and UTC hour of run creation, kept current by app.analytics
+    # as runs and orders change; orders count toward their run's hour.
+    restaurant: str = Field(primary_key=True)
+    hour: datetime = Field(sa_column=Column(DateTime(timezone=True), primary_key=True))
+    runs: int = 0
+    completed_runs: int = 0
+    seats: int = 0  # capacity offered
+    orders: int = 0  # not cancelled
+    revenue: float = 0.0  # amount of those orders
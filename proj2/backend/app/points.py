@@ -0,0 +1,103 @@
+from typing import Dict, Optional
+
+from sqlmodel import Session, func, select, update
+from sqlalchemy import insert, literal
+
+from .models import PointsTransaction, User
+
+
+def apply_points(
+    session: Session,
+    user_id: int,
+    delta: int,
+    reason: str,
+    run_id: Optional[int] = None,
+) -> bool:
+    """Adjust a balance in place and append the matching ledger row.
+
+    Debits only apply if the balance covers them. Returns False when nothing
+    was changed. The caller owns the transaction and commits.
+    """
+    if delta == 0:
+        return True
+    stmt = update(User).where(User.id == user_id).values(points=User.points + delta)
+    if delta < 0:
+        stmt = stmt.where(User.points >= -delta)
+    if session.exec(stmt).rowcount == 0:
+        return False
+    session.add(
+        PointsTransaction(user_id=user_id, delta=delta, reason=reason, run_id=run_id)
+    )
+    return True
+
+
+def backfill_opening_balances(session: Session) -> int:
+    # Balances that predate the ledger get a single opening_balance row so the
+    # ledger sums match User.points. Idempotent: only users without rows.
+    has_rows = select(PointsTransaction.id).where(PointsTransaction.user_id == User.id)
+    stmt = insert(PointsTransaction).from_select(
+        ["user_id", "delta", "reason"],
+        select(User.id, User.points, literal("opening_balance")).where(
+            User.points != 0, ~has_rows.exists()
+        ),
+    )
+    result = session.exec(stmt)
+    session.commit()
+    return result.rowcount
+
+
+def find_balance_mismatches(session: Session) -> Dict[int, tuple]:
+    """Recompute every balance from the ledger in one grouped query.
+
+    Returns {user_id: (stored_points, ledger_points)} for users that disagree.
+    """
+    ledger = (
+        select(
+            PointsTransaction.user_id,
+            func.sum(PointsTransaction.delta).label("total"),
+        )
+        .group_by(PointsTransaction.user_id)
+        .subquery()
+    )
+    rows = session.exec(
+        select(User.id, User.points, func.coalesce(ledger.c.total, 0))
+        .join(ledger, ledger.c.user_id == User.id, isouter=True)
+        .where(User.points != func.coalesce(ledger.c.total, 0))
+    ).all()
+    return {uid: (stored, int(total)) for uid, stored, total in rows}
+
+
+def repair_balances(session: Session) -> int:
+    # Reset mismatched balances to the ledger sum with one correlated UPDATE
+    mismatches = find_balance_mismatches(session)
+    if not mismatches:
+        return 0
+    ledger_total = (
+        select(func.coalesce(func.sum(PointsTransaction.delta), 0))
+        .where(PointsTransaction.user_id == User.id)
+        .scalar_subquery()
+    )
+    session.exec(
+        update(User)
+        .where(User.id.in_(list(mismatches)))
+        .values(points=ledger_total)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return len(mismatches)
+
+
+if __name__ == "__main__":
+    # python -m app.points [--repair]
+    import sys
+
+    from .db import engine
+
+    with Session(engine) as session:
+        mismatches = find_balance_mismatches(session)
+        for uid, (stored, ledger_points) in sorted(mismatches.items()):
+            print(f"user {uid}: stored={stored} ledger={ledger_points}")
+        if "--repair" in sys.argv[1:]:
+            print(f"repaired {repair_balances(session)} balances")
+        elif not mismatches:
+            print("all balances match the ledger")
@@ -0,0 +1,191 @@
+import inspect
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from .auth import decode_access_token
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+# Only trust X-Forwarded-For when running behind our own proxy
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+
+
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    method: str
+    path: str  # exact path, or a prefix when it ends with "*"
+    rate: float  # tokens refilled per second
+    burst: int  # bucket size
+    scope: str = "user"  # user (JWT sub, falling back to IP) or ip
+
+    def matches(self, method: str, path: str) -> bool:
+        if method != self.method:
+            return False
+        if self.path.endswith("*"):
+            return path.startswith(self.path[:-1])
+        return path == self.path
+
+
+# First match wins
+POLICIES: List[Policy] = [
+    # password hashing makes these the most expensive requests we serve
+    Policy("login", "POST", "/auth/login", rate=10 / 60, burst=10, scope="ip"),
+    Policy("register", "POST", "/auth/register", rate=5 / 60, burst=5, scope="ip"),
+    Policy("run_lists", "GET", "/runs*", rate=2, burst=30),
+    Policy("writes", "POST", "*", rate=1, burst=20),
+]
+
+
+class MemoryStore:
+    """Token buckets for one process, bounded to max_keys entries.
+
+    Buckets live in an OrderedDict used as an LRU: each take() is a dict
+    lookup plus move_to_end, and the least recently used bucket is evicted
+    once the store is full. An evicted bucket simply starts full again.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        """Take one token; returns 0 if allowed, else seconds until one refills."""
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - last) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# KEYS[1] bucket; ARGV rate, burst, now. Same arithmetic as MemoryStore.take.
+_REDIS_TAKE = """
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'last')
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tokens = tonumber(b[1]) or burst
+local last = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + (now - last) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'last', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisStore:
+    """Buckets shared by every worker, updated atomically by a Lua script.
+
+    Takes a redis.asyncio client, so the round trip is awaited on the event
+    loop instead of blocking it.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.prefix = prefix
+        self._client = client
+        self._take = self._client.register_script(_REDIS_TAKE)
+
+    async def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        wait = await self._take(keys=[self.prefix + key], args=[rate, burst, now])
+        return float(wait)
+
+
+def default_store():
+    if RATE_LIMIT_REDIS_URL:
+        try:  # optional: shared buckets across workers
+            from redis import asyncio as redis
+        except ImportError:
+            return MemoryStore()
+        return RedisStore(redis.Redis.from_url(RATE_LIMIT_REDIS_URL))
+    return MemoryStore()
+
+
+class RateLimiter:
+    def __init__(self, policies: List[Policy], store=None, enabled: bool = True):
+        self.policies = policies
+        self.store = store if store is not None else default_store()
+        self.enabled = enabled
+
+    def policy_for(self, method: str, path: str) -> Optional[Policy]:
+        for policy in self.policies:
+            if policy.matches(method, path):
+                return policy
+        return None
+
+    async def check(self, policy: Policy, identity: str) -> float:
+        wait = self.store.take(
+            f"{policy.name}:{identity}", policy.rate, policy.burst, time.time()
+        )
+        # MemoryStore answers inline; network stores return an awaitable
+        if inspect.isawaitable(wait):
+            wait = await wait
+        return wait
+
+
+limiter = RateLimiter(POLICIES, enabled=RATE_LIMIT_ENABLED)
+
+
+def _client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _identity(scope, policy: Policy) -> str:
+    if policy.scope == "user":
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                token = value.decode("latin-1").partition(" ")[2]
+                # signature check only; the route still does full auth
+                claims = decode_access_token(token)
+                if claims and "sub" in claims:
+                    return f"user:{claims['sub']}"
+                break
+    return f"ip:{_client_ip(scope)}"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with Retry-After when a bucket is empty."""
+
+    def __init__(self, app, rate_limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.rate_limiter = rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        rl = self.rate_limiter or limiter
+        if scope["type"] != "http" or not rl.enabled:
+            return await self.app(scope, receive, send)
+        policy = rl.policy_for(scope["method"], scope["path"])
+        if policy is None:
+            return await self.app(scope, receive, send)
+        wait = await rl.check(policy, _identity(scope, policy))
+        if wait > 0:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            return await response(scope, receive, send)
+        return await self.app(scope, receive, send)
@@ -0,0 +1,244 @@
+import abc
+import asyncio
+import heapq
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, update
+
+from . import db
+from .analytics import record_orders
+from .eta import as_utc
+from .models import FoodRun, Order, SchedulerLease
+
+RUN_EXPIRY_ENABLED = os.getenv("RUN_EXPIRY_ENABLED", "1") == "1"
+# How long after its ETA an active run is considered abandoned
+RUN_EXPIRY_GRACE = timedelta(minutes=int(os.getenv("RUN_EXPIRY_GRACE_MINUTES", "120")))
+# Runs whose ETA never parsed have no deadline; expire them this long after
+# they were created instead
+RUN_MAX_LIFETIME = timedelta(hours=int(os.getenv("RUN_MAX_LIFETIME_HOURS", "24")))
+RUN_EXPIRY_POLL_SECONDS = float(os.getenv("RUN_EXPIRY_POLL_SECONDS", "60"))
+RUN_EXPIRY_BATCH_SIZE = int(os.getenv("RUN_EXPIRY_BATCH_SIZE", "500"))
+LEASE_NAME = "run_expiry"
+
+logger = logging.getLogger(__name__)
+
+
+def acquire_lease(session: Session, name: str, owner: str, ttl: timedelta) -> bool:
+    """Take or renew a named lease; only one owner holds it until it expires."""
+    now = datetime.now(tz=timezone.utc)
+    renewed = session.exec(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            (SchedulerLease.owner == owner) | (SchedulerLease.expires_at < now),
+        )
+        .values(owner=owner, expires_at=now + ttl)
+    )
+    if renewed.rowcount:
+        session.commit()
+        return True
+    session.rollback()
+    if session.get(SchedulerLease, name) is not None:
+        return False
+    session.add(SchedulerLease(name=name, owner=owner, expires_at=now + ttl))
+    try:
+        session.commit()
+        return True
+    except IntegrityError:
+        # Another worker created it first
+        session.rollback()
+        return False
+
+
+def expire_overdue_runs(
+    session: Session,
+    now: Optional[datetime] = None,
+    batch_size: int = RUN_EXPIRY_BATCH_SIZE,
+) -> int:
+    """Mark active runs past ETA + grace as expired, one bounded batch at a time.
+
+    Runs without a parsed ETA expire RUN_MAX_LIFETIME after they were created.
+    Open orders on those runs are cancelled the same way cancel_run does it.
+    """
+    now = now or datetime.now(tz=timezone.utc)
+    # both are (status, eta_at) index range scans
+    overdue = [
+        FoodRun.eta_at < now - RUN_EXPIRY_GRACE,
+        FoodRun.eta_at.is_(None) & (FoodRun.created_at < now - RUN_MAX_LIFETIME),
+    ]
+    expired = 0
+    for condition in overdue:
+        while True:
+            ids = session.exec(
+                select(FoodRun.id)
+                .where(FoodRun.status == "active", condition)
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            _expire(session, ids)
+            expired += len(ids)
+    return expired
+
+
+def _expire(session: Session, ids: List[int]) -> None:
+    session.exec(
+        update(FoodRun)
+        .where(FoodRun.id.in_(ids), FoodRun.status == "active")
+        .values(status="expired")
+        .execution_options(synchronize_session=False)
+    )
+    cancelled = session.exec(
+        update(Order)
+        .where(
+            Order.run_id.in_(ids),
+            Order.status.notin_(("cancelled", "delivered")),
+        )
+        .values(status="cancelled")
+        .returning(Order.run_id, Order.amount)
+        .execution_options(synchronize_session=False)
+    ).all()
+    record_orders(session, cancelled, sign=-1)
+    session.commit()
+
+
+class LeasedJob(abc.ABC):
+    """Background loop that calls work() on whichever worker holds a lease.
+
+    Started from the app lifespan. Each tick renews (or tries to take) the
+    named lease and runs the blocking work in a thread; followers call
+    on_follower() instead. Subclasses may shorten the sleep between ticks via
+    seconds_until_next(), and any thread may call wake() to tick early.
+    """
+
+    def __init__(self, interval: float, lease_name: str):
+        self.interval = interval
+        self.lease_name = lease_name
+        self.owner = uuid.uuid4().hex
+        self._loop_ref: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @abc.abstractmethod
+    def work(self, session: Session):
+        """Run one tick of the job as the lease holder."""
+
+    def on_follower(self):
+        return None
+
+    def tick(self):
+        with Session(db.engine) as session:
+            ttl = timedelta(seconds=self.interval * 3)
+            if not acquire_lease(session, self.lease_name, self.owner, ttl):
+                return self.on_follower()
+            return self.work(session)
+
+    def seconds_until_next(self) -> float:
+        return self.interval
+
+    def wake(self) -> None:
+        if self._task is not None:
+            self._loop_ref.call_soon_threadsafe(self._wake.set)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.tick)
+            except Exception:
+                # Keep the loop alive; the next tick retries
+                logger.exception("background job %s failed", self.lease_name)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.seconds_until_next())
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._loop_ref = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = self._loop_ref.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class RunExpiryScheduler(LeasedJob):
+    """Sleeps until the next run deadline, then sweeps overdue runs.
+
+    Deadlines (eta_at + grace) are kept in a min-heap, reloaded from the
+    (status, eta_at) index every poll interval and pushed directly by
+    create_run on this worker. Only the holder of the lease sweeps, so running
+    several workers is safe.
+    """
+
+    def __init__(
+        self,
+        poll_seconds: float = RUN_EXPIRY_POLL_SECONDS,
+        lease_name: str = LEASE_NAME,
+    ):
+        super().__init__(poll_seconds, lease_name)
+        self.heap: List[Tuple[datetime, int]] = []
+        # create_run pushes from threadpool threads while tick runs in another
+        self._lock = threading.Lock()
+
+    def schedule(self, run_id: int, eta_at: Optional[datetime]) -> None:
+        if eta_at is None or self._task is None:
+            return
+        with self._lock:
+            heapq.heappush(self.heap, (as_utc(eta_at) + RUN_EXPIRY_GRACE, run_id))
+        self.wake()
+
+    def reload(self, session: Session) -> None:
+        horizon = datetime.now(tz=timezone.utc) + timedelta(seconds=self.interval)
+        rows = session.exec(
+            select(FoodRun.eta_at, FoodRun.id)
+            .where(
+                FoodRun.status == "active",
+                FoodRun.eta_at < horizon - RUN_EXPIRY_GRACE,
+            )
+            .order_by(FoodRun.eta_at)
+            .limit(RUN_EXPIRY_BATCH_SIZE)
+        ).all()
+        heap = [(as_utc(eta) + RUN_EXPIRY_GRACE, run_id) for eta, run_id in rows]
+        heapq.heapify(heap)
+        with self._lock:
+            self.heap = heap
+
+    def on_follower(self) -> int:
+        with self._lock:
+            self.heap = []
+        return 0
+
+    def work(self, session: Session) -> int:
+        # Sweep as leader, then refresh the heap
+        now = datetime.now(tz=timezone.utc)
+        with self._lock:
+            while self.heap and self.heap[0][0] <= now:
+                heapq.heappop(self.heap)
+        expired = expire_overdue_runs(session, now)
+        self.reload(session)
+        return expired
+
+    def seconds_until_next(self) -> float:
+        with self._lock:
+            if not self.heap:
+                return self.interval
+            next_deadline = self.heap[0][0]
+        wait = (next_deadline - datetime.now(tz=timezone.utc)).total_seconds()
+        return min(max(wait, 0.0), self.interval)
+
+
+run_expiry = RunExpiryScheduler()
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Literal, Optional
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -68,6 +69,7 @@ class FoodRunCreate(BaseModel):
 
 class FoodRunResponse(FoodRunCreate):
     id: int
+    eta_at: Optional[datetime] = None  # parsed eta in UTC, when recognizable
     runner_id: int
     runner_username: str
     status: str
@@ -75,15 +77,123 @@ class FoodRunResponse(FoodRunCreate):
     orders: List[OrderResponse] = []
 
 
+class NearbyRunResponse(FoodRunResponse):
+    distance_m: float  # from the query point to the run's drop point
+
+
+class DropPointCreate(BaseModel):
+    name: str = Field(..., min_length=1)
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+
+class DropPointOut(DropPointCreate):
+    id: int
+
+
 class JoinedRunResponse(FoodRunResponse):
     my_order: Optional[MyOrderResponse] = None
 
 
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class AvailableFacetsResponse(BaseModel):
+    total: int  # runs matching every filter
+    restaurants: List[FacetCount]
+    drop_points: List[FacetCount]
+
+
+class OrderRequestCreate(BaseModel):
+    restaurant: str = Field(..., min_length=1)
+    drop_point: str = Field(..., min_length=1)
+    latest_eta: str  # latest acceptable arrival, same formats as a run's eta
+    items: str
+    amount: float = Field(..., gt=0)
+
+
+class OrderRequestOut(BaseModel):
+    id: int
+    restaurant: str
+    drop_point: str
+    latest_eta: datetime
+    items: str
+    amount: float
+    status: str
+    order_id: Optional[int] = None
+    run_id: Optional[int] = None  # set once matched
+
+
 class PointsResponse(BaseModel):
     points: int
     # represent redeemable value as integer dollars for clarity in API and tests
     points_value: int  # in dollars
 
 
+class DashboardResponse(BaseModel):
+    # Everything the home page needs, in one round trip
+    user: UserOut
+    points: PointsResponse
+    available: List[FoodRunResponse]
+    mine: List[FoodRunResponse]
+    joined: List[JoinedRunResponse]
+
+
+class PointsTransactionOut(BaseModel):
+    id: int
+    delta: int
+    reason: str
+    run_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+class PointsHistoryResponse(BaseModel):
+    items: List[PointsTransactionOut]
+    # pass as before_id to fetch the next (older) page; None when exhausted
+    next_before_id: Optional[int] = None
+
+
+class AnalyticsBucket(BaseModel):
+    restaurant: str
+    bucket: datetime  # start of the UTC hour or day
+    runs: int
+    completed_runs: int
+    seats: int
+    orders: int
+    revenue: float
+    fill_rate: float  # orders / seats
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: str
+    points: int
+
+
 class PinVerifyRequest(BaseModel):
     pin: str
+
+
+class BatchOrderOperation(BaseModel):
+    order_id: int
+    op: Literal["verify_pin", "remove", "mark_paid"]
+    pin: Optional[str] = None  # required for verify_pin
+
+
+class BatchOrderRequest(BaseModel):
+    operations: List[BatchOrderOperation] = Field(..., min_length=1, max_length=200)
+
+
+class BatchOrderResult(BaseModel):
+    order_id: int
+    op: str
+    ok: bool
+    status: Optional[str] = None  # order status after the operation
+    detail: Optional[str] = None  # error message when ok is False
+
+
+class BatchOrderResponse(BaseModel):
+    results: List[BatchOrderResult]
@@ -0,0 +1,142 @@
+import re
+from typing import Dict, List
+
+from sqlalchemy import Float, Integer, and_, inspect, literal_column, or_, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, func
+
+from .models import FoodRun
+
+# Which backend each database ended up with: "fts5", "tsvector" or "like"
+_backends: Dict[str, str] = {}
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 8
+
+_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS foodrun_fts USING fts5("
+    "restaurant, drop_point, content='foodrun', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS foodrun_fts_ai AFTER INSERT ON foodrun BEGIN "
+    "INSERT INTO foodrun_fts(rowid, restaurant, drop_point) "
+    "VALUES (new.id, new.restaurant, new.drop_point); END",
+    "CREATE TRIGGER IF NOT EXISTS foodrun_fts_ad AFTER DELETE ON foodrun BEGIN "
+    "INSERT INTO foodrun_fts(foodrun_fts, rowid, restaurant, drop_point) "
+    "VALUES ('delete', old.id, old.restaurant, old.drop_point); END",
+    "CREATE TRIGGER IF NOT EXISTS foodrun_fts_au "
+    "AFTER UPDATE OF restaurant, drop_point ON foodrun BEGIN "
+    "INSERT INTO foodrun_fts(foodrun_fts, rowid, restaurant, drop_point) "
+    "VALUES ('delete', old.id, old.restaurant, old.drop_point); "
+    "INSERT INTO foodrun_fts(rowid, restaurant, drop_point) "
+    "VALUES (new.id, new.restaurant, new.drop_point); END",
+]
+
+_POSTGRES_DDL = [
+    "ALTER TABLE foodrun ADD COLUMN IF NOT EXISTS search_tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', "
+    "coalesce(restaurant, '') || ' ' || coalesce(drop_point, ''))) STORED",
+    # built without blocking writes, so this must run outside a transaction
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_foodrun_search_tsv "
+    "ON foodrun USING GIN (search_tsv)",
+]
+
+
+def ensure_run_search_index(conn: Connection) -> str:
+    """Create the run search index for this database and return its backend.
+
+    SQLite gets an external-content FTS5 table kept in sync by triggers;
+    Postgres gets a generated tsvector column with a GIN index. Anything else,
+    or a SQLite build without FTS5, falls back to LIKE matching. Applied once
+    by app.migrations; on Postgres the connection must be in autocommit.
+    """
+    backend = "like"
+    try:
+        if conn.dialect.name == "sqlite":
+            existed = _has_fts_table(conn)
+            for stmt in _SQLITE_DDL:
+                conn.execute(text(stmt))
+            if not existed:
+                # index rows that were inserted before the triggers existed
+                conn.execute(
+                    text("INSERT INTO foodrun_fts(foodrun_fts) VALUES ('rebuild')")
+                )
+            backend = "fts5"
+        elif conn.dialect.name == "postgresql":
+            for stmt in _POSTGRES_DDL:
+                conn.execute(text(stmt))
+            backend = "tsvector"
+    except OperationalError:
+        # e.g. SQLite compiled without FTS5
+        backend = "like"
+    _backends[str(conn.engine.url)] = backend
+    return backend
+
+
+def _has_fts_table(conn: Connection) -> bool:
+    return (
+        conn.execute(
+            text(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = 'foodrun_fts'"
+            )
+        ).first()
+        is not None
+    )
+
+
+def search_backend(engine: Engine) -> str:
+    """The index the migration left in this database, probed once per engine."""
+    key = str(engine.url)
+    if key not in _backends:
+        with engine.connect() as conn:
+            if conn.dialect.name == "sqlite":
+                backend = "fts5" if _has_fts_table(conn) else "like"
+            elif conn.dialect.name == "postgresql":
+                columns = {c["name"] for c in inspect(conn).get_columns("foodrun")}
+                backend = "tsvector" if "search_tsv" in columns else "like"
+            else:
+                backend = "like"
+        _backends[key] = backend
+    return _backends[key]
+
+
+def search_terms(q: str) -> List[str]:
+    return [t.lower() for t in _TOKEN.findall(q or "")][:MAX_TERMS]
+
+
+def apply_run_search(stmt, session: Session, terms: List[str]):
+    """Restrict a select over FoodRun to runs matching every term as a prefix.
+
+    Returns the statement ordered best match first.
+    """
+    backend = search_backend(session.get_bind())
+    if backend == "fts5":
+        match = " ".join(f'"{t}"*' for t in terms)
+        # bm25 is lower-is-better; restaurant hits weigh double
+        fts = (
+            text(
+                "SELECT rowid AS id, bm25(foodrun_fts, 2.0, 1.0) AS rank "
+                "FROM foodrun_fts WHERE foodrun_fts MATCH :match"
+            )
+            .bindparams(match=match)
+            .columns(id=Integer, rank=Float)
+            .subquery()
+        )
+        return stmt.join(fts, fts.c.id == FoodRun.id).order_by(fts.c.rank, FoodRun.id)
+    if backend == "tsvector":
+        tsq = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terms))
+        tsv = literal_column("foodrun.search_tsv")
+        return stmt.where(tsv.op("@@")(tsq)).order_by(
+            func.ts_rank(tsv, tsq).desc(), FoodRun.id
+        )
+    # Unindexed fallback: every term must appear in either column
+    return stmt.where(
+        and_(
+            *[
+                or_(
+                    FoodRun.restaurant.ilike(f"%{t}%"),
+                    FoodRun.drop_point.ilike(f"%{t}%"),
+                )
+                for t in terms
+            ]
+        )
+    ).order_by(FoodRun.id)
@@ -0,0 +1,120 @@
+"""Cold-start profile of a worker: python -m app.startup [--top N].
+
+Stdlib only at import time so that measuring does not skew the numbers;
+every measurement runs in a fresh interpreter.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in the child: import the app, start it, serve GET / and report timings
+_CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app, startup_timings
+imported = time.perf_counter()
+
+async def first_response():
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/", "raw_path": b"/",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80), "root_path": "",
+    }
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        await app(scope, receive, send)
+        answered = time.perf_counter()
+    return ready, answered, messages[0]["status"]
+
+ready, answered, status = asyncio.run(first_response())
+print(json.dumps({
+    "import": imported - started,
+    "lifespan": ready - imported,
+    "first_request": answered - ready,
+    "total": answered - started,
+    "status": status,
+    "phases": startup_timings,
+}))
+"""
+
+
+def _child_env(database_url: Optional[str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    if database_url:
+        env["DATABASE_URL"] = database_url
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(BACKEND_DIR), env.get("PYTHONPATH")) if p
+    )
+    return env
+
+
+def import_profile(
+    module: str = "app.main", database_url: Optional[str] = None
+) -> List[Tuple[str, float]]:
+    """Self import time per top-level package, slowest first, in seconds.
+
+    Parsed from `python -X importtime`, whose stderr lines look like
+    "import time: self [us] | cumulative | imported package".
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=BACKEND_DIR,
+        env=_child_env(database_url),
+        check=True,
+    )
+    totals: Dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header row
+        name = name.strip()
+        # first-party modules are listed individually, libraries by package
+        key = name if name.startswith("app.") else name.split(".")[0]
+        totals[key] += int(self_us) / 1e6
+    return sorted(totals.items(), key=lambda kv: -kv[1])
+
+
+def time_to_first_response(database_url: Optional[str] = None) -> dict:
+    """Import, start and serve one request in a fresh interpreter; seconds."""
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        capture_output=True,
+        text=True,
+        cwd=BACKEND_DIR,
+        env=_child_env(database_url),
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    top = int(sys.argv[sys.argv.index("--top") + 1]) if "--top" in sys.argv else 15
+    print("import time by package (self, ms)")
+    for name, seconds in import_profile()[:top]:
+        print(f"  {seconds * 1000:8.1f}  {name}")
+    report = time_to_first_response()
+    print("startup (ms)")
+    for phase in ("import", "lifespan", "first_request", "total"):
+        print(f"  {report[phase] * 1000:8.1f}  {phase}")
+    for phase, seconds in report["phases"].items():
+        print(f"  {seconds * 1000:8.1f}    lifespan: {phase}")
@@ -3,6 +3,13 @@ import sys
 from pathlib import Path
 import pytest
 
+# Tests drive background jobs explicitly instead of racing live ones
+os.environ.setdefault("RUN_EXPIRY_ENABLED", "0")
+os.environ.setdefault("AFFINITY_REFRESH_ENABLED", "0")
+os.environ.setdefault("MATCHING_ENABLED", "0")
+os.environ.setdefault("IDEMPOTENCY_PURGE_ENABLED", "0")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
 
 @pytest.fixture(scope="session")
 def test_db_url(tmp_path_factory):
@@ -32,6 +39,36 @@ def app_client(test_db_url):
         yield client
 
 
+@pytest.fixture
+def replica(app_client, tmp_path, monkeypatch):
+    """Point GET handlers at a second SQLite file; call the result to sync it.
+
+    The copy is made with SQLite's online backup, so it reflects the primary
+    exactly as of the call, like a replica that has just caught up.
+    """
+    import sqlite3
+    from sqlmodel import create_engine
+    from app import db
+
+    replica_file = tmp_path / "replica.db"
+    replica_engine = create_engine(
+        f"sqlite:///{replica_file}", connect_args={"check_same_thread": False}
+    )
+
+    def sync():
+        src = sqlite3.connect(db.engine.url.database)
+        dst = sqlite3.connect(replica_file)
+        with dst:
+            src.backup(dst)
+        src.close()
+        dst.close()
+
+    sync()
+    monkeypatch.setitem(db._engines, "read", replica_engine)
+    yield sync
+    replica_engine.dispose()
+
+
 def register_and_login(client, email: str, password: str = "Password123!"):
     r = client.post("/auth/register", json={"email": email, "password": password})
     if r.status_code not in (200, 201):
@@ -45,3 +82,67 @@ def register_and_login(client, email: str, password: str = "Password123!"):
 
 def auth_headers(token: str):
     return {"Authorization": f"Bearer {token}"}
+
+
+def create_run(
+    client,
+    token,
+    restaurant="Port City Java EBII",
+    drop="Hunt Library",
+    eta="12:00",
+    capacity=None,
+):
+    payload = {"restaurant": restaurant, "drop_point": drop, "eta": eta}
+    if capacity is not None:
+        payload["capacity"] = capacity
+    r = client.post("/runs", headers=auth_headers(token), json=payload)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def join_run(client, token, run_id, items="1x Coffee", amount=3.5):
+    r = client.post(
+        f"/runs/{run_id}/orders",
+        headers=auth_headers(token),
+        json={"items": items, "amount": amount},
+    )
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def completed_run(
+    client, runner_token, joiner_tokens=(), items="1x Coffee", amount=3.5, **run
+):
+    """A run created by runner_token, joined by each joiner, then completed."""
+    created = create_run(client, runner_token, **run)
+    for token in joiner_tokens:
+        join_run(client, token, created["id"], items, amount)
+    r = client.put(
+        f"/runs/{created['id']}/complete", headers=auth_headers(runner_token)
+    )
+    assert r.status_code == 200, r.text
+    return created
+
+
+class QueryCounter:
+    """Counts SQL statements executed on any engine while the block is active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.remove(Engine, "before_cursor_execute", self._on_execute)
+        return False
@@ -0,0 +1,92 @@
+import asyncio
+
+
+def make_controller(capacity=1, low_wait=0.05):
+    from app.admission import AdmissionController, PriorityClass
+
+    return AdmissionController(
+        capacity,
+        {
+            "high": PriorityClass("high", 0, capacity, max_wait=5),
+            "normal": PriorityClass("normal", 1, capacity, max_wait=5),
+            "low": PriorityClass("low", 2, 1, max_wait=low_wait),
+        },
+    )
+
+
+def test_routes_are_classified():
+    from app.admission import classify
+
+    assert classify("POST", "/runs/3/orders") == "high"
+    assert classify("POST", "/runs/3/orders/9/verify-pin") == "high"
+    assert classify("PUT", "/runs/3/complete") == "high"
+    assert classify("GET", "/runs/joined/history") == "low"
+    assert classify("GET", "/runs/mine/history/export") == "low"
+    assert classify("GET", "/runs/joined/history/export") == "low"
+    assert classify("GET", "/points/history") == "low"
+    assert classify("GET", "/runs/available") == "normal"
+    assert classify("POST", "/runs") == "normal"
+
+
+def test_low_priority_is_shed_after_its_deadline():
+    async def scenario():
+        controller = make_controller()
+        assert await controller.acquire("normal")
+        assert not await controller.acquire("low")
+        snap = controller.snapshot()
+        assert snap["classes"]["low"]["shed"] == 1
+        assert snap["classes"]["low"]["queued"] == 0
+        controller.release("normal")
+        assert controller.in_flight == 0
+        assert await controller.acquire("low")
+
+    asyncio.run(scenario())
+
+
+def test_freed_slot_goes_to_highest_priority_waiter():
+    async def scenario():
+        controller = make_controller(low_wait=5)
+        order = []
+
+        async def request(name):
+            await controller.acquire(name)
+            order.append(name)
+            await asyncio.sleep(0)
+            controller.release(name)
+
+        assert await controller.acquire("normal")
+        waiters = [
+            asyncio.create_task(request(name)) for name in ("low", "normal", "high")
+        ]
+        await asyncio.sleep(0.01)
+        assert controller.snapshot()["classes"]["low"]["queued"] == 1
+        controller.release("normal")
+        await asyncio.gather(*waiters)
+        assert order == ["high", "normal", "low"]
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_busy_server_answers_503():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.admission import AdmissionMiddleware
+
+    controller = make_controller(low_wait=0.01)
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+
+    @app.get("/leaderboard")
+    def board():
+        return []
+
+    client = TestClient(app)
+    assert client.get("/leaderboard").status_code == 200
+    # occupy the only slot so the next low-priority request is shed
+    controller.in_flight = controller.capacity
+    r = client.get("/leaderboard")
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+    low = controller.snapshot()["classes"]["low"]
+    assert (low["admitted"], low["shed"]) == (1, 1)
@@ -23,10 +23,9 @@ def _reload_app(tmp_path) -> TestClient:
 
     # Ensure tables/columns exist in the new test database (mirrors app startup behavior)
     try:
-        dbmod.create_db_and_tables()
-        dbmod.ensure_user_points_column()
-        dbmod.ensure_foodrun_capacity_column()
-        dbmod.ensure_order_pin_column()
+        from app.migrations import migrate
+
+        migrate(dbmod.engine)
     except Exception:
         # Best-effort in tests; if something goes wrong, let the test run and fail
         pass
@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta, timezone
+
+from conftest import (
+    QueryCounter,
+    auth_headers,
+    create_run,
+    join_run,
+    register_and_login,
+)
+
+
+def available(client, token, **params):
+    r = client.get("/runs/available", params=params, headers=auth_headers(token))
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_filters_sorting_and_paging(app_client):
+    runner_token, _ = register_and_login(app_client, "flt_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "flt_user@ncsu.edu")
+    joiner_token, _ = register_and_login(app_client, "flt_joiner@ncsu.edu")
+    now = datetime.now(tz=timezone.utc)
+    later = create_run(
+        app_client,
+        runner_token,
+        "FltA",
+        "FltHill",
+        capacity=4,
+        eta=(now + timedelta(hours=2)).isoformat(),
+    )
+    sooner = create_run(
+        app_client,
+        runner_token,
+        "FltA",
+        "FltTalley",
+        capacity=2,
+        eta=(now + timedelta(minutes=20)).isoformat(),
+    )
+    other = create_run(
+        app_client,
+        runner_token,
+        "FltB",
+        "FltHill",
+        capacity=6,
+        eta=(now + timedelta(hours=4)).isoformat(),
+    )
+    join_run(app_client, joiner_token, other["id"])
+
+    mine = {later["id"], sooner["id"], other["id"]}
+    scope = {"restaurant": ["FltA", "FltB"]}
+
+    by_eta = available(app_client, user_token, sort="eta", **scope)
+    assert [r["id"] for r in by_eta if r["id"] in mine][:2] == [
+        sooner["id"],
+        later["id"],
+    ]
+    by_seats = available(app_client, user_token, sort="seats", **scope)
+    assert [r["id"] for r in by_seats] == [other["id"], later["id"], sooner["id"]]
+
+    only_a = available(app_client, user_token, restaurant="FltA")
+    assert {r["id"] for r in only_a} == {later["id"], sooner["id"]}
+    hill = available(app_client, user_token, drop_point="FltHill", **scope)
+    assert {r["id"] for r in hill} == {later["id"], other["id"]}
+    roomy = available(app_client, user_token, min_seats=4, **scope)
+    assert {r["id"] for r in roomy} == {later["id"], other["id"]}
+
+    window = available(
+        app_client,
+        user_token,
+        eta_after=now.isoformat(),
+        eta_before=(now + timedelta(hours=1)).isoformat(),
+        **scope,
+    )
+    assert [r["id"] for r in window] == [sooner["id"]]
+
+    page = available(app_client, user_token, sort="seats", limit=1, offset=1, **scope)
+    assert [r["id"] for r in page] == [later["id"]]
+
+
+def test_facets_computed_in_one_query(app_client):
+    runner_token, _ = register_and_login(app_client, "fct_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "fct_user@ncsu.edu")
+    create_run(app_client, runner_token, "FctA", "FctHill")
+    create_run(app_client, runner_token, "FctA", "FctTalley")
+    create_run(app_client, runner_token, "FctB", "FctHill")
+
+    with QueryCounter() as qc:
+        r = app_client.get(
+            "/runs/available/facets",
+            params={"restaurant": "FctA"},
+            headers=auth_headers(user_token),
+        )
+    assert r.status_code == 200
+    assert qc.count == 1
+    body = r.json()
+    restaurants = {f["value"]: f["count"] for f in body["restaurants"]}
+    drops = {f["value"]: f["count"] for f in body["drop_points"]}
+    # the restaurant facet ignores its own selection, the drop facet applies it
+    assert restaurants["FctA"] == 2 and restaurants["FctB"] == 1
+    assert drops["FctHill"] == 1 and drops["FctTalley"] == 1
+    assert body["total"] == 2
+
+
+def test_available_query_count_constant(app_client):
+    runner_token, _ = register_and_login(app_client, "flt_qc_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "flt_qc_user@ncsu.edu")
+
+    def count():
+        with QueryCounter() as qc:
+            available(app_client, user_token)
+        return qc.count
+
+    create_run(app_client, runner_token, "QcA", "QcHill")
+    few = count()
+    for _ in range(5):
+        create_run(app_client, runner_token, "QcA", "QcHill")
+    assert count() == few == 1
+
+
+def test_single_flight_shares_one_execution():
+    import threading
+    import time
+
+    from app.singleflight import SingleFlight
+
+    flight = SingleFlight()
+    calls = []
+    start = threading.Barrier(10)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["shared"]
+
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(flight.do("k", compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [["shared"]] * 10
+    # not a cache: a later call runs again
+    flight.do("k", compute)
+    assert len(calls) == 2
+
+
+def test_concurrent_identical_listings_coalesce(app_client, monkeypatch):
+    import threading
+    import time
+
+    import app.main as main
+
+    runner_token, _ = register_and_login(app_client, "sf_runner@ncsu.edu")
+    tokens = [
+        register_and_login(app_client, f"sf_user{i}@ncsu.edu")[0] for i in range(8)
+    ]
+    run = create_run(app_client, runner_token, "SfCafe", "SfHall")
+
+    executions = []
+    real_rows = main._available_rows
+
+    def slow_rows(*args):
+        executions.append(args[1])
+        time.sleep(0.3)
+        return real_rows(*args)
+
+    monkeypatch.setattr(main, "_available_rows", slow_rows)
+    start = threading.Barrier(len(tokens) + 1)
+    results = {}
+
+    def fetch(token):
+        start.wait()
+        results[token] = available(app_client, token, restaurant="SfCafe")
+
+    threads = [threading.Thread(target=fetch, args=(t,)) for t in tokens]
+    threads.append(threading.Thread(target=fetch, args=(runner_token,)))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert executions == [None]
+    for token in tokens:
+        assert [r["id"] for r in results[token]] == [run["id"]]
+    # the shared result is filtered per caller
+    assert results[runner_token] == []
+
+
+def test_shared_page_falls_back_when_own_runs_fill_it(app_client):
+    runner_token, _ = register_and_login(app_client, "sfp_runner@ncsu.edu")
+    other_token, _ = register_and_login(app_client, "sfp_other@ncsu.edu")
+    own = [create_run(app_client, runner_token, "SfpCafe", "SfpHall") for _ in range(2)]
+    others = [
+        create_run(app_client, other_token, "SfpCafe", "SfpHall") for _ in range(2)
+    ]
+    page = available(app_client, runner_token, restaurant="SfpCafe", limit=2)
+    assert [r["id"] for r in page] == [r["id"] for r in others]
+    page = available(app_client, other_token, restaurant="SfpCafe", limit=2)
+    assert [r["id"] for r in page] == [r["id"] for r in own]
@@ -0,0 +1,127 @@
+import gzip
+import json
+
+import pytest
+
+from conftest import auth_headers, completed_run, register_and_login
+
+
+def auth(token, encoding="gzip"):
+    return {**auth_headers(token), "Accept-Encoding": encoding}
+
+
+@pytest.fixture(scope="module")
+def history(app_client):
+    # a runner with a realistic history: completed runs with several orders
+    runner, _ = register_and_login(app_client, "gz_runner@ncsu.edu")
+    users = [
+        register_and_login(app_client, f"gz_user{i}@ncsu.edu")[0] for i in range(4)
+    ]
+    for i in range(40):
+        completed_run(
+            app_client,
+            runner,
+            users,
+            items="1x Chicken Bowl, 1x Lemonade",
+            amount=13.75,
+            restaurant=["Cava", "Chipotle", "Bruegger's"][i % 3],
+            eta="12:30",
+        )
+    return runner
+
+
+def test_history_is_compressed_and_round_trips(app_client, history):
+    plain = app_client.get("/runs/mine/history", headers=auth(history, "identity"))
+    packed = app_client.get("/runs/mine/history", headers=auth(history, "gzip"))
+    assert "content-encoding" not in plain.headers
+    assert packed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in packed.headers["vary"]
+    assert packed.json() == plain.json()
+    assert len(plain.json()) == 40
+    compressed = int(packed.headers["content-length"])
+    assert compressed < len(plain.content) / 4
+
+
+def test_small_and_binary_responses_pass_through():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from starlette.responses import Response
+    from app.compression import CompressionMiddleware
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" + b"\x00" * 4000, media_type="image/png")
+
+    client = TestClient(app)
+    for path in ("/small", "/image"):
+        r = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in r.headers
+
+
+def test_streamed_response_is_compressed_incrementally():
+    import asyncio
+
+    from starlette.responses import StreamingResponse
+    from app.compression import CompressionMiddleware
+
+    lines = [json.dumps({"id": i, "restaurant": "Cava"}) + "\n" for i in range(2000)]
+    app = CompressionMiddleware(
+        StreamingResponse(iter(lines), media_type="application/x-ndjson")
+    )
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/stream",
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    sent = []
+
+    async def receive():
+        # the client stays connected until the stream ends
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    bodies = sent[1:]
+    # every chunk is flushed as it arrives, not held until the end
+    assert len([m for m in bodies[:-1] if m["body"]]) > 1
+    raw = b"".join(m["body"] for m in bodies)
+    assert gzip.decompress(raw).decode() == "".join(lines)
+
+
+def test_negotiation_honours_q_values():
+    from app.compression import negotiate
+
+    encoders = {"gzip": None, "br": None}
+    assert negotiate("gzip, br", encoders) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", encoders) == "gzip"
+    assert negotiate("br;q=0, gzip", encoders) == "gzip"
+    assert negotiate("identity", encoders) is None
+    assert negotiate("*", encoders) == "br"
+    assert negotiate("zstd", encoders) is None
+
+
+@pytest.mark.bench
+def test_benchmark_on_history_payload(app_client, history):
+    from app.compression import benchmark
+
+    payload = app_client.get(
+        "/runs/mine/history", headers=auth(history, "identity")
+    ).content
+    results = {row["encoding"]: row for row in benchmark(payload)}
+    gz = results["gzip"]
+    # JSON history is highly repetitive: >4x smaller at well over 10 MB/s
+    assert gz["ratio"] < 0.25
+    assert gz["mb_per_s"] > 10
@@ -0,0 +1,49 @@
+from conftest import (
+    QueryCounter,
+    auth_headers,
+    create_run,
+    join_run,
+    register_and_login,
+)
+
+
+def test_dashboard_matches_individual_endpoints(app_client):
+    me, _ = register_and_login(app_client, "dash_me@ncsu.edu")
+    other, _ = register_and_login(app_client, "dash_other@ncsu.edu")
+    mine = create_run(app_client, me, "Dashboard Deli")
+    theirs = create_run(app_client, other, "Dashboard Deli")
+    create_run(app_client, other, "Dashboard Diner")
+    join_run(app_client, other, mine["id"])
+    join_run(app_client, me, theirs["id"])
+
+    headers = auth_headers(me)
+    dashboard = app_client.get("/dashboard", headers=headers)
+    assert dashboard.status_code == 200, dashboard.text
+    body = dashboard.json()
+    assert body["user"] == app_client.get("/auth/me", headers=headers).json()
+    assert body["points"] == app_client.get("/points", headers=headers).json()
+    for key, path in [
+        ("available", "/runs/available"),
+        ("mine", "/runs/mine"),
+        ("joined", "/runs/joined"),
+    ]:
+        assert body[key] == app_client.get(path, headers=headers).json(), key
+    assert [r["id"] for r in body["mine"]] == [mine["id"]]
+    assert body["mine"][0]["orders"][0]["user_email"] == "dash_other@ncsu.edu"
+    assert [r["id"] for r in body["joined"]] == [theirs["id"]]
+
+
+def test_dashboard_is_a_handful_of_statements(app_client):
+    me, _ = register_and_login(app_client, "dash_count@ncsu.edu")
+    other, _ = register_and_login(app_client, "dash_count_o@ncsu.edu")
+    for i in range(3):
+        run = create_run(app_client, me, f"Count Cafe {i}")
+        join_run(app_client, other, run["id"])
+        join_run(app_client, me, create_run(app_client, other, f"Count Cafe {i}")["id"])
+
+    with QueryCounter() as qc:
+        r = app_client.get("/dashboard", headers=auth_headers(me))
+    assert r.status_code == 200
+    assert len(r.json()["mine"]) == 3
+    # user, available, my runs, their orders, joined runs
+    assert qc.count <= 5
@@ -1,41 +1,10 @@
 import pytest
 from fastapi import HTTPException
-from app import db
 from app.main import app
 from fastapi.testclient import TestClient
 
 client = TestClient(app)
 
-# --------------------
-# DB.PY edge cases
-# --------------------
-
-
-def test_ensure_user_points_column_non_sqlite(monkeypatch):
-    monkeypatch.setattr(db, "DATABASE_URL", "postgres://dummy")
-    db.ensure_user_points_column()
-
-
-def test_ensure_foodrun_capacity_column_non_sqlite(monkeypatch):
-    monkeypatch.setattr(db, "DATABASE_URL", "mysql://dummy")
-    db.ensure_foodrun_capacity_column()
-
-
-def test_ensure_order_pin_column_non_sqlite(monkeypatch):
-    monkeypatch.setattr(db, "DATABASE_URL", "oracle://dummy")
-    db.ensure_order_pin_column()
-
-
-def test_db_column_functions_handle_exceptions(monkeypatch):
-    def bad_engine():
-        raise Exception("Simulated DB fail")
-
-    monkeypatch.setattr(db, "engine", bad_engine)
-    db.ensure_user_points_column()
-    db.ensure_foodrun_capacity_column()
-    db.ensure_order_pin_column()
-
-
 # --------------------
 # MAIN.PY edge cases
 # --------------------
@@ -58,6 +27,7 @@ def test_login_rejects_non_ncsu_email():
 
 def test_joined_runs_returns_empty():
     from app import main
+    from app.fieldsets import Fieldset
 
     class DummyResult:
         def all(self, *args, **kwargs):
@@ -67,12 +37,13 @@ def test_joined_runs_returns_empty():
         def exec(self, _query):
             return DummyResult()
 
-    result = main.list_joined_runs({"sub": "1"}, DummySession())
+    result = main.list_joined_runs(Fieldset(None), {"sub": "1"}, DummySession())
     assert result == []
 
 
 def test_joined_history_returns_empty():
     from app import main
+    from app.fieldsets import Fieldset
 
     class DummyResult:
         def all(self, *args, **kwargs):
@@ -82,7 +53,7 @@ def test_joined_history_returns_empty():
         def exec(self, _query):
             return DummyResult()
 
-    result = main.list_joined_runs_history({"sub": "1"}, DummySession())
+    result = main.list_joined_runs_history(Fieldset(None), {"sub": "1"}, DummySession())
     assert result == []
 
 
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import QueryCounter, auth_headers, create_run, register_and_login
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    # the expectations below are written for the default campus zone
+    from zoneinfo import ZoneInfo
+
+    from app import eta
+
+    monkeypatch.setattr(eta, "CAMPUS_TZ", ZoneInfo("America/New_York"))
+    return eta.CAMPUS_TZ
+
+
+def test_parse_eta_formats(new_york):
+    from app.eta import parse_eta
+
+    CAMPUS_TZ = new_york
+    ref = datetime(2025, 10, 1, 15, 0, tzinfo=timezone.utc)
+    local = ref.astimezone(CAMPUS_TZ)
+
+    at_1030 = parse_eta("10:30", ref).astimezone(CAMPUS_TZ)
+    assert (at_1030.hour, at_1030.minute) == (10, 30)
+    assert at_1030.date() == local.date()
+    assert parse_eta("1pm", ref).astimezone(CAMPUS_TZ).hour == 13
+    assert parse_eta("12:15 AM", ref).astimezone(CAMPUS_TZ).hour == 0
+    iso = parse_eta("2025-10-01T12:00:00+00:00", ref)
+    assert iso == datetime(2025, 10, 1, 12, 0, tzinfo=timezone.utc)
+    for junk in ("t", "now", "", "25:00", "13pm"):
+        assert parse_eta(junk, ref) is None
+
+
+def test_parse_eta_picks_next_occurrence(new_york):
+    from app.eta import parse_eta
+
+    CAMPUS_TZ = new_york
+    late_evening = datetime(2025, 10, 1, 23, 30, tzinfo=CAMPUS_TZ)
+    after_midnight = parse_eta("00:15", late_evening).astimezone(CAMPUS_TZ)
+    assert after_midnight.date() == late_evening.date() + timedelta(days=1)
+    # slightly late runners keep today's date
+    running_late = parse_eta("23:00", late_evening).astimezone(CAMPUS_TZ)
+    assert running_late.date() == late_evening.date()
+    morning = parse_eta("8:00", late_evening).astimezone(CAMPUS_TZ)
+    assert morning.date() == late_evening.date() + timedelta(days=1)
+
+
+def test_parse_duration():
+    from app.eta import parse_duration
+
+    assert parse_duration("15m") == timedelta(minutes=15)
+    assert parse_duration("2h") == timedelta(hours=2)
+    assert parse_duration("30") == timedelta(minutes=30)
+    assert parse_duration("soon") is None
+
+
+def test_backfill_parses_legacy_rows(app_client):
+    from sqlmodel import Session, select, update
+    from app import db
+    from app.eta import backfill_eta_at
+    from app.models import FoodRun
+
+    token, _ = register_and_login(app_client, "eta_legacy@ncsu.edu")
+    ids = []
+    for eta in ("9:45", "whenever", "6pm"):
+        ids.append(create_run(app_client, token, "Bruegger's", "Hunt", eta)["id"])
+    with Session(db.engine) as session:
+        # simulate rows created before eta_at existed
+        session.exec(
+            update(FoodRun)
+            .where(FoodRun.id.in_(ids))
+            .values(eta_at=None, eta_unparsed=False)
+        )
+        session.commit()
+        assert backfill_eta_at(session, batch_size=1) >= 2
+        rows = {
+            run_id: (eta_at, unparsed)
+            for run_id, eta_at, unparsed in session.exec(
+                select(FoodRun.id, FoodRun.eta_at, FoodRun.eta_unparsed).where(
+                    FoodRun.id.in_(ids)
+                )
+            ).all()
+        }
+        # the unparseable row is flagged, so it is not read again
+        with QueryCounter() as counter:
+            assert backfill_eta_at(session) == 0
+        assert counter.count == 1
+    assert rows[ids[0]][0] is not None
+    assert rows[ids[1]] == (None, True)
+    assert rows[ids[2]][0] is not None
+
+
+def test_available_departing_within(app_client):
+    runner_token, _ = register_and_login(app_client, "eta_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "eta_user@ncsu.edu")
+    now = datetime.now(tz=timezone.utc)
+    soon = (now + timedelta(minutes=10)).isoformat()
+    later = (now + timedelta(hours=3)).isoformat()
+    created = {}
+    for label, eta in (("soon", soon), ("later", later), ("text", "whenever")):
+        created[label] = create_run(app_client, runner_token, "Sushi", "Hill", eta)
+    assert created["soon"]["eta_at"] is not None
+    assert created["text"]["eta_at"] is None
+
+    r = app_client.get(
+        "/runs/available",
+        params={"departing_within": "15m"},
+        headers=auth_headers(user_token),
+    )
+    assert r.status_code == 200
+    ids = [run["id"] for run in r.json()]
+    assert created["soon"]["id"] in ids
+    assert created["later"]["id"] not in ids
+    assert created["text"]["id"] not in ids
+
+    everything = app_client.get(
+        "/runs/available", headers=auth_headers(user_token)
+    ).json()
+    assert {c["id"] for c in created.values()} <= {run["id"] for run in everything}
+
+    bad = app_client.get(
+        "/runs/available",
+        params={"departing_within": "soon"},
+        headers=auth_headers(user_token),
+    )
+    assert bad.status_code == 400
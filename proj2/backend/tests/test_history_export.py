@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+
+from conftest import auth_headers, completed_run, register_and_login
+
+
+def finished_run(client, runner, joiners, restaurant="Export Eats"):
+    return completed_run(
+        client,
+        runner,
+        joiners,
+        items='Burrito, "extra" salsa',
+        amount=10.25,
+        restaurant=restaurant,
+        drop="DH Hill",
+        eta="18:00",
+    )
+
+
+def test_runner_export_streams_ndjson(app_client):
+    runner, _ = register_and_login(app_client, "ex_runner@ncsu.edu")
+    joiners = [
+        register_and_login(app_client, f"ex_joiner{i}@ncsu.edu")[0] for i in range(2)
+    ]
+    runs = [finished_run(app_client, runner, joiners) for _ in range(3)]
+    empty = finished_run(app_client, runner, [])
+
+    with app_client.stream(
+        "GET", "/runs/mine/history/export", headers=auth_headers(runner)
+    ) as r:
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/x-ndjson"
+        assert "run-history.ndjson" in r.headers["content-disposition"]
+        rows = [json.loads(line) for line in r.iter_lines() if line]
+
+    assert [row["run_id"] for row in rows] == [
+        runs[0]["id"],
+        runs[0]["id"],
+        runs[1]["id"],
+        runs[1]["id"],
+        runs[2]["id"],
+        runs[2]["id"],
+        empty["id"],
+    ]
+    assert rows[0]["user_email"] == "ex_joiner0@ncsu.edu"
+    assert rows[0]["run_status"] == "completed"
+    assert rows[0]["amount"] == 10.25
+    assert rows[-1]["order_id"] is None
+
+
+def test_joiner_export_as_csv(app_client):
+    runner, _ = register_and_login(app_client, "ex_csv_runner@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "ex_csv_joiner@ncsu.edu")
+    run = finished_run(app_client, runner, [joiner], restaurant="CSV, Inc")
+
+    r = app_client.get(
+        "/runs/joined/history/export",
+        params={"format": "csv"},
+        headers=auth_headers(joiner),
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(rows) == 1
+    assert rows[0]["run_id"] == str(run["id"])
+    assert rows[0]["restaurant"] == "CSV, Inc"
+    assert rows[0]["items"] == 'Burrito, "extra" salsa'
+    assert rows[0]["runner_email"] == "ex_csv_runner@ncsu.edu"
+
+
+def test_export_requires_auth_and_known_format(app_client):
+    assert app_client.get("/runs/mine/history/export").status_code in (401, 403)
+    token, _ = register_and_login(app_client, "ex_fmt@ncsu.edu")
+    r = app_client.get(
+        "/runs/mine/history/export",
+        params={"format": "xlsx"},
+        headers=auth_headers(token),
+    )
+    assert r.status_code == 422
+
+
+def test_rows_are_fetched_in_batches_and_sent_in_chunks(app_client):
+    from sqlalchemy import text
+
+    from app import db
+    from app.export import ndjson_body, stream_rows
+
+    stmt = text('SELECT id FROM "user" ORDER BY id')
+    with db.engine.connect() as conn:
+        ids = [row.id for row in conn.execute(stmt)]
+    assert [row["id"] for row in stream_rows(db.engine, [stmt], 2)] == ids
+
+    chunks = list(ndjson_body(({"n": n} for n in range(100)), chunk_size=200))
+    # the first row is flushed on its own, the rest in ~200 byte chunks
+    assert chunks[0] == b'{"n": 0}\n'
+    assert all(len(c) >= 200 for c in chunks[1:-1])
+    assert b"".join(chunks).count(b"\n") == 100
+
+
+def test_export_streams_in_a_low_priority_slot(app_client, monkeypatch):
+    from app import main
+    from app.admission import admission
+
+    runner, _ = register_and_login(app_client, "export_slot@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "export_slot_joiner@ncsu.edu")
+    finished_run(app_client, runner, [joiner], restaurant="Slot Eats")
+    held = []
+
+    def rows(engine, statements):
+        for row in main_stream_rows(engine, statements):
+            classes = admission.snapshot()["classes"]
+            held.append((classes["low"]["in_flight"], classes["normal"]["in_flight"]))
+            yield row
+
+    main_stream_rows = main.stream_rows
+    monkeypatch.setattr(main, "stream_rows", rows)
+    r = app_client.get("/runs/mine/history/export", headers=auth_headers(runner))
+    assert r.status_code == 200
+    # while the body streams, the request holds a low slot, not a normal one
+    assert held and set(held) == {(1, 0)}
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+from conftest import auth_headers, register_and_login
+
+
+def auth(token, key=None):
+    headers = auth_headers(token)
+    if key:
+        headers["Idempotency-Key"] = key
+    return headers
+
+
+RUN = {"restaurant": "Retry Cafe", "drop_point": "Talley", "eta": "12:30"}
+
+
+def test_retried_run_creation_returns_original_response(app_client):
+    token, _ = register_and_login(app_client, "idem_runner@ncsu.edu")
+    first = app_client.post("/runs", headers=auth(token, "run-1"), json=RUN)
+    assert first.status_code == 200
+    retry = app_client.post("/runs", headers=auth(token, "run-1"), json=RUN)
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+
+    mine = app_client.get("/runs/mine", headers=auth(token)).json()
+    assert [r["id"] for r in mine].count(first.json()["id"]) == 1
+    assert len([r for r in mine if r["restaurant"] == "Retry Cafe"]) == 1
+
+    # a new key is a new run; without a key nothing is deduplicated
+    other = app_client.post("/runs", headers=auth(token, "run-2"), json=RUN)
+    assert other.json()["id"] != first.json()["id"]
+    plain = app_client.post("/runs", headers=auth(token), json=RUN)
+    assert "Idempotent-Replayed" not in plain.headers
+
+
+def test_key_reused_for_different_body_is_rejected(app_client):
+    token, _ = register_and_login(app_client, "idem_reuse@ncsu.edu")
+    app_client.post("/runs", headers=auth(token, "reuse"), json=RUN)
+    changed = {**RUN, "capacity": 3}
+    r = app_client.post("/runs", headers=auth(token, "reuse"), json=changed)
+    assert r.status_code == 422
+
+    # keys are scoped per user
+    other, _ = register_and_login(app_client, "idem_reuse2@ncsu.edu")
+    r = app_client.post("/runs", headers=auth(other, "reuse"), json=changed)
+    assert r.status_code == 200
+
+
+def test_retried_join_does_not_fail_as_already_joined(app_client):
+    runner, _ = register_and_login(app_client, "idem_join_runner@ncsu.edu")
+    user, _ = register_and_login(app_client, "idem_join_user@ncsu.edu")
+    run = app_client.post("/runs", headers=auth(runner), json=RUN).json()
+    body = {"items": "1x Latte", "amount": 4.5}
+    url = f"/runs/{run['id']}/orders"
+    first = app_client.post(url, headers=auth(user, "join-1"), json=body)
+    assert first.status_code == 200
+    retry = app_client.post(url, headers=auth(user, "join-1"), json=body)
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    # without the key the duplicate is still refused
+    dup = app_client.post(url, headers=auth(user), json=body)
+    assert dup.status_code == 400
+
+    details = app_client.get(f"/runs/id/{run['id']}", headers=auth(runner)).json()
+    assert len(details["orders"]) == 1
+
+
+def test_expired_keys_are_purged_and_reusable(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.idempotency import purge_expired_keys
+    from app.models import IdempotencyRecord
+
+    token, user = register_and_login(app_client, "idem_ttl@ncsu.edu")
+    first = app_client.post("/runs", headers=auth(token, "ttl"), json=RUN).json()
+    with Session(db.engine) as session:
+        later = datetime.now(tz=timezone.utc) + timedelta(days=2)
+        assert purge_expired_keys(session, later) >= 1
+        assert session.get(IdempotencyRecord, (user["id"], "ttl")) is None
+    again = app_client.post("/runs", headers=auth(token, "ttl"), json=RUN)
+    assert again.json()["id"] != first["id"]
@@ -0,0 +1,72 @@
+from conftest import auth_headers, completed_run, register_and_login
+
+
+def test_topk_tracks_exact_scores_and_signals_rebuild():
+    from app.leaderboard import TopK
+
+    board = TopK(2)
+    board.load([(1, 50), (2, 40), (3, 30), (4, 20)])  # full: floor is 20
+    assert not board.complete and board.floor == 20
+    assert board.top(2) == [(1, 50), (2, 40)]
+
+    board.update(5, 45)  # overflows capacity, evicts the lowest
+    assert board.top(3) == [(1, 50), (5, 45), (2, 40)]
+    assert board.floor == 20
+
+    board.update(1, 10)  # drops below the floor: rank unknown
+    board.update(5, 5)
+    board.update(2, 0)
+    assert board.top(2) is None
+
+
+def test_leaderboard_updates_on_complete_and_redeem(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.leaderboard import leaderboard
+
+    with Session(db.engine) as session:
+        leaderboard.rebuild(session)
+
+    runner_token, runner = register_and_login(app_client, "lb_runner@ncsu.edu")
+    joiner_token, _ = register_and_login(app_client, "lb_joiner@ncsu.edu")
+    completed_run(app_client, runner_token, [joiner_token], amount=50000.0)
+
+    top = app_client.get("/leaderboard", headers=auth_headers(runner_token)).json()
+    assert top[0]["user_id"] == runner["id"]
+    assert top[0]["points"] == 5000 and top[0]["rank"] == 1
+    assert top[0]["username"] == "lb_runner@ncsu.edu"
+
+    r = app_client.post("/points/redeem", headers=auth_headers(runner_token))
+    assert r.status_code == 200
+    top = app_client.get("/leaderboard", headers=auth_headers(runner_token)).json()
+    assert all(e["user_id"] != runner["id"] for e in top)
+
+    # windows rank points earned, so redeeming does not affect them
+    week = app_client.get(
+        "/leaderboard", params={"window": "week"}, headers=auth_headers(runner_token)
+    ).json()
+    assert week[0]["user_id"] == runner["id"] and week[0]["points"] == 5000
+
+
+def test_leaderboard_window_rebuilt_from_ledger(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.leaderboard import Leaderboard
+
+    runner_token, runner = register_and_login(app_client, "lb_rebuild@ncsu.edu")
+    joiner_token, _ = register_and_login(app_client, "lb_rebuild_j@ncsu.edu")
+    completed_run(app_client, runner_token, [joiner_token], amount=70000.0)
+
+    fresh = Leaderboard(k=5)
+    with Session(db.engine) as session:
+        fresh.rebuild(session)
+        assert fresh.top(session, window="day", limit=1) == [(runner["id"], 7000)]
+        assert fresh.top(session, window="all", limit=1) == [(runner["id"], 7000)]
+
+
+def test_leaderboard_rejects_unknown_window(app_client):
+    token, _ = register_and_login(app_client, "lb_bad@ncsu.edu")
+    r = app_client.get(
+        "/leaderboard", params={"window": "year"}, headers=auth_headers(token)
+    )
+    assert r.status_code == 422
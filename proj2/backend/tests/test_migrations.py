@@ -0,0 +1,190 @@
+import pytest
+from sqlalchemy import inspect, text
+
+from conftest import QueryCounter
+
+
+def engine_at(path):
+    from sqlmodel import create_engine
+
+    return create_engine(f"sqlite:///{path}")
+
+
+def test_fresh_database_is_created_then_checked_with_one_query(tmp_path):
+    from app.migrations import MIGRATIONS, current_version, migrate
+
+    engine = engine_at(tmp_path / "fresh.db")
+    assert current_version(engine) is None
+    assert migrate(engine) == [m.version for m in MIGRATIONS]
+    assert current_version(engine) == MIGRATIONS[-1].version
+    assert {"user", "foodrun", "order", "schemaversion"} <= set(
+        inspect(engine).get_table_names()
+    )
+    with QueryCounter() as counter:
+        assert migrate(engine) == []
+    assert counter.count == 1
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+    from app.migrations import MIGRATIONS, current_version, migrate
+
+    engine = engine_at(tmp_path / "legacy.db")
+    # schema as created before points, capacity, pins and parsed ETAs existed
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE user (id INTEGER PRIMARY KEY, email VARCHAR UNIQUE, "
+                "password_hash VARCHAR NOT NULL)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE foodrun (id INTEGER PRIMARY KEY, runner_id INTEGER, "
+                "restaurant VARCHAR, drop_point VARCHAR, eta VARCHAR, "
+                "status VARCHAR, created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE 'order' (id INTEGER PRIMARY KEY, run_id INTEGER, "
+                "user_id INTEGER, items VARCHAR, amount FLOAT, status VARCHAR, "
+                "created_at DATETIME)"
+            )
+        )
+        conn.execute(text("INSERT INTO user VALUES (1, 'old@ncsu.edu', 'x')"))
+        conn.execute(
+            text(
+                "INSERT INTO foodrun "
+                "VALUES (1, 1, 'Cava', 'Hill', '12:00', 'active', NULL)"
+            )
+        )
+
+    assert migrate(engine) == [m.version for m in MIGRATIONS]
+    assert current_version(engine) == MIGRATIONS[-1].version
+    insp = inspect(engine)
+    assert {"capacity", "eta_at", "drop_point_id"} <= {
+        c["name"] for c in insp.get_columns("foodrun")
+    }
+    assert "pin" in {c["name"] for c in insp.get_columns("order")}
+    assert "ix_foodrun_status_eta_at" in {
+        i["name"] for i in insp.get_indexes("foodrun")
+    }
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT points FROM user")).scalar() == 0
+        assert conn.execute(text("SELECT capacity FROM foodrun")).scalar() == 5
+        # tables introduced later are created by the baseline step
+        assert (
+            conn.execute(text("SELECT COUNT(*) FROM pointstransaction")).scalar() == 0
+        )
+        # one-off backfills ran as steps
+        assert conn.execute(text("SELECT eta_at FROM foodrun")).scalar() is not None
+        assert conn.execute(text("SELECT COUNT(*) FROM droppoint")).scalar() > 0
+        assert conn.execute(text("SELECT COUNT(*) FROM foodrun_fts")).scalar() == 1
+
+
+def test_failed_step_is_not_recorded_and_resumes(tmp_path):
+    from app.migrations import MIGRATIONS, Migration, current_version, migrate
+
+    engine = engine_at(tmp_path / "resume.db")
+    calls = []
+
+    def flaky(conn):
+        calls.append(1)
+        conn.execute(text("CREATE TABLE scratch (id INTEGER)"))
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+
+    steps = list(MIGRATIONS) + [Migration(MIGRATIONS[-1].version + 1, "scratch", flaky)]
+    with pytest.raises(RuntimeError):
+        migrate(engine, steps)
+    assert current_version(engine) == MIGRATIONS[-1].version
+    # the failed step rolled back with its transaction and runs again
+    assert migrate(engine, steps) == [steps[-1].version]
+    assert "scratch" in inspect(engine).get_table_names()
+
+
+def test_order_request_foreign_key_is_dropped_and_rows_kept(tmp_path):
+    from app.migrations import migrate
+
+    engine = engine_at(tmp_path / "requests.db")
+    # as created when order_id still referenced the live order table
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE orderrequest (id INTEGER PRIMARY KEY, "
+                "user_id INTEGER NOT NULL, restaurant VARCHAR NOT NULL, "
+                "drop_point VARCHAR NOT NULL, latest_eta DATETIME NOT NULL, "
+                "items VARCHAR NOT NULL, amount FLOAT NOT NULL, "
+                "status VARCHAR NOT NULL, order_id INTEGER REFERENCES 'order' (id), "
+                "created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO orderrequest VALUES (1, 1, 'Cava', 'Hill', "
+                "'2024-01-01 12:00:00', '1x Bowl', 11.0, 'matched', 7, NULL)"
+            )
+        )
+
+    migrate(engine)
+    insp = inspect(engine)
+    # rebuilt from the model, which only references the requesting user
+    assert [fk["referred_table"] for fk in insp.get_foreign_keys("orderrequest")] == [
+        "user"
+    ]
+    assert "ix_orderrequest_status_deadline" in {
+        i["name"] for i in insp.get_indexes("orderrequest")
+    }
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT status, order_id FROM orderrequest")).one()
+    assert tuple(row) == ("matched", 7)
+
+
+def test_archived_ids_are_not_handed_out_again(tmp_path):
+    from app.migrations import MIGRATIONS, migrate
+
+    engine = engine_at(tmp_path / "ids.db")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE foodrun (id INTEGER PRIMARY KEY, runner_id INTEGER, "
+                "restaurant VARCHAR, drop_point VARCHAR, eta VARCHAR, "
+                "status VARCHAR, created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO foodrun "
+                "VALUES (1, 1, 'Cava', 'Hill', '12:00', 'active', NULL)"
+            )
+        )
+    migrate(engine, MIGRATIONS[:-1])
+    # run 2 was archived while ids could still be reused
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO foodrunarchive (id, runner_id, restaurant, drop_point, "
+                "eta, eta_unparsed, capacity, status) "
+                "VALUES (2, 1, 'Cava', 'Hill', '12:00', 0, 5, 'completed')"
+            )
+        )
+
+    migrate(engine)
+    insp = inspect(engine)
+    # order still references the rebuilt run table
+    assert sorted(fk["referred_table"] for fk in insp.get_foreign_keys("order")) == [
+        "foodrun",
+        "user",
+    ]
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO foodrun (runner_id, restaurant, drop_point, eta, "
+                "eta_unparsed, capacity, status) "
+                "VALUES (1, 'Tacos', 'Quad', '13:00', 0, 5, 'active')"
+            )
+        )
+        assert conn.execute(text("SELECT MAX(id) FROM foodrun")).scalar() == 3
+        # the search triggers were recreated on the rebuilt table
+        match = text("SELECT rowid FROM foodrun_fts WHERE foodrun_fts MATCH 'tacos'")
+        assert conn.execute(match).scalar() == 3
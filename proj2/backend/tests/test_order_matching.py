@@ -0,0 +1,252 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import auth_headers, create_run, join_run, register_and_login
+
+
+def iso_in(minutes):
+    return (datetime.now(tz=timezone.utc) + timedelta(minutes=minutes)).isoformat()
+
+
+def create_request(client, token, restaurant, latest_eta):
+    r = client.post(
+        "/requests",
+        headers=auth_headers(token),
+        json={
+            "restaurant": restaurant,
+            "drop_point": "hunt library",
+            "latest_eta": latest_eta,
+            "items": "1x Bowl",
+            "amount": 11.0,
+        },
+    )
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def match_now():
+    from sqlmodel import Session
+    from app import db
+    from app.matching import run_matching_round
+
+    with Session(db.engine) as session:
+        return run_matching_round(session)
+
+
+def test_requests_are_matched_respecting_capacity_and_deadline(app_client):
+    runner_token, _ = register_and_login(app_client, "match_runner@ncsu.edu")
+    users = [
+        register_and_login(app_client, f"match_user{i}@ncsu.edu")[0] for i in range(4)
+    ]
+    early = create_run(
+        app_client, runner_token, "Cava Match", eta=iso_in(20), capacity=1
+    )
+    late = create_run(
+        app_client, runner_token, "Cava Match", eta=iso_in(90), capacity=2
+    )
+
+    # the tight request can only use the early run; the others fit either
+    tight = create_request(app_client, users[0], "cava match", iso_in(30))
+    loose = [
+        create_request(app_client, t, "Cava Match", iso_in(120)) for t in users[1:]
+    ]
+    assert tight["status"] == "open"
+
+    assert match_now() == 3
+    mine = app_client.get("/requests/mine", headers=auth_headers(users[0])).json()
+    assert mine[0]["status"] == "matched"
+    assert mine[0]["run_id"] == early["id"]
+
+    statuses = []
+    for token, req in zip(users[1:], loose):
+        row = app_client.get("/requests/mine", headers=auth_headers(token)).json()[0]
+        assert row["id"] == req["id"]
+        statuses.append(row["status"])
+        if row["status"] == "matched":
+            assert row["run_id"] == late["id"]
+            joined = app_client.get("/runs/joined", headers=auth_headers(token)).json()
+            assert joined[0]["my_order"]["pin"]
+    assert sorted(statuses) == ["matched", "matched", "open"]
+
+    details = app_client.get(
+        f"/runs/id/{late['id']}", headers=auth_headers(runner_token)
+    )
+    assert details.json()["seats_remaining"] == 0
+    assert match_now() == 0
+
+
+def test_request_skips_own_and_joined_runs(app_client):
+    token, _ = register_and_login(app_client, "match_self@ncsu.edu")
+    other, _ = register_and_login(app_client, "match_other@ncsu.edu")
+    create_run(app_client, token, "Self Match", eta=iso_in(15))
+    joined = create_run(app_client, other, "Self Match", eta=iso_in(25))
+    join_run(app_client, token, joined["id"])
+    create_request(app_client, token, "Self Match", iso_in(60))
+    assert match_now() == 0
+
+    third = create_run(app_client, other, "Self Match", eta=iso_in(40))
+    assert match_now() == 1
+    row = app_client.get("/requests/mine", headers=auth_headers(token)).json()[0]
+    assert row["run_id"] == third["id"]
+
+
+def test_cancel_and_expire_requests(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.matching import expire_stale_requests
+
+    token, _ = register_and_login(app_client, "match_cancel@ncsu.edu")
+    other, _ = register_and_login(app_client, "match_cancel2@ncsu.edu")
+    req = create_request(app_client, token, "Cancel Match", iso_in(30))
+    url = f"/requests/{req['id']}"
+    assert app_client.delete(url, headers=auth_headers(other)).status_code == 404
+    assert app_client.delete(url, headers=auth_headers(token)).status_code == 200
+    assert app_client.delete(url, headers=auth_headers(token)).status_code == 400
+
+    bad = app_client.post(
+        "/requests",
+        headers=auth_headers(token),
+        json={
+            "restaurant": "x",
+            "drop_point": "y",
+            "latest_eta": "whenever",
+            "items": "x",
+            "amount": 1.0,
+        },
+    )
+    assert bad.status_code == 400
+
+    stale = create_request(app_client, token, "Cancel Match", iso_in(5))
+    with Session(db.engine) as session:
+        later = datetime.now(tz=timezone.utc) + timedelta(minutes=10)
+        assert expire_stale_requests(session, later) >= 1
+    rows = app_client.get("/requests/mine", headers=auth_headers(token)).json()
+    assert {r["id"]: r["status"] for r in rows}[stale["id"]] == "expired"
+
+
+def test_match_to_a_run_closed_since_the_snapshot_is_released(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.matching import _commit_matches
+
+    runner_token, _ = register_and_login(app_client, "stale_runner@ncsu.edu")
+    users = [
+        register_and_login(app_client, f"stale_user{i}@ncsu.edu")[0] for i in range(3)
+    ]
+    cancelled = create_run(app_client, runner_token, "Stale Match", eta=iso_in(30))
+    full = create_run(
+        app_client, runner_token, "Stale Match", eta=iso_in(30), capacity=1
+    )
+    open_run = create_run(app_client, runner_token, "Stale Match", eta=iso_in(30))
+    requests = [create_request(app_client, t, "Stale Match", iso_in(60)) for t in users]
+    # after the round read them, one run is cancelled and the other fills up
+    app_client.put(
+        f"/runs/{cancelled['id']}/cancel", headers=auth_headers(runner_token)
+    )
+    joiner, _ = register_and_login(app_client, "stale_joiner@ncsu.edu")
+    join_run(app_client, joiner, full["id"])
+
+    matches = [
+        (requests[0]["id"], cancelled["id"]),
+        (requests[1]["id"], full["id"]),
+        (requests[2]["id"], open_run["id"]),
+    ]
+    with Session(db.engine) as session:
+        assert _commit_matches(session, matches) == 1
+
+    rows = [
+        app_client.get("/requests/mine", headers=auth_headers(t)).json()[0]
+        for t in users
+    ]
+    assert [r["status"] for r in rows] == ["open", "open", "matched"]
+    assert rows[2]["run_id"] == open_run["id"]
+    orders = app_client.get(
+        f"/runs/{full['id']}/orders", headers=auth_headers(runner_token)
+    )
+    assert len(orders.json()) == 1
+
+
+def test_runs_with_padded_names_are_matched(app_client):
+    runner_token, _ = register_and_login(app_client, "match_pad_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "match_pad_user@ncsu.edu")
+    run = create_run(
+        app_client, runner_token, "  Padded Cava ", " Hunt Library", eta=iso_in(20)
+    )
+    create_request(app_client, user_token, "padded cava", iso_in(60))
+
+    match_now()
+    mine = app_client.get("/requests/mine", headers=auth_headers(user_token)).json()
+    assert mine[0]["run_id"] == run["id"]
+
+
+@pytest.mark.bench
+def test_matching_round_handles_thousands_of_requests(tmp_path):
+    from sqlmodel import Session, SQLModel, create_engine, func, select
+    from app.matching import run_matching_round
+    from app.models import FoodRun, Order, OrderRequest, User
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'match.db'}")
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(38)
+    now = datetime.now(tz=timezone.utc)
+    restaurants = [f"place {i}" for i in range(20)]
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{"email": f"u{i}@x.edu", "password_hash": "x"} for i in range(5000)],
+        )
+        conn.execute(
+            FoodRun.__table__.insert(),
+            [
+                {
+                    "runner_id": i + 1,
+                    "restaurant": rng.choice(restaurants),
+                    "drop_point": "hunt",
+                    "eta": "",
+                    "eta_at": now + timedelta(minutes=rng.randint(10, 180)),
+                    "capacity": 5,
+                    "status": "active",
+                }
+                for i in range(400)
+            ],
+        )
+        conn.execute(
+            OrderRequest.__table__.insert(),
+            [
+                {
+                    "user_id": rng.randint(401, 5000),
+                    "restaurant": rng.choice(restaurants),
+                    "drop_point": "hunt",
+                    "latest_eta": now + timedelta(minutes=rng.randint(20, 240)),
+                    "items": "x",
+                    "amount": 5.0,
+                    "status": "open",
+                }
+                for _ in range(4000)
+            ],
+        )
+
+    with Session(engine) as session:
+        started = time.perf_counter()
+        matched = run_matching_round(session, now=now)
+        elapsed = time.perf_counter() - started
+        assert 1000 < matched <= 2000  # 400 runs x 5 seats
+        assert elapsed < 5
+
+        seats = dict(
+            session.exec(
+                select(Order.run_id, func.count(Order.id)).group_by(Order.run_id)
+            ).all()
+        )
+        assert max(seats.values()) <= 5
+        # no request was put on a run arriving after its deadline
+        late = session.exec(
+            select(OrderRequest.id)
+            .join(Order, Order.id == OrderRequest.order_id)
+            .join(FoodRun, FoodRun.id == Order.run_id)
+            .where(FoodRun.eta_at > OrderRequest.latest_eta)
+        ).all()
+        assert late == []
@@ -0,0 +1,74 @@
+from conftest import (
+    QueryCounter,
+    auth_headers,
+    completed_run,
+    create_run,
+    register_and_login,
+)
+
+
+def test_personalized_ranking_uses_order_history(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.affinity import affinity_cache, rebuild_affinities
+
+    runner_token, _ = register_and_login(app_client, "aff_runner@ncsu.edu")
+    user_token, user = register_and_login(app_client, "aff_user@ncsu.edu")
+    for restaurant, drop in [
+        ("AffX", "AffHill"),
+        ("AffX", "AffHill"),
+        ("AffY", "AffTalley"),
+    ]:
+        completed_run(
+            app_client, runner_token, [user_token], restaurant=restaurant, drop=drop
+        )
+
+    weak = create_run(app_client, runner_token, "AffY", "AffElse")
+    strong = create_run(app_client, runner_token, "AffX", "AffHill")
+    medium = create_run(app_client, runner_token, "AffX", "AffElse")
+
+    with Session(db.engine) as session:
+        assert rebuild_affinities(session) > 0
+        vector = affinity_cache.get(session, user["id"])
+    assert abs(vector["restaurant"]["AffX"] - 2 / 3) < 1e-9
+    assert abs(sum(vector["drop_point"].values()) - 1) < 1e-9
+
+    params = {"restaurant": ["AffX", "AffY"], "sort": "personalized"}
+    with QueryCounter() as qc:
+        r = app_client.get(
+            "/runs/available", params=params, headers=auth_headers(user_token)
+        )
+    assert r.status_code == 200
+    assert [run["id"] for run in r.json()] == [strong["id"], medium["id"], weak["id"]]
+    assert qc.count == 1  # vector came from the cache
+
+    # paging applies after ranking
+    page = app_client.get(
+        "/runs/available",
+        params={**params, "limit": 1, "offset": 1},
+        headers=auth_headers(user_token),
+    ).json()
+    assert [run["id"] for run in page] == [medium["id"]]
+
+
+def test_personalized_ranking_without_history_keeps_default_order(app_client):
+    runner_token, _ = register_and_login(app_client, "aff_runner2@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "aff_newbie@ncsu.edu")
+    first = create_run(app_client, runner_token, "AffZ", "AffNowhere")
+    second = create_run(app_client, runner_token, "AffZ", "AffNowhere")
+
+    r = app_client.get(
+        "/runs/available",
+        params={"restaurant": "AffZ", "sort": "personalized"},
+        headers=auth_headers(user_token),
+    )
+    assert [run["id"] for run in r.json()] == [first["id"], second["id"]]
+
+
+def test_affinity_refresher_rebuilds_as_leader(app_client):
+    from app.affinity import AffinityRefresher
+
+    leader = AffinityRefresher(interval=60)
+    follower = AffinityRefresher(interval=60)
+    assert leader.tick() is not None
+    assert follower.tick() is None
@@ -0,0 +1,60 @@
+from conftest import auth_headers, completed_run, register_and_login
+
+
+def test_award_and_redeem_written_to_ledger(app_client):
+    runner_token, _ = register_and_login(app_client, "pl_runner@ncsu.edu")
+    joiner_token, _ = register_and_login(app_client, "pl_joiner@ncsu.edu")
+    run = completed_run(app_client, runner_token, [joiner_token], amount=120.0)
+
+    r = app_client.post("/points/redeem", headers=auth_headers(runner_token))
+    assert r.status_code == 200
+    assert r.json()["remaining_points"] == 2
+
+    hist = app_client.get("/points/history", headers=auth_headers(runner_token)).json()
+    assert [(t["reason"], t["delta"]) for t in hist["items"]] == [
+        ("redeemed", -10),
+        ("run_completed", 12),
+    ]
+    assert hist["items"][1]["run_id"] == run["id"]
+    assert hist["next_before_id"] is None
+
+
+def test_points_history_pagination(app_client):
+    runner_token, _ = register_and_login(app_client, "pl_pager@ncsu.edu")
+    joiner_token, _ = register_and_login(app_client, "pl_pager_j@ncsu.edu")
+    for _ in range(3):
+        completed_run(app_client, runner_token, [joiner_token], amount=10.0)
+
+    page1 = app_client.get(
+        "/points/history", params={"limit": 2}, headers=auth_headers(runner_token)
+    ).json()
+    assert len(page1["items"]) == 2 and page1["next_before_id"]
+    page2 = app_client.get(
+        "/points/history",
+        params={"limit": 2, "before_id": page1["next_before_id"]},
+        headers=auth_headers(runner_token),
+    ).json()
+    assert len(page2["items"]) == 1 and page2["next_before_id"] is None
+    ids = [t["id"] for t in page1["items"] + page2["items"]]
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_consistency_checker_detects_and_repairs_drift(app_client):
+    from sqlmodel import Session, update
+    from app import db
+    from app.models import User
+    from app.points import find_balance_mismatches, repair_balances
+
+    runner_token, runner = register_and_login(app_client, "pl_drift@ncsu.edu")
+    joiner_token, _ = register_and_login(app_client, "pl_drift_j@ncsu.edu")
+    completed_run(app_client, runner_token, [joiner_token], amount=50.0)
+
+    with Session(db.engine) as session:
+        session.exec(update(User).where(User.id == runner["id"]).values(points=99))
+        session.commit()
+        assert find_balance_mismatches(session)[runner["id"]] == (99, 5)
+        assert repair_balances(session) >= 1
+        assert runner["id"] not in find_balance_mismatches(session)
+
+    pts = app_client.get("/points", headers=auth_headers(runner_token)).json()
+    assert pts["points"] == 5
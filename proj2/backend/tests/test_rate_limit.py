@@ -0,0 +1,88 @@
+import pytest
+
+from conftest import register_and_login
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    from app.ratelimit import MemoryStore, limiter
+
+    monkeypatch.setattr(limiter, "enabled", True)
+    monkeypatch.setattr(limiter, "store", MemoryStore())
+    return limiter
+
+
+def test_login_is_limited_per_ip_with_retry_after(app_client, limited):
+    creds = {"email": "rl_login@ncsu.edu", "password": "wrong-password"}
+    codes = [app_client.post("/auth/login", json=creds).status_code for _ in range(12)]
+    assert 429 not in codes[:10]
+    assert codes[10:] == [429, 429]
+    r = app_client.post("/auth/login", json=creds)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
+    # other routes have their own buckets
+    assert app_client.get("/").status_code == 200
+
+
+def test_list_endpoints_are_limited_per_user(app_client, limited, monkeypatch):
+    from app.ratelimit import Policy
+
+    monkeypatch.setattr(
+        limited, "policies", [Policy("lists", "GET", "/runs*", rate=0.01, burst=3)]
+    )
+    limited.enabled = False
+    first, _ = register_and_login(app_client, "rl_user1@ncsu.edu")
+    second, _ = register_and_login(app_client, "rl_user2@ncsu.edu")
+    limited.enabled = True
+
+    def get(token):
+        headers = {"Authorization": f"Bearer {token}"}
+        return app_client.get("/runs/available", headers=headers).status_code
+
+    assert [get(first) for _ in range(4)] == [200, 200, 200, 429]
+    # same IP, different user: separate bucket
+    assert get(second) == 200
+
+
+def test_memory_store_refills_and_stays_bounded():
+    from app.ratelimit import MemoryStore
+
+    store = MemoryStore(max_keys=100)
+    assert store.take("a", rate=1, burst=2, now=0) == 0
+    assert store.take("a", rate=1, burst=2, now=0) == 0
+    assert store.take("a", rate=1, burst=2, now=0) == pytest.approx(1)
+    assert store.take("a", rate=1, burst=2, now=0.5) == pytest.approx(0.5)
+    assert store.take("a", rate=1, burst=2, now=2) == 0
+
+    for i in range(1000):
+        store.take(f"k{i}", rate=1, burst=1, now=3)
+    assert len(store) == 100
+    # "a" was evicted and starts with a full bucket again
+    assert store.take("a", rate=1, burst=2, now=3) == 0
+
+
+def test_redis_store_is_awaited_by_the_middleware(app_client, monkeypatch):
+    from app.ratelimit import MemoryStore, Policy, RedisStore, limiter
+
+    memory = MemoryStore()
+    calls = []
+
+    class Script:
+        # same bucket arithmetic; async like redis.asyncio's registered scripts
+        async def __call__(self, keys, args):
+            calls.append(keys[0])
+            return str(memory.take(keys[0], *args))
+
+    class Client:
+        def register_script(self, source):
+            return Script()
+
+    monkeypatch.setattr(limiter, "enabled", True)
+    monkeypatch.setattr(limiter, "store", RedisStore(Client()))
+    monkeypatch.setattr(
+        limiter, "policies", [Policy("root", "GET", "/", rate=0.01, burst=2)]
+    )
+
+    codes = [app_client.get("/").status_code for _ in range(3)]
+    assert codes == [200, 200, 429]
+    assert calls[0].startswith("ratelimit:root:ip:")
@@ -0,0 +1,85 @@
+from conftest import auth_headers, create_run, register_and_login
+
+
+def test_reads_use_replica_except_right_after_own_write(
+    app_client, replica, monkeypatch
+):
+    from app import db
+
+    runner_token, _ = register_and_login(app_client, "rr_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "rr_user@ncsu.edu")
+    replica()
+    run = create_run(app_client, runner_token, "Replica Deli", "Hill", "12:00")
+
+    # the runner just wrote, so their reads stay on the primary
+    mine = app_client.get("/runs/mine", headers=auth_headers(runner_token)).json()
+    assert run["id"] in [r["id"] for r in mine]
+    # others read the replica, which has not caught up yet
+    listed = app_client.get("/runs/available", headers=auth_headers(user_token)).json()
+    assert run["id"] not in [r["id"] for r in listed]
+
+    replica()
+    listed = app_client.get("/runs/available", headers=auth_headers(user_token)).json()
+    assert run["id"] in [r["id"] for r in listed]
+
+    # once the lag window passes, the writer reads the replica too
+    monkeypatch.setattr(db, "REPLICA_MAX_LAG_SECONDS", 0)
+    create_run(app_client, runner_token, "Replica Deli", "Hill", "13:00")
+    mine = app_client.get("/runs/mine", headers=auth_headers(runner_token)).json()
+    assert len(mine) == 1
+
+
+def test_join_response_comes_from_primary(app_client, replica):
+    runner_token, _ = register_and_login(app_client, "rr_join_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "rr_join_user@ncsu.edu")
+    run = create_run(app_client, runner_token, "Replica Deli", "Hill", "12:00")
+    replica()
+    r = app_client.post(
+        f"/runs/{run['id']}/orders",
+        headers=auth_headers(user_token),
+        json={"items": "1x Sub", "amount": 8.0},
+    )
+    assert r.status_code == 200
+    joined = app_client.get("/runs/joined", headers=auth_headers(user_token)).json()
+    assert joined[0]["my_order"]["pin"] == r.json()["pin"]
+
+
+def test_search_on_replica_uses_its_fts_index(app_client, replica):
+    from app import db
+    from app.search import search_backend
+
+    runner_token, _ = register_and_login(app_client, "rr_search_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "rr_search_user@ncsu.edu")
+    for restaurant in ("Zygote Noodle Bar", "Zygote Zygote Noodles"):
+        create_run(app_client, runner_token, restaurant, "Hill", "12:00")
+    replica()
+    assert db.read_engine is not db.engine
+    assert search_backend(db.read_engine) == "fts5"
+    found = app_client.get(
+        "/runs/search", params={"q": "zygote"}, headers=auth_headers(user_token)
+    ).json()
+    # bm25 ranks the run naming it twice first; LIKE would return id order
+    assert [r["restaurant"] for r in found] == [
+        "Zygote Zygote Noodles",
+        "Zygote Noodle Bar",
+    ]
+
+
+def test_available_listings_are_shared_per_database(app_client, replica, monkeypatch):
+    from app import main
+
+    keys = []
+    real_do = main.available_flight.do
+
+    def recording_do(key, fn):
+        keys.append(key)
+        return real_do(key, fn)
+
+    monkeypatch.setattr(main.available_flight, "do", recording_do)
+    writer, _ = register_and_login(app_client, "rr_flight_writer@ncsu.edu")
+    reader, _ = register_and_login(app_client, "rr_flight_reader@ncsu.edu")
+    create_run(app_client, writer, "Flight Deli", "Hill", "12:00")
+    app_client.get("/runs/available", headers=auth_headers(writer))  # primary
+    app_client.get("/runs/available", headers=auth_headers(reader))  # replica
+    assert len(keys) == 2 and keys[0] != keys[1]
+    assert keys[0][2:] == keys[1][2:]
@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+
+from conftest import auth_headers, create_run, join_run, register_and_login
+
+
+def analytics(client, token, restaurant, granularity="day"):
+    r = client.get(
+        "/analytics",
+        params={"restaurant": restaurant, "granularity": granularity},
+        headers=auth_headers(token),
+    )
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_rollups_follow_every_mutation_and_match_a_rebuild(app_client):
+    from sqlmodel import Session
+
+    from app import db
+    from app.analytics import query_rollups, rebuild_rollups
+
+    runner, _ = register_and_login(app_client, "an_runner@ncsu.edu")
+    users = [register_and_login(app_client, f"an_u{i}@ncsu.edu")[0] for i in range(4)]
+    name = "Rollup Pizza"
+
+    done = create_run(app_client, runner, name, capacity=4)
+    orders = [
+        join_run(app_client, t, done["id"], amount=10.0 + i)
+        for i, t in enumerate(users)
+    ]
+    # joiner cancels, runner removes one, a batch removes another
+    app_client.delete(f"/runs/{done['id']}/orders/me", headers=auth_headers(users[0]))
+    app_client.delete(
+        f"/runs/{done['id']}/orders/{orders[1]['id']}", headers=auth_headers(runner)
+    )
+    app_client.post(
+        f"/runs/{done['id']}/orders/batch",
+        headers=auth_headers(runner),
+        json={"operations": [{"order_id": orders[2]["id"], "op": "remove"}]},
+    )
+    app_client.put(f"/runs/{done['id']}/complete", headers=auth_headers(runner))
+
+    dropped = create_run(app_client, runner, name, capacity=2)
+    join_run(app_client, users[0], dropped["id"], amount=7.5)
+    app_client.put(f"/runs/{dropped['id']}/cancel", headers=auth_headers(runner))
+
+    [day] = analytics(app_client, runner, name)
+    today = datetime.now(tz=timezone.utc).date().isoformat()
+    assert day["bucket"].startswith(today)
+    assert day["runs"] == 2
+    assert day["completed_runs"] == 1
+    assert day["seats"] == 6
+    # only the last order of the completed run survived
+    assert day["orders"] == 1
+    assert day["revenue"] == 13.0
+    assert abs(day["fill_rate"] - 1 / 6) < 1e-9
+
+    hours = analytics(app_client, runner, name, granularity="hour")
+    assert sum(h["runs"] for h in hours) == 2
+
+    with Session(db.engine) as session:
+        incremental = query_rollups(session, "hour", [name])
+        rebuild_rollups(session)
+        session.commit()
+        assert query_rollups(session, "hour", [name]) == incremental
+
+
+def test_rebuild_groups_rows_into_hourly_buckets():
+    from app import analytics
+
+    runs = [
+        (1, "Cava", datetime(2026, 3, 1, 11, 5), 5, "completed"),
+        (2, "Cava", datetime(2026, 3, 1, 11, 55), 3, "cancelled"),
+        (3, "Cava", datetime(2026, 3, 1, 12, 0), 4, "active"),
+        (4, "Chipotle", datetime(2026, 3, 1, 11, 30, tzinfo=timezone.utc), 2, "active"),
+    ]
+    orders = [(1, 10.0), (1, 2.5), (3, 4.0), (4, 8.0), (99, 1.0)]
+
+    buckets = analytics._aggregate(runs, orders)
+
+    eleven = datetime(2026, 3, 1, 11, tzinfo=timezone.utc)
+    assert buckets[("Cava", eleven)] == {
+        "runs": 2,
+        "completed_runs": 1,
+        "seats": 8,
+        "orders": 2,
+        "revenue": 12.5,
+    }
+    assert len(buckets) == 3
@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+from conftest import auth_headers, create_run, join_run, register_and_login
+
+
+def test_history_reads_across_live_and_archived_runs(app_client):
+    from sqlmodel import Session, select
+    from app import db
+    from app.archive import archive_finished_runs
+    from app.models import FoodRun, FoodRunArchive, OrderArchive
+
+    runner_token, _ = register_and_login(app_client, "arc_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "arc_user@ncsu.edu")
+    old_run = create_run(app_client, runner_token, "Archived Pizza")
+    order = join_run(app_client, user_token, old_run["id"], "2x Slice", 8.0)
+    app_client.put(
+        f"/runs/{old_run['id']}/complete", headers=auth_headers(runner_token)
+    )
+    active_run = create_run(app_client, runner_token, "Still Open")
+
+    with Session(db.engine) as session:
+        assert archive_finished_runs(session, older_than=timedelta(0)) >= 1
+        assert session.get(FoodRun, old_run["id"]) is None
+        assert session.get(FoodRun, active_run["id"]) is not None
+        assert session.get(FoodRunArchive, old_run["id"]).status == "completed"
+        archived_orders = session.exec(
+            select(OrderArchive).where(OrderArchive.run_id == old_run["id"])
+        ).all()
+        assert [o.id for o in archived_orders] == [order["id"]]
+
+    # a run finished after archiving lives in the hot table
+    new_run = create_run(app_client, runner_token, "Recent Tacos")
+    app_client.put(f"/runs/{new_run['id']}/cancel", headers=auth_headers(runner_token))
+
+    mine = app_client.get(
+        "/runs/mine/history", headers=auth_headers(runner_token)
+    ).json()
+    assert [r["id"] for r in mine] == [old_run["id"], new_run["id"]]
+    assert mine[0]["orders"][0]["user_email"] == "arc_user@ncsu.edu"
+
+    joined = app_client.get(
+        "/runs/joined/history", headers=auth_headers(user_token)
+    ).json()
+    assert [r["id"] for r in joined] == [old_run["id"]]
+    assert joined[0]["my_order"]["pin"] == order["pin"]
+    assert joined[0]["runner_username"] == "arc_runner@ncsu.edu"
+
+    # the points ledger keeps pointing at the archived run
+    hist = app_client.get("/points/history", headers=auth_headers(runner_token)).json()
+    assert hist["items"][0]["run_id"] == old_run["id"]
+
+
+def test_archive_respects_age_and_batch_limits(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.archive import archive_finished_runs
+
+    runner_token, _ = register_and_login(app_client, "arc_batch@ncsu.edu")
+    for i in range(3):
+        run = create_run(app_client, runner_token, f"Batch {i}")
+        app_client.put(f"/runs/{run['id']}/cancel", headers=auth_headers(runner_token))
+
+    with Session(db.engine) as session:
+        assert archive_finished_runs(session, older_than=timedelta(days=1)) == 0
+        moved = archive_finished_runs(
+            session, older_than=timedelta(0), batch_size=1, max_batches=2
+        )
+        assert moved == 2
+        assert archive_finished_runs(session, older_than=timedelta(0)) >= 1
+
+    mine = app_client.get(
+        "/runs/mine/history", headers=auth_headers(runner_token)
+    ).json()
+    assert len(mine) == 3
+
+
+def test_archive_keeps_requests_matched_to_its_orders(tmp_path):
+    from datetime import datetime, timezone
+
+    from sqlalchemy import event
+    from sqlmodel import Session, create_engine, select
+    from app.archive import archive_finished_runs
+    from app.migrations import migrate
+    from app.models import FoodRun, Order, OrderArchive, OrderRequest, User
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'fk.db'}")
+
+    @event.listens_for(engine, "connect")
+    def _enforce_foreign_keys(dbapi_conn, _):
+        dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+    migrate(engine)
+    with Session(engine) as session:
+        user = User(email="arc_match@ncsu.edu", password_hash="x")
+        session.add(user)
+        session.flush()
+        run = FoodRun(
+            runner_id=user.id,
+            restaurant="Matched Cava",
+            drop_point="Library",
+            eta="12:00",
+            status="completed",
+        )
+        session.add(run)
+        session.flush()
+        order = Order(run_id=run.id, user_id=user.id, items="1x Bowl", amount=11.0)
+        session.add(order)
+        session.flush()
+        session.add(
+            OrderRequest(
+                user_id=user.id,
+                restaurant="Matched Cava",
+                drop_point="Library",
+                latest_eta=datetime.now(tz=timezone.utc),
+                items="1x Bowl",
+                amount=11.0,
+                status="matched",
+                order_id=order.id,
+            )
+        )
+        session.commit()
+        order_id = order.id
+
+        assert archive_finished_runs(session, older_than=timedelta(0)) == 1
+        request = session.exec(select(OrderRequest)).one()
+        assert request.order_id == order_id
+        assert session.get(OrderArchive, order_id) is not None
+
+
+def test_archiving_the_newest_run_does_not_free_its_id(tmp_path):
+    from sqlmodel import Session, create_engine
+    from app.archive import archive_finished_runs
+    from app.migrations import migrate
+    from app.models import FoodRun, Order, User
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'ids.db'}")
+    migrate(engine)
+
+    def finished_run(session, user):
+        run = FoodRun(
+            runner_id=user.id,
+            restaurant="Newest Cava",
+            drop_point="Library",
+            eta="12:00",
+            status="completed",
+        )
+        session.add(run)
+        session.flush()
+        session.add(Order(run_id=run.id, user_id=user.id, items="1x", amount=1.0))
+        session.commit()
+        return run.id
+
+    with Session(engine) as session:
+        user = User(email="arc_ids@ncsu.edu", password_hash="x")
+        session.add(user)
+        session.commit()
+        first = finished_run(session, user)
+        assert archive_finished_runs(session, older_than=timedelta(0)) == 1
+        second = finished_run(session, user)
+        assert second > first
+        assert archive_finished_runs(session, older_than=timedelta(0)) == 1
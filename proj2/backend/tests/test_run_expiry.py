@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta, timezone
+
+from conftest import auth_headers, create_run, join_run, register_and_login
+
+
+def test_overdue_runs_expire_in_batches_and_cancel_orders(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.models import FoodRun, Order
+    from app.scheduler import expire_overdue_runs
+
+    runner_token, _ = register_and_login(app_client, "exp_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "exp_user@ncsu.edu")
+    long_ago = (datetime.now(tz=timezone.utc) - timedelta(hours=5)).isoformat()
+    upcoming = (datetime.now(tz=timezone.utc) + timedelta(hours=1)).isoformat()
+    stale = [create_run(app_client, runner_token, eta=long_ago) for _ in range(3)]
+    fresh = create_run(app_client, runner_token, eta=upcoming)
+    order = join_run(app_client, user_token, stale[0]["id"], "1x Burrito", 9.0)
+
+    with Session(db.engine) as session:
+        assert expire_overdue_runs(session, batch_size=2) >= 3
+        assert expire_overdue_runs(session) == 0
+        for run in stale:
+            assert session.get(FoodRun, run["id"]).status == "expired"
+        assert session.get(FoodRun, fresh["id"]).status == "active"
+        assert session.get(Order, order["id"]).status == "cancelled"
+
+    hist = app_client.get(
+        "/runs/mine/history", headers=auth_headers(runner_token)
+    ).json()
+    assert {r["id"] for r in stale} <= {r["id"] for r in hist}
+
+
+def test_lease_held_by_one_owner_until_it_expires(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.scheduler import acquire_lease
+
+    ttl = timedelta(minutes=5)
+    with Session(db.engine) as session:
+        assert acquire_lease(session, "test_lease", "worker-a", ttl)
+        assert not acquire_lease(session, "test_lease", "worker-b", ttl)
+        assert acquire_lease(session, "test_lease", "worker-a", ttl)
+        # worker-a stops renewing; once expired, worker-b can take over
+        assert acquire_lease(session, "test_lease", "worker-a", -ttl)
+        assert acquire_lease(session, "test_lease", "worker-b", ttl)
+        assert not acquire_lease(session, "test_lease", "worker-a", ttl)
+
+
+def test_scheduler_tick_only_sweeps_as_leader(app_client):
+    from sqlmodel import Session
+    from app import db
+    from app.models import FoodRun
+    from app.scheduler import RunExpiryScheduler
+
+    runner_token, _ = register_and_login(app_client, "exp_tick@ncsu.edu")
+    leader = RunExpiryScheduler(lease_name="test_tick")
+    follower = RunExpiryScheduler(lease_name="test_tick")
+    assert leader.tick() == 0
+
+    long_ago = (datetime.now(tz=timezone.utc) - timedelta(hours=5)).isoformat()
+    run = create_run(app_client, runner_token, eta=long_ago)
+    assert follower.tick() == 0
+    with Session(db.engine) as session:
+        assert session.get(FoodRun, run["id"]).status == "active"
+
+    assert leader.tick() == 1
+    with Session(db.engine) as session:
+        assert session.get(FoodRun, run["id"]).status == "expired"
+
+
+def test_scheduler_loop_sweeps_in_background(app_client):
+    import asyncio
+
+    from sqlmodel import Session
+    from app import db
+    from app.eta import parse_eta
+    from app.models import FoodRun
+    from app.scheduler import RunExpiryScheduler
+
+    runner_token, _ = register_and_login(app_client, "exp_loop@ncsu.edu")
+    long_ago = (datetime.now(tz=timezone.utc) - timedelta(hours=5)).isoformat()
+    run = create_run(app_client, runner_token, eta=long_ago)
+
+    async def scenario():
+        scheduler = RunExpiryScheduler(poll_seconds=30, lease_name="test_loop")
+        scheduler.start()
+        # pushing a deadline from another thread wakes the sleeping loop
+        await asyncio.to_thread(scheduler.schedule, run["id"], parse_eta(long_ago))
+        await asyncio.sleep(0.3)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+    with Session(db.engine) as session:
+        assert session.get(FoodRun, run["id"]).status == "expired"
+
+
+def test_failed_tick_is_logged_and_the_loop_keeps_running(app_client, caplog):
+    import asyncio
+
+    import pytest
+    from app.scheduler import LeasedJob
+
+    with pytest.raises(TypeError):
+        LeasedJob(1, "no_work")
+
+    class Flaky(LeasedJob):
+        calls = 0
+
+        def work(self, session):
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError("boom")
+            return 0
+
+    job = Flaky(0.05, "test_flaky")
+
+    async def scenario():
+        job.start()
+        for _ in range(100):
+            if job.calls >= 2:
+                break
+            await asyncio.sleep(0.02)
+        await job.stop()
+
+    with caplog.at_level("ERROR", logger="app.scheduler"):
+        asyncio.run(scenario())
+    assert job.calls >= 2
+    assert "background job test_flaky failed" in caplog.text
+    assert "RuntimeError: boom" in caplog.text
+
+
+def test_runs_without_a_parsed_eta_expire_after_the_max_lifetime(app_client):
+    from sqlmodel import Session, update
+    from app import db
+    from app.models import FoodRun
+    from app.scheduler import RUN_MAX_LIFETIME, expire_overdue_runs
+
+    runner_token, _ = register_and_login(app_client, "exp_noeta@ncsu.edu")
+    old = create_run(app_client, runner_token, eta="after class")
+    new = create_run(app_client, runner_token, eta="after class")
+    born = datetime.now(tz=timezone.utc) - RUN_MAX_LIFETIME - timedelta(minutes=5)
+
+    with Session(db.engine) as session:
+        session.exec(
+            update(FoodRun).where(FoodRun.id == old["id"]).values(created_at=born)
+        )
+        session.commit()
+        assert session.get(FoodRun, old["id"]).eta_at is None
+        assert expire_overdue_runs(session) >= 1
+        assert session.get(FoodRun, old["id"]).status == "expired"
+        assert session.get(FoodRun, new["id"]).status == "active"
@@ -0,0 +1,128 @@
+from conftest import (
+    QueryCounter,
+    auth_headers,
+    create_run,
+    join_run,
+    register_and_login,
+)
+
+
+def test_mine_without_fields_is_unchanged(app_client):
+    runner, _ = register_and_login(app_client, "fs_full@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "fs_full_j@ncsu.edu")
+    run = create_run(app_client, runner, capacity=4)
+    join_run(app_client, joiner, run["id"], "Bowl", 11.0)
+    mine = app_client.get("/runs/mine", headers=auth_headers(runner)).json()
+    assert mine[0]["seats_remaining"] == 3
+    assert mine[0]["runner_username"] == "fs_full@ncsu.edu"
+    assert [o["user_email"] for o in mine[0]["orders"]] == ["fs_full_j@ncsu.edu"]
+
+
+def test_sparse_fields_skip_orders_and_their_queries(app_client):
+    runner, _ = register_and_login(app_client, "fs_sparse@ncsu.edu")
+    joiners = [
+        register_and_login(app_client, f"fs_sparse_j{i}@ncsu.edu")[0] for i in range(3)
+    ]
+    run = create_run(app_client, runner, capacity=4)
+    for token in joiners:
+        join_run(app_client, token, run["id"], "Bowl", 11.0)
+
+    with QueryCounter() as full:
+        app_client.get("/runs/mine", headers=auth_headers(runner))
+    with QueryCounter() as sparse:
+        r = app_client.get(
+            "/runs/mine",
+            params={"fields": "status,seats_remaining"},
+            headers=auth_headers(runner),
+        )
+    assert r.json() == [{"id": run["id"], "status": "active", "seats_remaining": 1}]
+    # no order rows, no runner lookup
+    assert sparse.count < full.count
+
+    r = app_client.get(
+        f"/runs/id/{run['id']}",
+        params={"fields": "restaurant", "include": "orders"},
+        headers=auth_headers(runner),
+    )
+    body = r.json()
+    assert set(body) == {"id", "restaurant", "orders"}
+    assert len(body["orders"]) == 3
+
+
+def test_history_and_available_fieldsets(app_client):
+    runner, _ = register_and_login(app_client, "fs_hist@ncsu.edu")
+    viewer, _ = register_and_login(app_client, "fs_hist_v@ncsu.edu")
+    done = create_run(app_client, runner, "Fieldset Diner", capacity=4)
+    app_client.put(f"/runs/{done['id']}/complete", headers=auth_headers(runner))
+    live = create_run(app_client, runner, "Fieldset Diner", capacity=4)
+
+    history = app_client.get(
+        "/runs/mine/history",
+        params={"fields": "restaurant,status"},
+        headers=auth_headers(runner),
+    ).json()
+    assert {
+        "id": done["id"],
+        "restaurant": "Fieldset Diner",
+        "status": "completed",
+    } in (history)
+
+    available = app_client.get(
+        "/runs/available",
+        params={"restaurant": "Fieldset Diner", "fields": "eta_at"},
+        headers=auth_headers(viewer),
+    ).json()
+    assert available == [{"id": live["id"], "eta_at": live["eta_at"]}]
+
+
+def test_unknown_field_is_rejected(app_client):
+    runner, _ = register_and_login(app_client, "fs_bad@ncsu.edu")
+    r = app_client.get(
+        "/runs/mine", params={"fields": "id,password"}, headers=auth_headers(runner)
+    )
+    assert r.status_code == 400
+    assert "password" in r.json()["detail"]
+
+
+def test_joined_and_search_fieldsets(app_client):
+    runner, _ = register_and_login(app_client, "fs_join@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "fs_join_j@ncsu.edu")
+    run = create_run(app_client, runner, "Fieldset Noodles", capacity=4)
+    order = join_run(app_client, joiner, run["id"], "Bowl", 11.0)
+
+    joined = app_client.get(
+        "/runs/joined",
+        params={"fields": "restaurant,my_order"},
+        headers=auth_headers(joiner),
+    ).json()
+    assert joined == [
+        {
+            "id": run["id"],
+            "restaurant": "Fieldset Noodles",
+            "my_order": {
+                "id": order["id"],
+                "run_id": run["id"],
+                "items": "Bowl",
+                "amount": 11.0,
+                "status": "pending",
+                "pin": order["pin"],
+            },
+        }
+    ]
+
+    found = app_client.get(
+        "/runs/search",
+        params={"q": "fieldset noodles", "fields": "seats_remaining"},
+        headers=auth_headers(joiner),
+    ).json()
+    assert found == [{"id": run["id"], "seats_remaining": 3}]
+
+
+def test_sparse_listing_query_skips_the_runner_join_and_seat_count():
+    from app.fieldsets import Fieldset
+    from app.main import _listing_query
+
+    full = str(_listing_query())
+    sparse = str(_listing_query(Fieldset(frozenset({"eta_at"}))))
+    assert "JOIN" in full and "count" in full
+    assert "JOIN" not in sparse and "count" not in sparse
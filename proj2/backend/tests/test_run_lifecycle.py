@@ -0,0 +1,80 @@
+from conftest import QueryCounter, auth_headers, create_run, register_and_login
+
+
+def seed_orders(run_id, user_id, n, amount=10.0, status="pending"):
+    # Insert orders directly; creating hundreds of users through the API is slow
+    from sqlmodel import Session
+    from app import db
+    from app.models import Order
+
+    with Session(db.engine) as session:
+        for _ in range(n):
+            session.add(
+                Order(
+                    run_id=run_id,
+                    user_id=user_id,
+                    items="1x Sandwich",
+                    amount=amount,
+                    status=status,
+                    pin="1234",
+                )
+            )
+        session.commit()
+
+
+def order_statuses(run_id):
+    from sqlmodel import Session, select
+    from app import db
+    from app.models import Order
+
+    with Session(db.engine) as session:
+        return session.exec(select(Order.status).where(Order.run_id == run_id)).all()
+
+
+def test_cancel_cascades_to_open_orders(app_client):
+    runner_token, _ = register_and_login(app_client, "lc_runner@ncsu.edu")
+    _, user = register_and_login(app_client, "lc_user@ncsu.edu")
+    run = create_run(app_client, runner_token, capacity=500)
+    seed_orders(run["id"], user["id"], 3)
+    seed_orders(run["id"], user["id"], 1, status="delivered")
+
+    r = app_client.put(
+        f"/runs/{run['id']}/cancel",
+        headers=auth_headers(runner_token),
+    )
+    assert r.status_code == 200
+    assert sorted(order_statuses(run["id"])) == ["cancelled"] * 3 + ["delivered"]
+
+
+def test_complete_ignores_cancelled_orders_and_only_pays_once(app_client):
+    runner_token, runner = register_and_login(app_client, "lc_runner2@ncsu.edu")
+    _, user = register_and_login(app_client, "lc_user2@ncsu.edu")
+    headers = auth_headers(runner_token)
+    run = create_run(app_client, runner_token, capacity=500)
+    seed_orders(run["id"], user["id"], 2, amount=25.0)
+    seed_orders(run["id"], user["id"], 3, amount=100.0, status="cancelled")
+
+    r = app_client.put(f"/runs/{run['id']}/complete", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["points_earned"] == 5
+    again = app_client.put(f"/runs/{run['id']}/complete", headers=headers)
+    assert again.status_code == 400
+    assert app_client.get("/points", headers=headers).json()["points"] == 5
+
+
+def test_cancel_and_complete_query_count_constant(app_client):
+    runner_token, _ = register_and_login(app_client, "lc_runner3@ncsu.edu")
+    _, user = register_and_login(app_client, "lc_user3@ncsu.edu")
+    headers = auth_headers(runner_token)
+
+    counts = {}
+    for action in ("cancel", "complete"):
+        for n in (2, 300):
+            run = create_run(app_client, runner_token, capacity=500)
+            seed_orders(run["id"], user["id"], n)
+            with QueryCounter() as qc:
+                r = app_client.put(f"/runs/{run['id']}/{action}", headers=headers)
+            assert r.status_code == 200
+            counts[(action, n)] = qc.count
+    assert counts[("cancel", 2)] == counts[("cancel", 300)]
+    assert counts[("complete", 2)] == counts[("complete", 300)]
@@ -0,0 +1,97 @@
+import random
+import time
+
+import pytest
+
+from conftest import auth_headers, create_run, join_run, register_and_login
+
+
+def search(client, token, q, **params):
+    r = client.get(
+        "/runs/search", params={"q": q, **params}, headers=auth_headers(token)
+    )
+    assert r.status_code == 200, r.text
+    return [run["id"] for run in r.json()]
+
+
+def test_search_prefix_matching_and_ranking(app_client):
+    runner_token, _ = register_and_login(app_client, "fts_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "fts_user@ncsu.edu")
+    in_name = create_run(app_client, runner_token, "Zxqhunt Cafe", "Talley")
+    in_drop = create_run(app_client, runner_token, "Chick-fil-A", "Zxqhunt Library")
+    other = create_run(app_client, runner_token, "Chipotle", "EBII")
+
+    # restaurant matches outrank drop point matches
+    assert search(app_client, user_token, "zxqhu") == [in_name["id"], in_drop["id"]]
+    assert search(app_client, user_token, "zxqhunt libr") == [in_drop["id"]]
+    assert other["id"] in search(app_client, user_token, "chipo")
+    assert search(app_client, user_token, "!!!") == []
+    # runners don't find their own runs
+    assert search(app_client, runner_token, "zxqhunt") == []
+
+
+def test_search_tracks_updates_and_visibility(app_client):
+    from sqlmodel import Session, update
+    from app import db
+    from app.models import FoodRun
+
+    runner_token, _ = register_and_login(app_client, "fts_runner2@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "fts_user2@ncsu.edu")
+    run = create_run(app_client, runner_token, "Qwvbistro", "Hill", capacity=1)
+    assert search(app_client, user_token, "qwvbis") == [run["id"]]
+
+    with Session(db.engine) as session:
+        session.exec(
+            update(FoodRun).where(FoodRun.id == run["id"]).values(restaurant="Renamed")
+        )
+        session.commit()
+    assert search(app_client, user_token, "qwvbis") == []
+    assert run["id"] in search(app_client, user_token, "renamed")
+
+    # full runs drop out like in /runs/available
+    taker_token, _ = register_and_login(app_client, "fts_taker@ncsu.edu")
+    join_run(app_client, taker_token, run["id"])
+    assert run["id"] not in search(app_client, user_token, "renamed")
+
+
+@pytest.mark.bench
+def test_search_latency_at_100k_runs(tmp_path):
+    from sqlmodel import Session, SQLModel, create_engine, select
+    from app.models import FoodRun
+    from app.search import apply_run_search, ensure_run_search_index
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        assert ensure_run_search_index(conn) == "fts5"
+
+    rng = random.Random(510)
+    names = ["Cafe", "Grill", "Pizza", "Sushi", "Tacos", "Deli", "Wok", "Bagels"]
+    places = ["Hunt Library", "Talley", "EBII", "Wolf Village", "Carmichael"]
+    rows = [
+        {
+            "runner_id": 1,
+            "restaurant": f"{rng.choice(names)} {i}",
+            "drop_point": rng.choice(places),
+            "eta": "12:00",
+            "capacity": 5,
+            "status": "active" if i % 10 == 0 else "completed",
+        }
+        for i in range(100_000)
+    ]
+    with engine.begin() as conn:
+        conn.execute(FoodRun.__table__.insert(), rows)
+
+    queries = ["hunt lib", "sushi", "piz talley", "wolf", "bag carm", "deli 99"]
+    timings = []
+    with Session(engine) as session:
+        for q in queries * 5:
+            stmt = select(FoodRun.id).where(FoodRun.status == "active")
+            stmt = apply_run_search(stmt, session, q.split()).limit(20)
+            start = time.perf_counter()
+            found = session.exec(stmt).all()
+            timings.append(time.perf_counter() - start)
+            assert found
+    timings.sort()
+    median = timings[len(timings) // 2]
+    assert median < 0.25
@@ -0,0 +1,125 @@
+from conftest import (
+    QueryCounter,
+    auth_headers,
+    create_run,
+    join_run,
+    register_and_login,
+)
+
+
+def batch(client, token, run_id, operations):
+    return client.post(
+        f"/runs/{run_id}/orders/batch",
+        headers=auth_headers(token),
+        json={"operations": operations},
+    )
+
+
+def test_batch_applies_mixed_operations_with_per_item_results(app_client):
+    runner_token, _ = register_and_login(app_client, "bt_runner@ncsu.edu")
+    run = create_run(app_client, runner_token, capacity=4)
+    orders = []
+    for i in range(4):
+        token, _ = register_and_login(app_client, f"bt_user{i}@ncsu.edu")
+        orders.append(join_run(app_client, token, run["id"]))
+    a, b, c, d = orders
+
+    r = batch(
+        app_client,
+        runner_token,
+        run["id"],
+        [
+            {"order_id": a["id"], "op": "verify_pin", "pin": a["pin"]},
+            {"order_id": b["id"], "op": "verify_pin", "pin": "x"},
+            {"order_id": c["id"], "op": "remove"},
+            {"order_id": c["id"], "op": "mark_paid"},
+            {"order_id": d["id"], "op": "mark_paid"},
+            {"order_id": 999999, "op": "remove"},
+        ],
+    )
+    assert r.status_code == 200, r.text
+    results = r.json()["results"]
+    assert [x["ok"] for x in results] == [True, False, True, False, True, False]
+    assert results[0]["status"] == "delivered"
+    assert results[1]["detail"] == "Incorrect PIN"
+    assert results[3]["detail"] == "Order not found"
+    assert results[5]["detail"] == "Order not found"
+
+    detail = app_client.get(
+        f"/runs/id/{run['id']}", headers=auth_headers(runner_token)
+    ).json()
+    statuses = {o["id"]: o["status"] for o in detail["orders"]}
+    assert statuses == {a["id"]: "delivered", b["id"]: "pending", d["id"]: "paid"}
+    assert detail["seats_remaining"] == 1
+
+
+def test_batch_requires_runner(app_client):
+    runner_token, _ = register_and_login(app_client, "bt_owner@ncsu.edu")
+    other_token, _ = register_and_login(app_client, "bt_other@ncsu.edu")
+    run = create_run(app_client, runner_token, capacity=4)
+    j = join_run(app_client, other_token, run["id"])
+    r = batch(
+        app_client, other_token, run["id"], [{"order_id": j["id"], "op": "remove"}]
+    )
+    assert r.status_code == 403
+
+
+def test_batch_query_count_constant(app_client):
+    runner_token, _ = register_and_login(app_client, "bt_qc_runner@ncsu.edu")
+    run = create_run(app_client, runner_token, capacity=10)
+    orders = []
+    for i in range(8):
+        token, _ = register_and_login(app_client, f"bt_qc{i}@ncsu.edu")
+        orders.append(join_run(app_client, token, run["id"]))
+
+    def run_batch(chunk):
+        ops = [
+            {"order_id": o["id"], "op": "verify_pin", "pin": o["pin"]} for o in chunk
+        ]
+        with QueryCounter() as qc:
+            r = batch(app_client, runner_token, run["id"], ops)
+        assert all(x["ok"] for x in r.json()["results"])
+        return qc.count
+
+    assert run_batch(orders[:2]) == run_batch(orders[2:])
+
+
+def test_batch_skips_orders_changed_after_they_were_read(app_client, monkeypatch):
+    from sqlalchemy import update
+    from app import db, main
+    from app.models import Order
+
+    runner_token, _ = register_and_login(app_client, "bt_race_runner@ncsu.edu")
+    run = create_run(app_client, runner_token, capacity=4)
+    tokens = [
+        register_and_login(app_client, f"bt_race{i}@ncsu.edu")[0] for i in range(2)
+    ]
+    a, b = (join_run(app_client, token, run["id"]) for token in tokens)
+    apply_batch_op = main._apply_batch_op
+
+    def cancelled_meanwhile(op, status_now, pin):
+        # the joiner of b cancels between the batch's read and its update
+        if op.order_id == b["id"]:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    update(Order).where(Order.id == b["id"]).values(status="cancelled")
+                )
+        return apply_batch_op(op, status_now, pin)
+
+    monkeypatch.setattr(main, "_apply_batch_op", cancelled_meanwhile)
+    r = batch(
+        app_client,
+        runner_token,
+        run["id"],
+        [
+            {"order_id": a["id"], "op": "mark_paid"},
+            {"order_id": b["id"], "op": "mark_paid"},
+        ],
+    )
+    results = r.json()["results"]
+    assert [x["ok"] for x in results] == [True, False]
+    assert results[1]["detail"] == "Order changed, try again"
+    detail = app_client.get(
+        f"/runs/id/{run['id']}", headers=auth_headers(runner_token)
+    ).json()
+    assert {o["id"]: o["status"] for o in detail["orders"]} == {a["id"]: "paid"}
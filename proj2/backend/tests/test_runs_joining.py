@@ -1,4 +1,4 @@
-from conftest import register_and_login
+from conftest import QueryCounter, register_and_login
 
 
 def create_run(
@@ -174,3 +174,27 @@ def test_available_excludes_runner_and_full_runs(app_client):
         "/runs/available", headers={"Authorization": f"Bearer {other_token}"}
     )
     assert all(r["id"] != run_id for r in r_av_other.json())
+
+
+def test_joined_endpoints_query_count_independent_of_run_count(app_client):
+    runner_token, _ = register_and_login(app_client, "qc_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "qc_user@ncsu.edu")
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    def joined_query_count():
+        with QueryCounter() as qc:
+            rj = app_client.get("/runs/joined", headers=headers)
+        assert rj.status_code == 200
+        assert all(r["my_order"]["pin"] for r in rj.json())
+        return qc.count, len(rj.json())
+
+    for _ in range(2):
+        run = create_run(app_client, runner_token, capacity=3)
+        join_run(app_client, user_token, run["id"])
+    few, n_few = joined_query_count()
+    for _ in range(6):
+        run = create_run(app_client, runner_token, capacity=3)
+        join_run(app_client, user_token, run["id"])
+    many, n_many = joined_query_count()
+    assert (n_few, n_many) == (2, 8)
+    assert few == many
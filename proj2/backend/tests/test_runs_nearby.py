@@ -0,0 +1,151 @@
+import random
+import time
+
+import pytest
+
+from conftest import QueryCounter, auth_headers, create_run, register_and_login
+
+
+def add_drop_point(name, lat, lon):
+    from sqlmodel import Session
+    from app import db
+    from app.geo import add_drop_point
+
+    with Session(db.engine) as session:
+        return add_drop_point(session, name, lat, lon).id
+
+
+def nearby(client, token, lat, lon, radius):
+    r = client.get(
+        "/runs/nearby",
+        params={"lat": lat, "lon": lon, "radius": radius},
+        headers=auth_headers(token),
+    )
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_nearby_runs_sorted_by_distance(app_client):
+    runner_token, _ = register_and_login(app_client, "geo_runner@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "geo_user@ncsu.edu")
+    # an empty patch of ocean so seeded campus points don't interfere
+    add_drop_point("Geo Near", 10.0005, -40.0)
+    add_drop_point("Geo Mid", 10.0020, -40.0)
+    add_drop_point("Geo Far", 10.0500, -40.0)
+    mid = create_run(app_client, runner_token, drop="geo mid")
+    near = create_run(app_client, runner_token, drop="Geo Near")
+    far = create_run(app_client, runner_token, drop="Geo Far")
+    create_run(app_client, runner_token, drop="Somewhere unknown")
+
+    runs = nearby(app_client, user_token, 10.0, -40.0, 500)
+    assert [r["id"] for r in runs] == [near["id"], mid["id"]]
+    assert 50 < runs[0]["distance_m"] < 60
+    assert 215 < runs[1]["distance_m"] < 230
+    assert far["id"] in [
+        r["id"] for r in nearby(app_client, user_token, 10.0, -40.0, 6000)
+    ]
+    # runners don't see their own runs
+    assert nearby(app_client, runner_token, 10.0, -40.0, 500) == []
+
+
+def test_new_drop_point_links_existing_runs(app_client):
+    from sqlalchemy.exc import IntegrityError
+    from sqlmodel import Session
+    from app import db
+    from app.models import FoodRun
+
+    runner_token, _ = register_and_login(app_client, "geo_runner2@ncsu.edu")
+    user_token, _ = register_and_login(app_client, "geo_user2@ncsu.edu")
+    run = create_run(app_client, runner_token, drop="Geo Late Bench")
+    assert nearby(app_client, user_token, -20.0, 60.0, 300) == []
+
+    other = create_run(app_client, runner_token, drop="Geo Elsewhere")
+
+    with QueryCounter() as counter:
+        add_drop_point("Geo Late Bench", -20.0, 60.0)
+    # insert, link the runs naming it, reload; no full relink of every run
+    assert counter.count == 3
+    assert [r["id"] for r in nearby(app_client, user_token, -20.0, 60.0, 300)] == [
+        run["id"]
+    ]
+    with pytest.raises(IntegrityError):
+        add_drop_point("Geo Late Bench", 0, 0)
+    with Session(db.engine) as session:
+        assert session.get(FoodRun, other["id"]).drop_point_id is None
+
+
+def test_drop_points_cannot_be_created_over_the_api(app_client):
+    token, _ = register_and_login(app_client, "geo_post@ncsu.edu")
+    r = app_client.post(
+        "/drop-points",
+        headers=auth_headers(token),
+        json={"name": "Geo Anyone", "lat": 0, "lon": 0},
+    )
+    assert r.status_code == 405
+
+
+def test_seeded_campus_drop_points_listed(app_client):
+    token, _ = register_and_login(app_client, "geo_list@ncsu.edu")
+    names = [
+        p["name"]
+        for p in app_client.get("/drop-points", headers=auth_headers(token)).json()
+    ]
+    assert "Hunt Library" in names and "Talley Student Union" in names
+
+
+@pytest.mark.bench
+def test_grid_narrows_candidates_on_large_campus(tmp_path):
+    from sqlalchemy import event
+    from sqlmodel import Session, SQLModel, create_engine
+    from app.geo import cell_of, drop_points_within, distances_m
+    from app.models import DropPoint
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'geo.db'}")
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(36)
+    rows = []
+    for i in range(50_000):
+        lat = 35.76 + rng.uniform(0, 0.04)  # roughly 4.5 km x 3.6 km
+        lon = -78.70 + rng.uniform(0, 0.04)
+        cell_lat, cell_lon = cell_of(lat, lon)
+        rows.append(
+            {
+                "name": f"point {i}",
+                "lat": lat,
+                "lon": lon,
+                "cell_lat": cell_lat,
+                "cell_lon": cell_lon,
+            }
+        )
+    with engine.begin() as conn:
+        conn.execute(DropPoint.__table__.insert(), rows)
+
+    statements = []
+
+    def count_statements(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "after_cursor_execute", count_statements)
+    timings = []
+    with Session(engine) as session:
+        for _ in range(20):
+            lat = 35.76 + rng.uniform(0.005, 0.035)
+            lon = -78.70 + rng.uniform(0.005, 0.035)
+            start = time.perf_counter()
+            found = drop_points_within(session, lat, lon, 300)
+            timings.append(time.perf_counter() - start)
+            # brute force agrees with the bucketed search
+            truth = {
+                i + 1
+                for i, d in enumerate(
+                    distances_m(
+                        lat, lon, [r["lat"] for r in rows], [r["lon"] for r in rows]
+                    )
+                )
+                if d <= 300
+            }
+            assert set(found) == truth
+    timings.sort()
+    median = timings[len(timings) // 2]
+    assert len(statements) == 20  # one indexed query per lookup
+    assert median < 0.1
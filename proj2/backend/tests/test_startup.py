@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+from conftest import QueryCounter
+
+# Generous enough for slow CI machines; today a cold start takes ~0.7s
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "3"))
+
+
+def test_time_to_first_response_within_budget(tmp_path):
+    from app.startup import time_to_first_response
+
+    url = f"sqlite:///{tmp_path / 'cold.db'}"
+    first_boot = time_to_first_response(url)
+    assert first_boot["status"] == 200
+    # second boot of the same database: schema is current, only a version check
+    report = time_to_first_response(url)
+    assert report["status"] == 200
+    assert set(report["phases"]) >= {"migrate", "background_jobs"}
+    assert report["total"] < STARTUP_BUDGET_SECONDS, report
+
+
+def test_warm_boot_runs_only_the_version_check(app_client):
+    import asyncio
+
+    from app.main import app
+
+    async def boot():
+        async with app.router.lifespan_context(app):
+            pass
+
+    # the app_client fixture already booted, so the schema is current
+    with QueryCounter() as counter:
+        asyncio.run(boot())
+    assert counter.count == 1
+
+
+def test_heavy_modules_are_not_imported_until_used(tmp_path):
+    from app.startup import BACKEND_DIR
+
+    code = (
+        "import sys, app.main, app.db\n"
+        "print(sorted(m for m in ('passlib.context', 'jose.jwt') "
+        "if m in sys.modules))\n"
+        "print('primary' in app.db._engines)\n"
+    )
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'lazy.db'}"}
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+    ).stdout.splitlines()
+    assert out == ["[]", "False"]
+
+
+def test_import_profile_lists_packages():
+    from app.startup import import_profile
+
+    names = dict(import_profile())
+    assert "sqlalchemy" in names and "app.models" in names
+    assert all(seconds >= 0 for seconds in names.values())